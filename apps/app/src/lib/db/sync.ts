@@ -20,8 +20,47 @@ function edgeSnakeToCamel(edge: any): any {
   };
 }
 
+type AuthFetch = (url: string, options?: RequestInit) => Promise<Response>
+
+// Apply one /pull (or streamed delta) body to the local database and advance the cursor
+// eslint-disable-next-line @typescript-eslint/no-explicit-any
+async function applyPull(campaignSlug: string, pull: any) {
+  const db = getDb(campaignSlug)
+
+  // Nodes: only update if remote is newer, to preserve local changes
+  const resolvedNodes = []
+  for (const remoteNode of pull.nodes) {
+    const localNode = await db.nodes.get(remoteNode.id)
+    if (!localNode || remoteNode.updatedAt > localNode.updatedAt) {
+      resolvedNodes.push(remoteNode)
+    }
+  }
+  if (resolvedNodes.length) await db.nodes.bulkPut(resolvedNodes)
+
+  // Edges: same conflict resolution, after converting to camelCase
+  const resolvedEdges = []
+  for (const remoteEdge of pull.edges.map(edgeSnakeToCamel)) {
+    const localEdge = await db.edges.get(remoteEdge.id)
+    if (!localEdge || remoteEdge.updatedAt > localEdge.updatedAt) {
+      resolvedEdges.push(remoteEdge)
+    }
+  }
+  if (resolvedEdges.length) await db.edges.bulkPut(resolvedEdges)
+
+  if (pull.folders.length) await db.folders.bulkPut(pull.folders)
+  if (pull.chats.length) await db.chats.bulkPut(pull.chats)
+  if (pull.chatMessages.length) await db.chatMessages.bulkPut(pull.chatMessages)
+
+  // Deletions are keyed by table name
+  for (const { entity, id } of pull.deleted as { entity: string; id: string }[]) {
+    await db.table(entity).delete(id)
+  }
+
+  await db.metadata.put({ id: 'syncCursor', value: pull.cursor, updatedAt: Date.now() })
+}
+
 export async function pushPull(
-  authFetch: (url: string, options?: RequestInit) => Promise<Response>,
+  authFetch: AuthFetch,
   campaignSlug: string
 ) {
   const db = getDb(campaignSlug)
@@ -52,6 +91,8 @@ export async function pushPull(
 
     // 1. push local changes
     const changes: Change[] = await db.changes.toArray()
+    // bookmarks of our push: the pull waits until the server serving it has them
+    let bookmarks: string[] = []
     if (changes.length) {
       const res = await authFetch(`${API}/${campaignSlug}`, {
         method: 'POST',
@@ -62,6 +103,7 @@ export async function pushPull(
       })
       if (res.ok) {
         await db.changes.clear()
+        bookmarks = (await res.json()).bookmarks ?? []
       } else {
         // Push failed
         await setSyncState(campaignSlug, 'error')
@@ -69,84 +111,28 @@ export async function pushPull(
       }
     }
     
-    // 2. pull fresh nodes with conflict resolution
-    const lastNode = (await db.nodes.orderBy('updatedAt').last())?.updatedAt ?? 0;
-    const freshNodes = await authFetch(
-      `${API}/${campaignSlug}/nodes/since/${lastNode}`,
-      { headers: { 'Content-Type':'application/json'} }
-    ).then(r => r.json());
-    
-    if (freshNodes.length) {
-      // Apply conflict resolution - only update if remote is newer
-      const resolvedNodes = []
-      for (const remoteNode of freshNodes) {
-        const localNode = await db.nodes.get(remoteNode.id)
-        
-        if (!localNode || remoteNode.updatedAt > localNode.updatedAt) {
-          // Remote is newer or doesn't exist locally - use remote version
-          resolvedNodes.push(remoteNode)
-        }
-        // If local is newer, skip this remote node to preserve local changes
-      }
-      
-      if (resolvedNodes.length) {
-        await db.nodes.bulkPut(resolvedNodes);
-      }
-    }
-    
-    // 3. pull fresh edges with conflict resolution
-    const lastEdge = (await db.edges.orderBy('updatedAt').last())?.updatedAt ?? 0;
-    const freshEdges = await authFetch(
-      `${API}/${campaignSlug}/edges/since/${lastEdge}`,
-      { headers: { 'Content-Type':'application/json' } }
-    ).then(r => r.json());
-
-    if (freshEdges.length) {
-      const camelEdges = freshEdges.map(edgeSnakeToCamel);
-      
-      // Apply conflict resolution - only update if remote is newer
-      const resolvedEdges = []
-      for (const remoteEdge of camelEdges) {
-        const localEdge = await db.edges.get(remoteEdge.id)
-        
-        if (!localEdge || remoteEdge.updatedAt > localEdge.updatedAt) {
-          // Remote is newer or doesn't exist locally - use remote version
-          resolvedEdges.push(remoteEdge)
+    // 2. pull every entity delta since our change-log cursor in one request
+    //    (skipped while the event stream is live; it delivers our push too)
+    let hasMore = !isSyncStreamLive(campaignSlug)
+    while (hasMore) {
+      const since = Number((await db.metadata.get('syncCursor'))?.value ?? 0)
+      const res = await authFetch(
+        `${API}/${campaignSlug}/pull?since=${since}`,
+        {
+          headers: {
+            'Content-Type':'application/json',
+            ...(bookmarks.length ? { 'X-Sync-Bookmarks': bookmarks.join(',') } : {}),
+          },
         }
-        // If local is newer, skip this remote edge to preserve local changes
-      }
-      
-      if (resolvedEdges.length) {
-        await db.edges.bulkPut(resolvedEdges);
+      )
+      if (!res.ok) {
+        await setSyncState(campaignSlug, 'error')
+        return
       }
+      const pull = await res.json()
+      await applyPull(campaignSlug, pull)
+      hasMore = pull.hasMore
     }
-    
-    // 4. pull fresh folders
-    const lastFolder = (await db.folders.orderBy('updatedAt').last())?.updatedAt ?? 0;
-    const freshFolders = await authFetch(
-      `${API}/${campaignSlug}/folders/since/${lastFolder}`,
-      { headers: { 'Content-Type':'application/json' } }
-    ).then(r => r.json());
-
-    if (freshFolders.length) await db.folders.bulkPut(freshFolders);
-
-    // 5. pull fresh chat sessions
-    const lastChat = (await db.chats.orderBy('updatedAt').last())?.updatedAt ?? 0;
-    const freshChats = await authFetch(
-      `${API}/${campaignSlug}/chats/since/${lastChat}`,
-      { headers: { 'Content-Type':'application/json' } }
-    ).then(r => r.json());
-
-    if (freshChats.length) await db.chats.bulkPut(freshChats);
-
-    // 6. pull fresh chat messages
-    const lastChatMessage = (await db.chatMessages.orderBy('createdAt').last())?.createdAt ?? 0;
-    const freshChatMessages = await authFetch(
-      `${API}/${campaignSlug}/chat-messages/since/${lastChatMessage}`,
-      { headers: { 'Content-Type':'application/json' } }
-    ).then(r => r.json());
-
-    if (freshChatMessages.length) await db.chatMessages.bulkPut(freshChatMessages);
 
     await setSyncState(campaignSlug, 'idle')
   } catch {
@@ -155,35 +141,68 @@ export async function pushPull(
   }
 }
 
-// TODO: Implement something like the below
-// export async function pull() {
-//   // 1. read the last sync cursor (server time!) from a tiny meta table
-//   const meta = await db.table('meta').get('lastSync')
-//   const since = meta?.value ?? 0
-
-//   // 2. ask server for *changes* since that cursor
-//   const res = await fetch(`${API}/${campaignSlug}/since/${since}`)
-//   if (!res.ok) {
-//     console.error('Pull failed', await res.text())
-//     return
-//   }
-//   const { changes, maxTs } = await res.json()   // { changes: [...], maxTs: 1720562625123 }
-
-//   if (!changes.length) return
-
-//   // 3. apply changes atomically
-//   await db.transaction('rw', db.nodes, db.meta, async () => {
-//     for (const ch of changes) {
-//       if (ch.op === 'delete') {
-//         await db.nodes.delete(ch.nodeId)
-//       } else if (ch.op === 'upsert') {
-//         const local = await db.nodes.get(ch.node.id)
-//         if (!local || ch.node.updatedAt > local.updatedAt) {
-//           await db.nodes.put(ch.node)          // upsert newer version
-//         }
-//       }
-//     }
-//     // 4. persist new cursor
-//     await db.meta.put({ id: 'lastSync', value: maxTs })
-//   })
-// }
\ No newline at end of file
+// Campaigns with a live event stream; their deltas arrive without polling
+const liveStreams = new Set<string>()
+
+export function isSyncStreamLive(campaignSlug: string) {
+  return liveStreams.has(campaignSlug)
+}
+
+/**
+ * Keep a Server-Sent Events connection to /sync/{slug}/events open until
+ * `signal` aborts, applying each delta as it arrives and reconnecting with
+ * backoff. fetch() is used instead of EventSource so the auth header is sent.
+ */
+export async function subscribeToSync(
+  authFetch: AuthFetch,
+  campaignSlug: string,
+  signal: AbortSignal
+) {
+  const db = getDb(campaignSlug)
+  let backoff = 1000
+
+  while (!signal.aborted) {
+    try {
+      const since = Number((await db.metadata.get('syncCursor'))?.value ?? 0)
+      const res = await authFetch(`${API}/${campaignSlug}/events?since=${since}`, {
+        headers: { Accept: 'text/event-stream' },
+        signal,
+      })
+      if (!res.ok || !res.body) throw new Error(`Event stream failed: ${res.status}`)
+
+      liveStreams.add(campaignSlug)
+      backoff = 1000
+
+      const reader = res.body.pipeThrough(new TextDecoderStream()).getReader()
+      let buffer = ''
+      for (;;) {
+        const { value, done } = await reader.read()
+        if (done) break
+        buffer += value
+
+        // Frames are separated by a blank line
+        let end: number
+        while ((end = buffer.indexOf('\n\n')) !== -1) {
+          const frame = buffer.slice(0, end)
+          buffer = buffer.slice(end + 2)
+
+          let event = 'message'
+          let data = ''
+          for (const line of frame.split('\n')) {
+            if (line.startsWith('event: ')) event = line.slice(7)
+            else if (line.startsWith('data: ')) data += line.slice(6)
+          }
+          if (event === 'delta' && data) await applyPull(campaignSlug, JSON.parse(data))
+        }
+      }
+    } catch {
+      // Network error or abort; fall through to reconnect
+    } finally {
+      liveStreams.delete(campaignSlug)
+    }
+
+    if (signal.aborted) break
+    await new Promise(resolve => setTimeout(resolve, backoff))
+    backoff = Math.min(backoff * 2, 30000)
+  }
+}
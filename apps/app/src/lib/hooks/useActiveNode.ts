@@ -59,6 +59,23 @@ export function useActiveNode(campaign: string, nodeId: string, isTyping: boolea
   const editorContent = node?.editorJson || null
   const title = node?.title ?? 'Untitled'
   
+  // Nodes seeded from the slim sidebar have no body yet; fetch it on open
+  useEffect(() => {
+    if (!node || !campaign || node.markdown !== undefined || node.editorJson !== undefined) {
+      return
+    }
+    ;(async () => {
+      try {
+        const res = await authFetch(`/api/sync/${campaign}/nodes?ids=${encodeURIComponent(node.id)}`)
+        if (!res.ok) return
+        const [body] = await res.json()
+        if (body) await db.nodes.update(node.id, body)
+      } catch {
+        // Body fetch failed - the next open will retry
+      }
+    })()
+  }, [node, campaign, authFetch, db])
+
   // Track migration status to help with loading states
   const isMigrating = !!(node && node.markdown && !node.editorJson)
   
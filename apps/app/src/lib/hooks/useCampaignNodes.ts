@@ -3,7 +3,7 @@
 import { useLiveQuery } from 'dexie-react-hooks'
 import { useEffect } from 'react'
 import { getDb } from '@/lib/db/campaignDB'
-import { pushPull } from '@/lib/db/sync'
+import { pushPull, subscribeToSync } from '@/lib/db/sync'
 import { useAuthFetch } from '@/utils/authFetch.client'
 import { Note } from '@/types/node'
 
@@ -37,7 +37,7 @@ export const useCampaignNodes = (campaignSlug?: string) => {
     ;(async () => {
       try {
         const fresh = await authFetch(
-          `/api/sync/${campaignSlug}/sidebar`
+          `/api/sync/${campaignSlug}/sidebar?slim=true`
         ).then(r => r.json())
         if (fresh.length) {
           // Ensure nodes have the new campaignIds field
@@ -67,6 +67,15 @@ export const useCampaignNodes = (campaignSlug?: string) => {
     return () => { stop = true }
   }, [authFetch, campaignSlug])
 
+  // 3. Live deltas from other devices and the embedding worker
+  useEffect(() => {
+    if (!campaignSlug) return
+
+    const controller = new AbortController()
+    subscribeToSync(authFetch, campaignSlug, controller.signal)
+    return () => controller.abort()
+  }, [authFetch, campaignSlug])
+
   // Return undefined if no campaign slug, otherwise return nodes
   return campaignSlug ? nodes : undefined
 }
\ No newline at end of file
@@ -6,7 +6,7 @@ from typing import Optional
 from fastapi import HTTPException, Request
 from clerk_backend_api import Clerk
 from clerk_backend_api.security.types import AuthenticateRequestOptions
-from backend.services.neo4j import query
+from backend.services.neo4j import aquery
 
 # Initialize Clerk client
 clerk_client = Clerk(bearer_auth=os.getenv("CLERK_SECRET_KEY"))
@@ -17,7 +17,7 @@ _user_cache = set()  # set of user_ids that exist in database
 AUTH_CACHE_TTL = 300  # 5 minutes in seconds
 
 
-def ensure_user_exists(user_id: str):
+async def ensure_user_exists(user_id: str):
     """
     Ensure a User node exists in Neo4j for the given user_id.
     Creates the user if they don't exist. Uses cache to avoid redundant queries.
@@ -27,7 +27,7 @@ def ensure_user_exists(user_id: str):
         return
     
     try:
-        result = query(
+        result = await aquery(
             """
             MERGE (u:User {id: $user_id})
             ON CREATE SET u.createdAt = timestamp(), u.updatedAt = timestamp()
@@ -84,7 +84,7 @@ async def get_current_user(request: Request) -> str:
         cached_user_id = _get_cached_auth(token)
         if cached_user_id:
             # Still ensure user exists (cached separately)
-            ensure_user_exists(cached_user_id)
+            await ensure_user_exists(cached_user_id)
             return cached_user_id
 
         # Use Clerk's built-in authentication
@@ -125,7 +125,7 @@ async def get_current_user(request: Request) -> str:
         _cache_auth(token, user_id)
         
         # Ensure user exists in Neo4j database
-        ensure_user_exists(user_id)
+        await ensure_user_exists(user_id)
 
         return user_id
 
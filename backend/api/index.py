@@ -12,13 +12,27 @@ app = FastAPI()
 async def startup_event():
     print("🚀 FastAPI starting up...")
     try:
-        from backend.services.neo4j import verify
-        verify()
+        from backend.services.neo4j import averify
+        await averify()
         print("✅ Neo4j connection verified successfully!")
     except Exception as e:
         print(f"❌ Neo4j connection failed during startup: {e}")
         # Don't raise here - let the app start but log the issue
 
+    from backend.services.sync.statements import get_statement_registry
+    registry = get_statement_registry()
+    print(f"✅ Prepared {len(registry.statements)} sync statements")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from backend.services.neo4j import aclose
+    from backend.services.embeddings.service import aclose_embedding_service
+    from backend.services.sync.events import get_sync_event_broker
+    await get_sync_event_broker().aclose()
+    await aclose_embedding_service()
+    await aclose()
+
 # Configure CORS for multiple origins
 import os
 
@@ -1,4 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from backend.services.usage_service import UsageService
 from backend.models.schemas import (
     UsageSummary,
@@ -8,11 +10,12 @@ from backend.models.schemas import (
 )
 from backend.api.auth import get_current_user
 from backend.api.admin_auth import get_admin_api_key_from_header
-from backend.services.queue_service import get_task_queue, get_queue_stats
+from backend.services.queue_service import get_queue_stats
 from backend.services.sync_hooks import get_sync_embedding_hook
 from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
+import json
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -23,7 +26,7 @@ async def get_user_usage(
 ) -> UsageSummary:
     """Get usage summary for a specific user. For Clerk admin integration."""
     try:
-        usage_summary = UsageService.get_usage_summary(user_id)
+        usage_summary = await run_in_threadpool(UsageService.get_usage_summary, user_id)
         return usage_summary
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -39,7 +42,7 @@ async def get_user_usage_history(
 ):
     """Get usage history for a specific user."""
     try:
-        from backend.services.neo4j import query
+        from backend.services.neo4j import ADMIN, aread_query
 
         # Parse dates if provided
         start_dt = None
@@ -72,32 +75,9 @@ async def get_user_usage_history(
             LIMIT $limit
         """
 
-        result = query(cypher, **params)
+        result = await aread_query(cypher, pool_=ADMIN, **params)
 
-        usage_events = []
-        for record in result:
-            # Convert Neo4j datetime object to ISO string
-            timestamp = record["timestamp"]
-            if hasattr(timestamp, "to_native"):
-                # Neo4j datetime object
-                timestamp_str = timestamp.to_native().isoformat()
-            elif isinstance(timestamp, str):
-                # Already a string
-                timestamp_str = timestamp
-            else:
-                # Python datetime object
-                timestamp_str = timestamp.isoformat()
-
-            usage_events.append(
-                {
-                    "timestamp": timestamp_str,
-                    "model": record["model"],
-                    "input_tokens": record["input_tokens"],
-                    "output_tokens": record["output_tokens"],
-                    "cost": float(record["cost"]),
-                    "campaign_id": record["campaign_id"],
-                }
-            )
+        usage_events = [_usage_event(record) for record in result]
 
         return {
             "user_id": user_id,
@@ -109,6 +89,63 @@ async def get_user_usage_history(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _usage_event(record: dict) -> dict:
+    # Convert Neo4j datetime object to ISO string
+    timestamp = record["timestamp"]
+    if hasattr(timestamp, "to_native"):
+        # Neo4j datetime object
+        timestamp_str = timestamp.to_native().isoformat()
+    elif isinstance(timestamp, str):
+        # Already a string
+        timestamp_str = timestamp
+    else:
+        # Python datetime object
+        timestamp_str = timestamp.isoformat()
+
+    return {
+        "timestamp": timestamp_str,
+        "model": record["model"],
+        "input_tokens": record["input_tokens"],
+        "output_tokens": record["output_tokens"],
+        "cost": float(record["cost"]),
+        "campaign_id": record["campaign_id"],
+    }
+
+
+@router.get("/users/{user_id}/usage/export")
+async def export_user_usage(
+    user_id: str, current_user: str = Depends(get_current_user)
+):
+    """
+    Export a user's full usage history as newline-delimited JSON.
+
+    Events are streamed from the database as they are written out, so the
+    export holds one fetch batch in memory however long the history is.
+    """
+    from backend.services.neo4j import ADMIN, astream_query
+
+    cypher = """
+        MATCH (u:UsageEvent)
+        WHERE u.user_id = $user_id
+        RETURN u.timestamp as timestamp, u.model as model,
+               u.input_tokens as input_tokens, u.output_tokens as output_tokens,
+               u.cost as cost, u.campaign_id as campaign_id
+        ORDER BY u.timestamp DESC
+    """
+
+    async def lines():
+        async for record in astream_query(cypher, pool_=ADMIN, user_id=user_id):
+            yield json.dumps(_usage_event(record)) + "\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="usage-{user_id}.ndjson"'
+        },
+    )
+
+
 @router.put("/users/{user_id}/usage-limit")
 async def set_user_usage_limit(
     user_id: str,
@@ -122,7 +159,9 @@ async def set_user_usage_limit(
                 status_code=400, detail="Monthly limit must be non-negative"
             )
 
-        updated_limit = UsageService.set_user_limit(user_id, request.monthly_limit)
+        updated_limit = await run_in_threadpool(
+            UsageService.set_user_limit, user_id, request.monthly_limit
+        )
 
         return {
             "message": f"Usage limit updated for user {user_id}",
@@ -140,7 +179,7 @@ async def set_user_usage_limit(
 async def get_usage_stats(current_user: str = Depends(get_current_user)):
     """Get overall usage statistics for all users."""
     try:
-        from backend.services.neo4j import query
+        from backend.services.neo4j import ADMIN, aread_query
 
         # Get overall stats
         stats_query = """
@@ -155,7 +194,7 @@ async def get_usage_stats(current_user: str = Depends(get_current_user)):
             ORDER BY model_usage_count DESC
         """
 
-        result = query(stats_query)
+        result = await aread_query(stats_query, pool_=ADMIN)
 
         # Get monthly stats
         now = datetime.now()
@@ -170,7 +209,9 @@ async def get_usage_stats(current_user: str = Depends(get_current_user)):
                 count(DISTINCT u.user_id) as monthly_active_users
         """
 
-        monthly_result = query(monthly_query, start_of_month=start_of_month.isoformat())
+        monthly_result = await aread_query(
+            monthly_query, pool_=ADMIN, start_of_month=start_of_month.isoformat()
+        )
 
         # Format response
         stats = {
@@ -207,7 +248,7 @@ async def get_usage_stats(current_user: str = Depends(get_current_user)):
             LIMIT 10
         """
 
-        model_result = query(model_query)
+        model_result = await aread_query(model_query, pool_=ADMIN)
         model_stats = []
         for record in model_result:
             model_stats.append(
@@ -232,7 +273,7 @@ async def get_usage_stats(current_user: str = Depends(get_current_user)):
 async def get_all_user_limits(current_user: str = Depends(get_current_user)):
     """Get usage limits for all users."""
     try:
-        from backend.services.neo4j import query
+        from backend.services.neo4j import ADMIN, aread_query
 
         # Get all user limits
         limits_query = """
@@ -242,12 +283,14 @@ async def get_all_user_limits(current_user: str = Depends(get_current_user)):
             ORDER BY l.user_id
         """
 
-        result = query(limits_query)
+        result = await aread_query(limits_query, pool_=ADMIN)
 
         user_limits = []
         for record in result:
             # Get current usage for each user
-            current_usage = UsageService.get_current_month_usage(record["user_id"])
+            current_usage = await run_in_threadpool(
+                UsageService.get_current_month_usage, record["user_id"]
+            )
 
             user_limits.append(
                 {
@@ -273,6 +316,61 @@ async def get_all_user_limits(current_user: str = Depends(get_current_user)):
 
 
 # ───────────────────────────────────── EMBEDDING ADMIN ENDPOINTS ──
+@router.get("/neo4j/pools")
+async def get_neo4j_pool_metrics(current_user: str = Depends(get_current_user)):
+    """
+    Connection pool utilisation for this API process, per named pool.
+
+    Counters are per process; RQ workers keep their own and are not included.
+    """
+    from backend.services.neo4j import pool_metrics
+    import os
+
+    return {"pid": os.getpid(), "pools": pool_metrics()}
+
+
+@router.get("/neo4j/queries")
+async def get_neo4j_query_stats(
+    limit: int = Query(20, description="Number of statements to return"),
+    order_by: str = Query(
+        "total_ms", description="Stat to rank by, e.g. total_ms, mean_ms, max_ms, calls"
+    ),
+    current_user: str = Depends(get_current_user),
+):
+    """
+    Top Cypher statements in this API process, ranked by `order_by`.
+
+    Each entry carries call/error/row counts, the latency histogram, mean
+    server-side timings and the last captured plan of slow executions.
+    `statement_registry` is the hit ratio of the sync push's prepared
+    statements; `prepared` marks statements that came from it.
+    """
+    from backend.services.neo4j import top_statements
+    from backend.services.neo4j.instrumentation import (
+        PROFILE_COOLDOWN_S,
+        SLOW_QUERY_MS,
+        registry_stats,
+    )
+    import os
+
+    return {
+        "pid": os.getpid(),
+        "slow_query_ms": SLOW_QUERY_MS,
+        "profile_cooldown_s": PROFILE_COOLDOWN_S,
+        "statement_registry": registry_stats(),
+        "statements": top_statements(limit=limit, order_by=order_by),
+    }
+
+
+@router.post("/neo4j/queries/reset")
+async def reset_neo4j_query_stats(current_user: str = Depends(get_current_user)):
+    """Clear the per-statement stats of this API process."""
+    from backend.services.neo4j import reset_stats
+
+    reset_stats()
+    return {"status": "reset"}
+
+
 @router.post("/embeddings/missing", response_model=BatchEmbeddingResult)
 async def process_missing_embeddings(
     campaign_id: Optional[str] = Query(None, description="Campaign ID to process, or null for global"),
@@ -281,12 +379,13 @@ async def process_missing_embeddings(
 ):
     """Find and process nodes that don't have embeddings."""
     try:
+        from backend.services.embeddings import scheduler
         from backend.services.embeddings.tasks import find_and_process_missing_embeddings
         
-        # Queue the missing embeddings task
-        queue = get_task_queue("priority")  # Use priority queue for admin tasks
-        
-        task = queue.enqueue(
+        # Bounded admin sweep: behind interactive work, ahead of backfills
+        task = await run_in_threadpool(
+            scheduler.submit,
+            scheduler.MAINTENANCE,
             find_and_process_missing_embeddings,
             campaign_id=campaign_id,
             limit=limit,
@@ -313,7 +412,7 @@ async def force_process_sync_pending(
     """Force process any pending embedding updates from sync operations."""
     try:
         hook = get_sync_embedding_hook()
-        result = hook.force_check_all_pending()
+        result = await run_in_threadpool(hook.force_check_all_pending)
         
         return {
             "message": result["message"],
@@ -333,28 +432,37 @@ async def get_embedding_system_status(
 ):
     """Get status of the embedding system including queue stats."""
     try:
-        from backend.services.neo4j import query
+        from backend.services.neo4j import ADMIN, aread_query
+        from backend.services.embeddings.store import EMBEDDABLE_PREDICATE
         import os
         
         # Get overall embedding statistics
-        stats_query = """
+        stats_query = f"""
         MATCH (n)
-        WHERE (n:Campaign OR n:Session OR n:NPC OR n:Character OR n:Location OR n:Note)
+        WHERE {EMBEDDABLE_PREDICATE}
         AND n.title IS NOT NULL
+        OPTIONAL MATCH (e:Embedding)-[:EMBEDS]->(n)
+        WITH n, e
         RETURN 
             count(n) as total_nodes,
-            count(n.embedding) as embedded_nodes,
-            count(CASE WHEN n.embedding IS NULL OR size(n.embedding) = 0 THEN 1 END) as missing_embeddings,
-            count(CASE WHEN n.updatedAt > coalesce(n.embeddedAt, datetime('1970-01-01')) THEN 1 END) as stale_embeddings
+            count(e) as embedded_nodes,
+            count(CASE WHEN e IS NULL THEN 1 END) as missing_embeddings,
+            count(CASE WHEN n.updatedAt > e.embeddedAt THEN 1 END) as stale_embeddings
         """
         
-        result = query(stats_query)
+        result = await aread_query(stats_query, pool_=ADMIN)
         stats = result[0] if result else {
             "total_nodes": 0,
             "embedded_nodes": 0, 
             "missing_embeddings": 0,
             "stale_embeddings": 0
         }
+
+        # Index count of the flag the backfill works from
+        flagged = await aread_query(
+            "MATCH (n:Entity) WHERE n.needsEmbedding = true RETURN count(n) AS flagged",
+            pool_=ADMIN,
+        )
         
         # Get queue statistics
         queue_stats = {
@@ -362,9 +470,20 @@ async def get_embedding_system_status(
             "priority": get_queue_stats("priority"),
             "long_running": get_queue_stats("long_running")
         }
+        from backend.services.embeddings import scheduler
+        try:
+            # Per priority class: depth, queue wait and processing latency
+            scheduler_stats = await run_in_threadpool(scheduler.stats)
+        except Exception as e:
+            scheduler_stats = {"error": str(e)}
         
         # Get sync hook status
         hook = get_sync_embedding_hook()
+
+        from backend.services.embeddings.cache import get_embedding_cache
+        from backend.services.embeddings.query_cache import get_query_embedding_cache
+        from backend.services.embeddings.service import get_embedding_service
+        cache_stats = await run_in_threadpool(get_embedding_cache().stats)
         
         return {
             "embedding_stats": {
@@ -372,18 +491,20 @@ async def get_embedding_system_status(
                 "embedded_nodes": stats["embedded_nodes"],
                 "missing_embeddings": stats["missing_embeddings"],
                 "stale_embeddings": stats["stale_embeddings"],
+                "needs_embedding": flagged[0]["flagged"] if flagged else 0,
                 "embedding_coverage": stats["embedded_nodes"] / max(stats["total_nodes"], 1)
             },
-            "sync_hook": {
-                "background_enabled": hook.use_background_queue,
-                "sync_threshold": hook.sync_count_threshold,
-                "current_sync_count": hook.sync_count,
-                "pending_nodes": len(hook.nodes_to_check)
-            },
+            # Debounced dirty set, shared by every API worker
+            "sync_hook": await run_in_threadpool(hook.stats),
             "queue_stats": queue_stats,
+            "scheduler": scheduler_stats,
+            "embedding_cache": cache_stats,
+            # Per API process
+            "query_embedding_cache": get_query_embedding_cache().stats(),
+            "embedding_client": get_embedding_service().client.stats(),
             "configuration": {
                 "background_enabled": os.getenv("EMBEDDING_BACKGROUND_ENABLED", "true"),
-                "sync_threshold": os.getenv("SYNC_EMBEDDING_THRESHOLD", "5"),
+                "quiet_seconds": os.getenv("EMBEDDING_QUIET_SECONDS", "10"),
                 "embedding_model": os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
             }
         }
@@ -397,66 +518,34 @@ async def setup_embeddings(
     request: Request,
     api_key: str = Depends(get_admin_api_key_from_header)
 ):
-    """Set up vector indexes and generate initial embeddings."""
+    """Set up vector indexes and queue a backfill of every node needing an embedding."""
     try:
-        from backend.services.neo4j.setup_embeddings import create_vector_index, check_vector_index
-        from backend.services.embeddings.service import get_embedding_service
-        from backend.services.neo4j import query
-        import hashlib
+        from backend.services.neo4j.setup_embeddings import (
+            backfill_needs_embedding,
+            check_vector_index,
+            create_vector_index,
+        )
+        from backend.services.embeddings import scheduler
         
         # Create vector indexes
-        create_vector_index()
+        await run_in_threadpool(create_vector_index)
         
         # Check index status
-        indexes = check_vector_index()
+        indexes = await run_in_threadpool(check_vector_index)
         
-        # Generate embeddings for nodes that don't have them
-        nodes_query = """
-        MATCH (n)
-        WHERE n.title IS NOT NULL 
-        AND n.embedding IS NULL
-        AND (n:Campaign OR n:Session OR n:NPC OR n:Character OR n:Location OR n:Note)
-        RETURN n.id AS id, n.title AS title, n.markdown AS markdown, labels(n)[0] AS type
-        ORDER BY n.createdAt DESC
-        LIMIT 100
-        """
+        # Flag content written before the staleness index existed
+        flagged = await run_in_threadpool(backfill_needs_embedding)
         
-        nodes = query(nodes_query)
+        # Embedded on the worker by a checkpointed, resumable backfill
+        queued = await run_in_threadpool(scheduler.submit_backfill, None)
         
-        if nodes:
-            embedding_service = get_embedding_service()
-            success_count = 0
-            
-            for node in nodes:
-                try:
-                    text_to_embed = f"{node['title']}\n{node['markdown'] or ''}"
-                    embedding = embedding_service.generate_embedding(text_to_embed)
-                    content_hash = hashlib.md5(text_to_embed.encode()).hexdigest()
-                    
-                    update_query = """
-                    MATCH (n {id: $node_id})
-                    SET n.embedding = $embedding, 
-                        n.embeddedAt = timestamp(),
-                        n.contentHash = $content_hash
-                    """
-                    query(update_query, node_id=node["id"], embedding=embedding, content_hash=content_hash)
-                    success_count += 1
-                except Exception as e:
-                    continue
-            
-            return {
-                "message": "Embedding setup complete",
-                "indexes_created": len(indexes),
-                "nodes_embedded": success_count,
-                "total_nodes_found": len(nodes)
-            }
-        else:
-            return {
-                "message": "Vector indexes created, no nodes need embedding",
-                "indexes_created": len(indexes),
-                "nodes_embedded": 0,
-                "total_nodes_found": 0
-            }
+        return {
+            "message": "Vector indexes created, embedding backfill queued",
+            "indexes_created": len(indexes),
+            "nodes_flagged": flagged,
+            "task_id": queued["job_id"],
+            "backfill": queued["checkpoint"],
+        }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to setup embeddings: {str(e)}")
@@ -466,27 +555,88 @@ async def setup_embeddings(
 async def process_campaign_embeddings(
     campaign_id: str,
     force: bool = Query(False, description="Force re-embedding of all nodes"),
+    restart: bool = Query(False, description="Start over instead of resuming from the checkpoint"),
     current_user: str = Depends(get_current_user)
 ):
     """Process embeddings for all nodes in a campaign."""
     try:
-        from backend.services.embeddings.tasks import process_campaign_embeddings
+        from backend.services.embeddings import scheduler
         
-        # Queue the campaign embeddings task
-        queue = get_task_queue("long_running")  # Use long-running queue for campaign-wide tasks
+        # Preemptible backfill, one running walk per campaign, resumed from
+        # its checkpoint unless restarted
+        queued = await run_in_threadpool(scheduler.submit_backfill, campaign_id, force, restart)
         
-        task = queue.enqueue(
-            process_campaign_embeddings,
-            campaign_id=campaign_id,
-            force=force,
-            job_timeout='30m'  # Allow longer timeout for campaign-wide processing
+        if queued["deduplicated"]:
+            message = f"Embeddings for campaign {campaign_id} are already being processed"
+        else:
+            message = f"Queued task to process embeddings for campaign {campaign_id}"
+        return {
+            "message": message,
+            "task_id": queued["job_id"],
+            "force": force,
+            "backfill": queued["checkpoint"],
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue campaign embeddings task: {str(e)}")
+
+
+@router.get("/embeddings/backfills")
+async def list_embedding_backfills(
+    current_user: str = Depends(get_current_user)
+):
+    """Checkpoints of embedding backfills, with throughput and ETA."""
+    try:
+        from backend.services.embeddings.backfill import get_backfill_checkpoints
+        
+        checkpoints = await run_in_threadpool(get_backfill_checkpoints().all)
+        return {"backfills": checkpoints}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list embedding backfills: {str(e)}")
+
+
+@router.post("/embeddings/backfills/{campaign_id}/pause")
+async def pause_embedding_backfill(
+    campaign_id: str,
+    current_user: str = Depends(get_current_user)
+):
+    """Pause a campaign's backfill (\"global\" for all nodes) before its next batch."""
+    try:
+        from backend.services.embeddings.backfill import get_backfill_checkpoints
+        
+        paused = await run_in_threadpool(
+            get_backfill_checkpoints().pause, None if campaign_id == "global" else campaign_id
         )
+        if not paused:
+            raise HTTPException(status_code=404, detail="No running backfill for this campaign")
+        return {"message": f"Backfill of {campaign_id} pausing after its current batch"}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to pause embedding backfill: {str(e)}")
+
+
+@router.post("/embeddings/backfills/{campaign_id}/resume")
+async def resume_embedding_backfill(
+    campaign_id: str,
+    current_user: str = Depends(get_current_user)
+):
+    """Resume a paused or failed backfill from its checkpoint."""
+    try:
+        from backend.services.embeddings import scheduler
         
+        queued = await run_in_threadpool(scheduler.resume_backfill, campaign_id)
+        if queued is None:
+            raise HTTPException(status_code=404, detail="No unfinished backfill for this campaign")
         return {
-            "message": f"Queued task to process embeddings for campaign {campaign_id}",
-            "task_id": task.id,
-            "force": force
+            "message": f"Resumed backfill of {campaign_id}",
+            "task_id": queued["job_id"],
+            "backfill": queued["checkpoint"],
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to queue campaign embeddings task: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to resume embedding backfill: {str(e)}")
@@ -1,8 +1,9 @@
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from backend.models.campaigns import Campaign
 from backend.models.components import MarkdownContent, Metadata
-from backend.services.neo4j import query
+from backend.services.neo4j import aquery
 from backend.services.neo4j.queries import build_create_query
 from backend.api.auth import get_current_user
 
@@ -28,10 +29,10 @@ async def add_campaign(
         campaign = Campaign(content=campaign_data, metadata=metadata)
 
         # Create campaign and link to user (create user if doesn't exist)
-        result = query(
+        result = await aquery(
             """
             MERGE (u:User {id: $user_id})
-            CREATE (c:Campaign {
+            CREATE (c:Campaign:Entity {
                 id: $campaign_id,
                 title: $title,
                 markdown: $markdown,
@@ -66,7 +67,7 @@ async def add_campaign(
                     ts=int(metadata.created_at.timestamp() * 1000)
                 )
                 
-                hook.on_sync_changes([change])
+                await run_in_threadpool(hook.on_sync_changes, [change])
             except Exception as e:
                 print(f"Warning: Failed to trigger embedding for new campaign: {e}")
                 # Don't fail the request if embedding fails
@@ -83,7 +84,7 @@ async def add_campaign(
 async def delete_campaign(campaign_id: str):
 
     try:
-        _ = query(
+        _ = await aquery(
             """
         MATCH (n:Campaign {id: $campaign_id})
         DELETE n
@@ -100,7 +101,7 @@ async def delete_campaign(campaign_id: str):
 async def get_user_campaigns(current_user: str = Depends(get_current_user)):
     """Get all campaigns owned by the current user"""
     try:
-        result = query(
+        result = await aquery(
             """
             OPTIONAL MATCH (u:User {id: $user_id})-[:OWNS]->(c:Campaign)
             RETURN c.id as id, c.title as title, c.createdAt as createdAt, c.updatedAt as updatedAt
@@ -1,10 +1,12 @@
 # backend/api/routers/embed.py
 
 from fastapi import APIRouter, HTTPException, Header
+from fastapi.concurrency import run_in_threadpool
 from typing import Annotated
-from backend.services.embeddings.service import get_embedding_service
+from backend.services.embeddings import scheduler
+from backend.services.embeddings.pipeline import embed_nodes
 from backend.services.embeddings.updates import get_embedding_update_service
-from backend.services.neo4j import query
+from backend.services.neo4j import aread_query
 from backend.models.schemas import (
     EmbeddingStatus,
     EmbeddingUpdateResult,
@@ -21,49 +23,28 @@ async def embed_node(node_id: str, uid: UserIdHeader, force: bool = False):
     """Generate and store embedding for a specific node."""
     try:
         if force:
-            # Force re-embedding regardless of content changes
-            result = query(
-                """
-                MATCH (n {id: $node_id})
-                RETURN n.title AS title, n.markdown AS markdown
-            """,
-                node_id=node_id,
-            )
-
-            if not result:
-                raise HTTPException(status_code=404, detail="Node not found")
+            # Force re-embedding of every chunk regardless of content changes
+            result = await run_in_threadpool(embed_nodes, [node_id], True)
 
-            node_data = result[0]
-            embedding_service = get_embedding_service()
-            text_to_embed = f"{node_data['title']}\n{node_data['markdown'] or ''}"
-            embedding = embedding_service.generate_embedding(text_to_embed)
-
-            # Simple update - just embedding and timestamp
-            update_service = get_embedding_update_service()
-            content_hash = update_service.get_content_hash(
-                node_data["title"], node_data["markdown"]
-            )
-
-            query(
-                """
-                MATCH (n {id: $node_id})
-                SET n.embedding = $embedding, 
-                    n.embeddedAt = timestamp(),
-                    n.contentHash = $content_hash
-            """,
-                node_id=node_id,
-                embedding=embedding,
-                content_hash=content_hash,
-            )
+            if result["errors"]:
+                if result["errors"][0].endswith("Node not found"):
+                    raise HTTPException(status_code=404, detail="Node not found")
+                return EmbeddingUpdateResult(
+                    message="Failed to update embedding",
+                    updated=False,
+                    error=result["errors"][0],
+                )
 
             return EmbeddingUpdateResult(
-                message=f"Embedding generated (forced) - {len(embedding)} dimensions",
+                message=f"Embedding generated (forced) - {result['chunks_embedded']} chunks",
                 updated=True,
             )
         else:
             # Use smart update service
             update_service = get_embedding_update_service()
-            result = update_service.update_node_embedding(node_id)
+            result = await run_in_threadpool(
+                update_service.update_node_embedding, node_id
+            )
 
             if result.get("error"):
                 return EmbeddingUpdateResult(
@@ -86,17 +67,26 @@ async def embed_node(node_id: str, uid: UserIdHeader, force: bool = False):
 
 @router.post("/campaign/{campaign_id}", response_model=BatchEmbeddingResult)
 async def embed_campaign(campaign_id: str, uid: UserIdHeader, force: bool = False):
-    """Generate embeddings for all nodes in a campaign that need updating."""
+    """
+    Queue embedding of all nodes in a campaign that need updating.
+
+    Runs on the worker as a preemptible backfill, so it never delays the
+    embedding of nodes users are editing; the counters are reported by the
+    task.
+    """
     try:
-        update_service = get_embedding_update_service()
-        result = update_service.update_campaign_embeddings(campaign_id, force=force)
+        queued = await run_in_threadpool(scheduler.submit_backfill, campaign_id, force)
 
+        if queued["deduplicated"]:
+            message = f"Embeddings for campaign {campaign_id} are already being processed"
+        else:
+            message = f"Queued embedding of campaign {campaign_id}"
         return BatchEmbeddingResult(
-            message=result["message"],
-            processed=result["processed"],
-            updated=result["updated"],
-            skipped=result["skipped"],
-            errors=result.get("errors", []),
+            message=message,
+            processed=0,  # Reported by the task
+            updated=0,
+            skipped=0,
+            task_id=queued["job_id"],
         )
 
     except Exception as e:
@@ -112,16 +102,18 @@ async def get_embedding_status(
     try:
         # Simple status query
         status_query = """
-        MATCH (n)
-        WHERE EXISTS((n)<-[:PART_OF]-(c:Campaign {id: $campaign_id}))
+        MATCH (n:Entity)
+        WHERE EXISTS { (n)-[:PART_OF]->(:Campaign {id: $campaign_id}) }
         AND n.title IS NOT NULL
+        OPTIONAL MATCH (e:Embedding)-[:EMBEDS]->(n)
+        WITH n, e
         RETURN 
             count(n) AS total_nodes,
-            count(n.embedding) AS embedded_nodes,
-            count(CASE WHEN n.updatedAt > coalesce(n.embeddedAt, datetime('1970-01-01')) THEN 1 END) AS stale_nodes
+            count(e) AS embedded_nodes,
+            count(CASE WHEN n.updatedAt > e.embeddedAt THEN 1 END) AS stale_nodes
         """
 
-        result = query(status_query, campaign_id=campaign_id)
+        result = await aread_query(status_query, campaign_id=campaign_id)
 
         if result:
             stats = result[0]
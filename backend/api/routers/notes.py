@@ -8,9 +8,12 @@ from backend.models.notes import Note
 from backend.models.components import MarkdownContent, Metadata
 from backend.services.neo4j import query
 from backend.services.neo4j.queries import build_create_query
+from backend.services.neo4j.projections import project
 
 router = APIRouter()
 
+_NOTE_PROJECTION = project("node")
+
 
 @router.get("/note", tags=["notes"])
 async def get_note(note_id: str):
@@ -18,7 +21,8 @@ async def get_note(note_id: str):
         nodes = query(
             """
           MATCH (n:Note {id: $note_id})
-          RETURN n
+          WITH n, properties(n) AS props
+          RETURN """ + _NOTE_PROJECTION + """ AS n
           """,
             id=note_id,
         )
@@ -33,7 +37,8 @@ async def get_notes(campaign_id: str):
         nodes = query(
             """
           MATCH (c:Campaign {campaign_id: $campaign_id})<-[:PART_OF]-(n:Note)
-          RETURN n
+          WITH n, properties(n) AS props
+          RETURN """ + _NOTE_PROJECTION + """ AS n
           """,
             id=campaign_id,
         )
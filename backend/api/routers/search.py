@@ -21,7 +21,7 @@ async def search_content(
     """Search for content similar to the provided text query."""
     try:
         vector_service = get_vector_search_service()
-        results = vector_service.search_nodes(
+        results = await vector_service.search_nodes(
             search_request.query_text, user_id=user_id, campaign_id=campaign_id
         )
         return results
@@ -40,7 +40,7 @@ async def get_similar_content(
     """Find content similar to a specific node."""
     try:
         vector_service = get_vector_search_service()
-        results = vector_service.find_similar_to_node(
+        results = await vector_service.find_similar_to_node(
             node_id=node_id,
             user_id=user_id,
             campaign_id=campaign_id,
@@ -63,7 +63,7 @@ async def suggest_relationships(
     """Suggest potential relationships between nodes based on content similarity."""
     try:
         vector_service = get_vector_search_service()
-        suggestions = vector_service.suggest_relationships(
+        suggestions = await vector_service.suggest_relationships(
             user_id=user_id,
             campaign_id=campaign_id if campaign_id != "global" else None,
             threshold=threshold,
@@ -1,14 +1,69 @@
 import json
+import asyncio
 from typing import Annotated
-from fastapi import APIRouter, Header, Depends, HTTPException
-from backend.models.components import Note, Change, Edge
+from fastapi import APIRouter, Header, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from backend.models.components import (
+    Note,
+    Change,
+    Edge,
+    SyncPushResult,
+    ChangeEvent,
+    ChangeFeed,
+    SyncDeletion,
+    SyncPull,
+    NoteBody,
+    SidebarNode,
+)
 from backend.models.folders import Folder, FolderWithChildren
-from backend.services.neo4j import query
+from backend.services.neo4j import aread_query, arun, async_session
+from backend.services.neo4j.projections import project
+from backend.services.neo4j.setup_relationship_ids import match_relationship_by_id
+from backend.services.sync import apply_changes
+from backend.services.sync.changelog import log_scope, read_events, read_head
+from backend.services.sync.events import apublish, get_sync_event_broker
+from backend.services.sync.statements import EDGE_TYPES
 from backend.api.auth import get_current_user
 
 router = APIRouter(prefix="/sync", tags=["sync"])
 
 
+def read_bookmarks(
+    x_sync_bookmarks: Annotated[
+        str | None,
+        Header(description="Comma-separated bookmarks from a previous push"),
+    ] = None,
+) -> list[str] | None:
+    """
+    Bookmarks a client got back from POST /sync/{cid} (SyncPushResult.bookmarks).
+    Reads carrying them wait until the serving database has applied that push,
+    so a client reads its own writes even from a follower or another worker.
+    """
+    if not x_sync_bookmarks:
+        return None
+    return [b for b in x_sync_bookmarks.split(",") if b]
+
+
+ReadBookmarks = Annotated[list[str] | None, Depends(read_bookmarks)]
+
+
+_NODE_PROJECTION = project("node")
+_EDGE_PROJECTION = project("edge")
+_FOLDER_PROJECTION = project(
+    "folder", extra={"noteIds": "noteIds", "childFolderIds": "childFolderIds"}
+)
+_NODE_EDGE_PROJECTION = project(
+    "edge",
+    extra={
+        "direction": "CASE WHEN s.id = $nid THEN 'out' ELSE 'in' END",
+        "target": "{id: m.id, title: m.title, type: m.type}",
+    },
+)
+_CHAT_PROJECTION = project("chat")
+_MESSAGE_PROJECTION = project("chatMessage", extra={"chatId": "chat.id"})
+
+
 def convert_neo4j_timestamps(obj):
     """Convert any Neo4j DateTime objects to milliseconds for all fields in the object"""
     if isinstance(obj, dict):
@@ -46,14 +101,73 @@ def process_node_result(records):
     return result
 
 
+def process_edge_result(records):
+    """Process edge records: fill in missing ids and convert timestamps"""
+    import uuid
+
+    result = []
+    for r in records:
+        edge = r["edge"]
+        if edge["id"] is None:
+            edge["id"] = f"edge-{str(uuid.uuid4())[:8]}"
+        convert_neo4j_timestamps(edge)
+        result.append(edge)
+    return result
+
+
+def process_rows(records, key):
+    """Unwrap the map returned under `key` and convert its timestamps"""
+    return [convert_neo4j_timestamps(r[key]) for r in records]
+
+
 # ───────────────────────────────────────────────────────── sidebar list ──
-@router.get("/{campaign_id}/sidebar", response_model=list[Note])
+_SIDEBAR_SLIM_QUERY = """
+    MATCH (u:User {id:$user_id})
+
+    OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id:$cid})<-[:PART_OF]-(n1)
+    OPTIONAL MATCH (u)-[:PART_OF]->(n2)
+    WHERE $cid IS NULL
+
+    WITH coalesce(n1,n2) AS n WHERE n IS NOT NULL AND NOT n:ChatSession
+    WITH collect(n) AS all
+    WITH [x IN all WHERE x:FOLDER] AS folders, [x IN all WHERE NOT x:FOLDER] AS nodes
+    UNWIND nodes AS n
+    // Membership lives in the folder's noteIds; legacy folders use CONTAINS
+    WITH n,
+         [f IN folders WHERE n.id IN coalesce(f.noteIds, []) | f.id] +
+         [(f:FOLDER)-[:CONTAINS]->(n) | f.id] AS folderIds
+    RETURN {
+      id:        n.id,
+      type:      coalesce(n.type, 'Note'),
+      title:     coalesce(n.title, n.name, 'Untitled'),
+      updatedAt: n.updatedAt,
+      folderId:  head(folderIds)
+    } AS node
+    """
+
+
+@router.get("/{campaign_id}/sidebar", response_model=list[Note] | list[SidebarNode])
 async def get_sidebar_nodes(
     campaign_id: str,
+    slim: bool = Query(
+        False, description="Only id/type/title/updatedAt/folderId, no bodies"
+    ),
     user_id: str = Depends(get_current_user),
+    bookmarks: ReadBookmarks = None,
 ):
     try:
-        records = query(
+        if slim:
+            records = await aread_query(
+                _SIDEBAR_SLIM_QUERY,
+                bookmarks_=bookmarks,
+                user_id=user_id,
+                cid=campaign_id if campaign_id != "global" else None,
+            )
+            return [
+                SidebarNode(**convert_neo4j_timestamps(r["node"])) for r in records
+            ]
+
+        records = await aread_query(
             """
             MATCH (u:User {id:$user_id})
 
@@ -63,22 +177,9 @@ async def get_sidebar_nodes(
 
             WITH coalesce(n1,n2) AS n WHERE n IS NOT NULL AND NOT n:FOLDER AND NOT n:ChatSession
             WITH n, properties(n) AS props
-            RETURN {
-              id:        props.id,
-              type:      coalesce(props.type, 'Note'),
-              title:     coalesce(props.title, props.name, 'Untitled'),
-              ownerId:   props.ownerId,      // ← ADD THIS
-              campaignId: props.campaignId,  // ← ADD THIS  
-              markdown:  props.markdown,
-              editorJson: props.editorJson,
-              updatedAt: props.updatedAt,
-              createdAt: props.createdAt,
-              attributes: props {.*, 
-                id: null, type: null, title: null, name: null, 
-                markdown: null, editorJson: null, updatedAt: null, createdAt: null
-              }
-            } AS node
+            RETURN """ + _NODE_PROJECTION + """ AS node
             """,
+            bookmarks_=bookmarks,
             user_id=user_id,
             cid=campaign_id if campaign_id != "global" else None,
         )
@@ -89,294 +190,212 @@ async def get_sidebar_nodes(
 
 
 # ───────────────────────────────────────────────────────── bulk sync ──
-@router.post("/{cid}")
+@router.post("/{cid}", response_model=SyncPushResult)
 async def push_changes(
     cid: str,
     changes: list[Change],
     user_id: str = Depends(get_current_user),
 ):
     try:
-        for ch in changes:
-            if ch.entity == "edge":
-                if ch.op == "create":
-                    # Serialize attributes if it's a dict
-                    props = {
-                        k: v
-                        for k, v in ch.payload.items()
-                        if k not in ("fromId", "toId", "relType")
-                    }
-
-                    # Handle attributes serialization
-                    if "attributes" in props and isinstance(props["attributes"], dict):
-                        props["attributes"] = (
-                            json.dumps(props["attributes"])
-                            if props["attributes"]
-                            else None
-                        )
-
-                    params = {
-                        "from_id": ch.payload["fromId"],
-                        "to_id": ch.payload["toId"],
-                        "rid": ch.entityId,
-                        "relType": ch.payload["relType"],
-                        "props": props,
-                        "ts": ch.ts,
-                    }
-                    # Use dynamic Cypher since relationship type must be literal in MERGE
-                    relType = ch.payload["relType"]
-                    cypher = f"""
-                    MATCH (a {{id:$from_id}}), (b {{id:$to_id}})
-                    MERGE (a)-[r:{relType}]->(b)
-                    SET  r += $props,
-                        r.createdAt = coalesce(r.createdAt,$ts),
-                        r.updatedAt = $ts
-                    """
-                    _ = query(cypher, **params)
-                # ---------- UPDATE ----------
-                elif ch.op == "update":
-                    props = ch.payload.copy()
-                    # Handle attributes serialization for updates too
-                    if "attributes" in props and isinstance(props["attributes"], dict):
-                        props["attributes"] = (
-                            json.dumps(props["attributes"])
-                            if props["attributes"]
-                            else None
-                        )
-
-                    _ = query(
-                        """
-                        MATCH ()-[r {id:$rid}]->()
-                        SET   r += $props,
-                            r.updatedAt = $ts
-                        """,
-                        rid=ch.entityId,
-                        props=props,
-                        ts=ch.ts,
-                    )
-                # ---------- DELETE ----------
-                else:  # delete
-                    _ = query(
-                        """
-                        MATCH ()-[r {id:$rid}]->() DELETE r
-                        """,
-                        rid=ch.entityId,
-                    )
-            elif ch.entity == "folders":
-                # ---------- CREATE/UPDATE ----------
-                if ch.op in ["create", "upsert"]:
-                    props = {**ch.payload, "updatedAt": ch.ts}
-                    print(f"DEBUG: Folder sync payload: {ch.payload}")
-                    print(f"DEBUG: Final props: {props}")
-                    
-                    _ = query(
-                        """
-                        MERGE (node:FOLDER {id:$fid})
-                        SET  node += $props,
-                             node.createdAt = coalesce(node.createdAt, $ts),
-                             node.updatedAt = $ts
-                        WITH node
-                        MATCH (u:User {id:$user_id})
-                        OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id:$cid})
-                        FOREACH (_ IN CASE WHEN c IS NULL THEN [] ELSE [1] END |
-                            MERGE (node)-[:PART_OF]->(c)
-                        )
-                        MERGE (u)-[:PART_OF]->(node)
-                        """,
-                        user_id=user_id,
-                        cid=cid,
-                        fid=ch.entityId,
-                        ts=ch.ts,
-                        props=props,
-                    )
-
-                # ---------- DELETE ----------
-                elif ch.op == "delete":
-                    _ = query(
-                        """
-                        MATCH (u:User {id:$user_id})-[:OWNS]->(c:Campaign {id:$cid})
-                            <-[:PART_OF]-(f:FOLDER {id:$fid})
-                        DETACH DELETE f
-                        """,
-                        user_id=user_id,
-                        cid=cid,
-                        fid=ch.entityId,
-                    )
-            elif ch.entity == "node":
-
-                # ---------- UPDATE ----------
-                if ch.op == "update":
-                    payload = ch.payload.copy()
-                    # Serialize editorJson if it exists and is an object
-                    if "editorJson" in payload and payload["editorJson"] is not None:
-                        if isinstance(payload["editorJson"], dict):
-                            payload["editorJson"] = json.dumps(payload["editorJson"])
-                    
-                    _ = query(
-                        """
-                        MATCH (u:User {id:$user_id})-[:OWNS]->(c:Campaign {id:$cid})
-                            <-[:PART_OF]-(n {id:$nid})
-                        SET   n += $payload,
-                            n.updatedAt = $ts
-                        """,
-                        user_id=user_id,
-                        cid=cid,
-                        nid=ch.entityId,
-                        payload=payload,
-                        ts=ch.ts,
-                    )
-
-                # ---------- CREATE ----------
-                elif ch.op == "create":
-                    label = ch.payload.get("type") or "Node"
-                    props = {**ch.payload, "updatedAt": ch.ts}
-                    attrs = props.get("attributes")
-                    if isinstance(attrs, dict):
-                        props["attributes"] = json.dumps(attrs) if attrs else None
-                    
-                    # Serialize editorJson if it exists and is an object
-                    if "editorJson" in props and props["editorJson"] is not None:
-                        if isinstance(props["editorJson"], dict):
-                            props["editorJson"] = json.dumps(props["editorJson"])
-
-                    # Use dynamic Cypher since node label must be literal in MERGE
-                    cypher = f"""
-                        MERGE (node:{label} {{id:$nid}})
-                        SET  node += $props,
-                             node.createdAt = coalesce(node.createdAt, $ts),
-                             node.updatedAt = $ts
-                        WITH node
-                        MATCH (u:User {{id:$user_id}})
-                        OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {{id:$cid}})
-                        FOREACH (_ IN CASE WHEN c IS NULL THEN [] ELSE [1] END |
-                        MERGE (node)-[:PART_OF]->(c)
-                        )
-                        MERGE (u)-[:PART_OF]->(node)
-                        """
-                    
-                    _ = query(
-                        cypher,
-                        user_id=user_id,
-                        cid=cid,
-                        nid=ch.entityId,
-                        ts=ch.ts,
-                        props=props,
-                    )
-
-                # ---------- DELETE ----------
-                elif ch.op == "delete":
-                    _ = query(
-                        """
-                        MATCH (u:User {id:$user_id})-[:OWNS]->(c:Campaign {id:$cid})
-                            <-[:PART_OF]-(n {id:$nid})
-                        DETACH DELETE n
-                        """,
-                        user_id=user_id,
-                        cid=cid,
-                        nid=ch.entityId,
-                    )
-            
-            # Handle chat sessions and messages
-            elif ch.entity == "chats":
-                if ch.op in ["create", "upsert"]:
-                    props = {**ch.payload, "updatedAt": ch.ts}
-                    _ = query(
-                        """
-                        MERGE (chat:ChatSession {id:$chat_id})
-                        SET  chat += $props,
-                             chat.createdAt = coalesce(chat.createdAt, $ts),
-                             chat.updatedAt = $ts
-                        WITH chat
-                        MATCH (u:User {id:$user_id})
-                        OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id:$cid})
-                        FOREACH (_ IN CASE WHEN c IS NULL THEN [] ELSE [1] END |
-                            MERGE (chat)-[:PART_OF]->(c)
-                        )
-                        MERGE (u)-[:PART_OF]->(chat)
-                        """,
-                        user_id=user_id,
-                        cid=cid if cid != "global" else None,
-                        chat_id=ch.entityId,
-                        ts=ch.ts,
-                        props=props,
-                    )
-                elif ch.op == "delete":
-                    _ = query(
-                        """
-                        MATCH (chat:ChatSession {id:$chat_id})
-                        DETACH DELETE chat
-                        """,
-                        chat_id=ch.entityId,
-                    )
-            
-            elif ch.entity == "chatMessages":
-                if ch.op in ["create", "upsert"]:
-                    props = {**ch.payload, "updatedAt": ch.ts}
-                    _ = query(
-                        """
-                        MERGE (msg:ChatMessage {id:$msg_id})
-                        SET  msg += $props,
-                             msg.createdAt = coalesce(msg.createdAt, $ts)
-                        WITH msg
-                        MATCH (chat:ChatSession {id:$chat_id})
-                        MERGE (chat)-[:HAS_MESSAGE]->(msg)
-                        """,
-                        msg_id=ch.entityId,
-                        chat_id=ch.payload.get("chatId"),
-                        ts=ch.ts,
-                        props=props,
-                    )
-                elif ch.op == "delete":
-                    _ = query(
-                        """
-                        MATCH (msg:ChatMessage {id:$msg_id})
-                        DETACH DELETE msg
-                        """,
-                        msg_id=ch.entityId,
-                    )
-
-            # At the end of push_changes function in sync.py:
+        result, applied = await apply_changes(cid, user_id, changes)
+
+        # Committed: wake up this campaign's open event streams on all workers
+        if result.cursor is not None:
+            await apublish(
+                log_scope(cid, user_id),
+                {
+                    "type": "changes",
+                    "cursor": result.cursor,
+                    "bookmarks": result.bookmarks,
+                },
+            )
+
         from backend.services.sync_hooks import get_sync_embedding_hook
 
-        # After processing all changes, add:
+        # Only changes that were committed need embedding checks
         hook = get_sync_embedding_hook()
-        hook.on_sync_changes(changes)
+        # The hook may enqueue to Redis or embed inline; keep it off the loop
+        await run_in_threadpool(hook.on_sync_changes, applied)
 
-        return {"status": "ok"}
+        return result
 
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+# ─────────────────────────────────────────────── change-log feed ──
+_HYDRATE_QUERIES = {
+    "node": """
+        MATCH (u:User {id:$user_id})
+        UNWIND $ids AS nid
+        OPTIONAL MATCH (u)-[:OWNS]->(:Campaign {id:$cid})<-[:PART_OF]-(n1:Entity {id:nid})
+        OPTIONAL MATCH (u)-[:PART_OF]->(n2:Entity {id:nid})
+        WITH coalesce(n1,n2) AS n WHERE n IS NOT NULL
+        WITH DISTINCT n, properties(n) AS props
+        RETURN """ + _NODE_PROJECTION + """ AS node
+        """,
+    # Typed branches so each id is an index seek, not a relationship scan
+    "edge": """
+        UNWIND $ids AS rid
+        """ + match_relationship_by_id(EDGE_TYPES, id_expr="rid", outer="rid") + """
+        WITH DISTINCT r,
+             startNode(r)  AS s,
+             endNode(r)    AS e,
+             properties(r) AS props
+        RETURN """ + _EDGE_PROJECTION + """ AS edge
+        """,
+    "folders": """
+        UNWIND $ids AS fid
+        MATCH (folder:FOLDER {id: fid})
+        WITH folder, properties(folder) AS props, [] AS noteIds, [] AS childFolderIds
+        RETURN """ + _FOLDER_PROJECTION + """ AS folder
+        """,
+    "chats": """
+        UNWIND $ids AS chat_id
+        MATCH (chat:ChatSession {id: chat_id})
+        WITH chat, properties(chat) AS props
+        RETURN """ + _CHAT_PROJECTION + """ AS chat
+        """,
+    "chatMessages": """
+        UNWIND $ids AS msg_id
+        MATCH (msg:ChatMessage {id: msg_id})
+        OPTIONAL MATCH (chat:ChatSession)-[:HAS_MESSAGE]->(msg)
+        WITH msg, chat, properties(msg) AS props
+        RETURN """ + _MESSAGE_PROJECTION + """ AS message
+        """,
+}
+
+
+_HYDRATE_KEYS = {
+    "edge": "edge",
+    "folders": "folder",
+    "chats": "chat",
+    "chatMessages": "message",
+}
+
+
+async def _hydrate(tx, entity: str, ids: list[str], cid: str, user_id: str):
+    """Fetch the current client-facing shape of each entity, keyed by id."""
+    records = await arun(
+        tx,
+        _HYDRATE_QUERIES[entity],
+        ids=ids,
+        cid=cid if cid != "global" else None,
+        user_id=user_id,
+    )
+    if entity == "node":
+        rows = process_node_result(records)
+    else:
+        rows = process_rows(records, _HYDRATE_KEYS[entity])
+    return {row["id"]: row for row in rows if row.get("id")}
+
+
+async def _check_campaign(tx, cid: str, user_id: str):
+    """Raise 404 unless the user owns the campaign (the global scope always exists)."""
+    if cid == "global":
+        return
+    rows = await arun(
+        tx,
+        """
+        MATCH (:User {id:$user_id})-[:OWNS]->(c:Campaign {id:$cid})
+        RETURN c.id AS id
+        """,
+        user_id=user_id,
+        cid=cid,
+    )
+    if not rows:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+
+
+async def _read_change_feed(tx, cid: str, user_id: str, since: int, limit: int):
+    await _check_campaign(tx, cid, user_id)
+
+    log = await read_events(tx, log_scope(cid, user_id), since, limit)
+    if log["reset"]:
+        return ChangeFeed(cursor=log["head"], hasMore=False, reset=True)
+
+    events = log["events"]
+
+    # Only the latest event per entity matters; its current state is the delta
+    latest: dict[tuple[str, str], dict] = {}
+    for ev in events:
+        latest[(ev["entity"], ev["entityId"])] = ev
+
+    ids_by_entity: dict[str, list[str]] = {}
+    for (entity, entity_id), ev in latest.items():
+        if ev["op"] != "delete" and entity in _HYDRATE_QUERIES:
+            ids_by_entity.setdefault(entity, []).append(entity_id)
+
+    data: dict[str, dict] = {}
+    for entity, ids in ids_by_entity.items():
+        for entity_id, row in (await _hydrate(tx, entity, ids, cid, user_id)).items():
+            data[f"{entity}:{entity_id}"] = row
+
+    changes = []
+    for (entity, entity_id), ev in sorted(latest.items(), key=lambda kv: kv[1]["seq"]):
+        row = data.get(f"{entity}:{entity_id}")
+        changes.append(
+            ChangeEvent(
+                seq=ev["seq"],
+                entity=entity,
+                entityId=entity_id,
+                # Deleted later in the log or no longer reachable: tombstone
+                op="upsert" if row is not None else "delete",
+                ts=ev["ts"],
+                data=row,
+            )
+        )
+
+    cursor = events[-1]["seq"] if events else min(since, log["head"])
+    return ChangeFeed(cursor=cursor, hasMore=cursor < log["head"], changes=changes)
+
+
+@router.get("/{cid}/changes", response_model=ChangeFeed)
+async def get_changes(
+    cid: str,
+    since: int = Query(0, ge=0, description="Last change-log seq the client has"),
+    limit: int = Query(500, ge=1, le=5000),
+    user_id: str = Depends(get_current_user),
+    bookmarks: ReadBookmarks = None,
+):
+    """
+    Return every change after `since` from the campaign's change log,
+    including deletions, with a cursor to pass on the next call.
+    """
+    try:
+        async with async_session("r", bookmarks) as session:
+            return await session.execute_read(
+                _read_change_feed, cid, user_id, since, limit
+            )
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
 # ───────────────────────────────────────────── incremental updates ──
+_NODES_SINCE_QUERY = """
+    MATCH (u:User {id:$user_id})
+    OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id:$cid})<-[:PART_OF]-(n1)
+    OPTIONAL MATCH (u)-[:PART_OF]->(n2)
+    WITH coalesce(n1,n2) AS n
+    WHERE n.updatedAt > $ts AND NOT n:FOLDER
+    WITH n, properties(n) AS props
+    RETURN """ + _NODE_PROJECTION + """ AS node
+    """
+
+
 @router.get("/{cid}/nodes/since/{ts}", response_model=list[Note])
 async def get_updates(
     cid: str,
     ts: int,
     user_id: str = Depends(get_current_user),
+    bookmarks: ReadBookmarks = None,
 ):
     try:
-        records = query(
-            """
-            MATCH (u:User {id:$user_id})
-            OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id:$cid})<-[:PART_OF]-(n1)
-            OPTIONAL MATCH (u)-[:PART_OF]->(n2)
-            WITH coalesce(n1,n2) AS n
-            WHERE n.updatedAt > $ts AND NOT n:FOLDER
-            WITH n, properties(n) AS props
-            RETURN {
-              id:        props.id,
-              type:      coalesce(props.type, 'Note'),
-              title:     coalesce(props.title, props.name, 'Untitled'),
-              markdown:  props.markdown,
-              editorJson: props.editorJson,
-              updatedAt: props.updatedAt,
-              createdAt: props.createdAt,
-              attributes: props {.*, 
-                id: null, type: null, title: null, name: null, 
-                markdown: null, editorJson: null, updatedAt: null, createdAt: null
-              }
-            } AS node
-            """,
+        records = await aread_query(
+            _NODES_SINCE_QUERY,
+            bookmarks_=bookmarks,
             user_id=user_id,
             cid=cid if cid != "global" else None,
             ts=ts,
@@ -386,66 +405,79 @@ async def get_updates(
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+# ───────────────────────────────────────────────── document bodies ──
+MAX_BODY_IDS = 200
+
+
+@router.get("/{cid}/nodes", response_model=list[NoteBody])
+async def get_node_bodies(
+    cid: str,
+    ids: list[str] = Query(..., description="Node ids, repeated or comma-separated"),
+    user_id: str = Depends(get_current_user),
+    bookmarks: ReadBookmarks = None,
+):
+    """
+    Return the full documents (markdown, editorJson, attributes) for the given
+    nodes, in request order. Pairs with the slim sidebar: the editor fetches a
+    body when it opens a node it only has the sidebar entry for.
+    """
+    node_ids = list(dict.fromkeys(i for raw in ids for i in raw.split(",") if i))
+    if len(node_ids) > MAX_BODY_IDS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_BODY_IDS} ids per request"
+        )
+
+    try:
+        async with async_session("r", bookmarks) as session:
+            bodies = await session.execute_read(
+                _hydrate, "node", node_ids, cid, user_id
+            )
+        return [bodies[i] for i in node_ids if i in bodies]
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
 # ────────────────────────────────────────── incremental REL updates ──
+_EDGES_SINCE_QUERY = """
+    MATCH (u:User {id:$user_id})
+
+    // campaign-scoped nodes the user owns
+    OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id:$cid})<-[:PART_OF]-(a)
+    // global nodes the user is linked to
+    OPTIONAL MATCH (u)-[:PART_OF]->(b)
+    WITH collect(a)+collect(b) AS nodes
+
+    UNWIND nodes AS n
+    MATCH (n)-[r]->(m)
+    WHERE r.updatedAt > $ts          // ← incremental filter
+    WITH DISTINCT r,                // dedup if two paths reach same rel
+         startNode(r)  AS s,
+         endNode(r)    AS e,
+         properties(r) AS props
+    RETURN """ + _EDGE_PROJECTION + """ AS edge
+    """
+
+
 @router.get("/{cid}/edges/since/{ts}", response_model=list[Edge])
 async def get_edges(
     cid: str,
     ts: int,
     user_id: str = Depends(get_current_user),
+    bookmarks: ReadBookmarks = None,
 ):
     """
     Return every relationship touching this user's nodes/campaign whose
     r.updatedAt > ts.  Works no matter what the rel-type is (:MENTIONS, etc.).
     """
     try:
-        import uuid
-        
-        records = query(
-            """
-            MATCH (u:User {id:$user_id})
-
-            // campaign-scoped nodes the user owns
-            OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id:$cid})<-[:PART_OF]-(a)
-            // global nodes the user is linked to
-            OPTIONAL MATCH (u)-[:PART_OF]->(b)
-            WITH collect(a)+collect(b) AS nodes
-
-            UNWIND nodes AS n
-            MATCH (n)-[r]->(m)
-            WHERE r.updatedAt > $ts          // ← incremental filter
-            WITH DISTINCT r,                // dedup if two paths reach same rel
-                 startNode(r)  AS s,
-                 endNode(r)    AS e,
-                 properties(r) AS props
-            RETURN {
-              id:         props.id,         // we'll handle None values in Python
-              from_id:    s.id,
-              to_id:      e.id,
-              from_title: s.title,
-              to_title:   e.title,
-              relType:    type(r),
-              updatedAt:  props.updatedAt,
-              createdAt:  props.createdAt,
-              attributes: props {.*, 
-                id: null, updatedAt: null, createdAt: null
-              }
-            } AS edge
-            """,
+        records = await aread_query(
+            _EDGES_SINCE_QUERY,
+            bookmarks_=bookmarks,
             user_id=user_id,
             cid=None if cid == "global" else cid,
             ts=ts,
         )
-        
-        # Post-process records to generate UUIDs for None IDs and convert timestamps
-        result = []
-        for r in records:
-            edge = r["edge"]
-            if edge["id"] is None:
-                edge["id"] = f"edge-{str(uuid.uuid4())[:8]}"
-            convert_neo4j_timestamps(edge)
-            result.append(edge)
-        
-        return result
+        return process_edge_result(records)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
@@ -456,34 +488,22 @@ async def get_node_edges(
     cid: str,
     nid: str,
     user_id: str = Depends(get_current_user),
+    bookmarks: ReadBookmarks = None,
 ):
     try:
-        records = query(
+        records = await aread_query(
             """
             MATCH (u:User {id:$user_id})-[:OWNS]->(c:Campaign {id:$cid})
-                <-[:PART_OF]-(n {id:$nid})
+                <-[:PART_OF]-(n:Entity {id:$nid})
             MATCH (n)-[r]-(m)
             WHERE type(r) <> 'CONTAINS'  // Exclude folder relationships
-            RETURN {
-            id:        r.id,
-            from_id:   startNode(r).id,
-            to_id:     endNode(r).id,
-            from_title:startNode(r).title,
-            to_title:  endNode(r).title,
-            direction: CASE WHEN startNode(r).id = $nid THEN 'out' ELSE 'in' END,
-            relType:   type(r),
-            createdAt: properties(r).createdAt,
-            updatedAt: r.updatedAt,
-            props:     properties(r) {.*, 
-              id: null, createdAt: null, updatedAt: null
-            },
-            target: {
-                id:    m.id,
-                title: m.title,
-                type:  m.type
-            }
-            } AS edge
+            WITH r, m,
+                 startNode(r)  AS s,
+                 endNode(r)    AS e,
+                 properties(r) AS props
+            RETURN """ + _NODE_EDGE_PROJECTION + """ AS edge
             """,
+            bookmarks_=bookmarks,
             user_id=user_id,
             cid=cid,
             nid=nid,
@@ -500,50 +520,38 @@ async def get_node_edges(
 
 
 # ───────────────────────────────────────────────── folder sync ──
+_FOLDERS_SINCE_QUERY = """
+    MATCH (u:User {id:$user_id})
+    OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id:$cid})<-[:PART_OF]-(f:FOLDER)
+    OPTIONAL MATCH (u)-[:PART_OF]->(f2:FOLDER)
+    WITH coalesce(f, f2) AS folder
+    WHERE folder IS NOT NULL AND folder.updatedAt > $ts
+    WITH folder, properties(folder) AS props
+    
+    // Note: CONTAINS relationships will be implemented later
+    // For now, return empty arrays to avoid warnings
+    WITH folder, props, [] AS noteIds, [] AS childFolderIds
+    
+    RETURN """ + _FOLDER_PROJECTION + """ AS folder
+    """
+
+
 @router.get("/{cid}/folders/since/{ts}", response_model=list[FolderWithChildren])
 async def get_folder_updates(
     cid: str,
     ts: int,
     user_id: str = Depends(get_current_user),
+    bookmarks: ReadBookmarks = None,
 ):
     try:
-        records = query(
-            """
-            MATCH (u:User {id:$user_id})
-            OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id:$cid})<-[:PART_OF]-(f:FOLDER)
-            OPTIONAL MATCH (u)-[:PART_OF]->(f2:FOLDER)
-            WITH coalesce(f, f2) AS folder
-            WHERE folder IS NOT NULL AND folder.updatedAt > $ts
-            WITH folder, properties(folder) AS props
-            
-            // Note: CONTAINS relationships will be implemented later
-            // For now, return empty arrays to avoid warnings
-            WITH folder, props, [] AS noteIds, [] AS childFolderIds
-            
-            RETURN {
-                id: props.id,
-                name: props.name,
-                parentId: props.parentId,
-                position: coalesce(props.position, 0),
-                campaignId: props.campaignId,
-                ownerId: props.ownerId,
-                createdAt: coalesce(props.createdAt, 0),
-                updatedAt: coalesce(props.updatedAt, 0),
-                noteIds: noteIds,
-                childFolderIds: childFolderIds
-            } AS folder
-            """,
+        records = await aread_query(
+            _FOLDERS_SINCE_QUERY,
+            bookmarks_=bookmarks,
             user_id=user_id,
             cid=cid if cid != "global" else None,
             ts=ts,
         )
-        # Convert timestamps in folders
-        result = []
-        for r in records:
-            folder = r["folder"]
-            convert_neo4j_timestamps(folder)
-            result.append(folder)
-        return result
+        return process_rows(records, "folder")
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
@@ -552,9 +560,10 @@ async def get_folder_updates(
 async def get_all_folders(
     cid: str,
     user_id: str = Depends(get_current_user),
+    bookmarks: ReadBookmarks = None,
 ):
     try:
-        records = query(
+        records = await aread_query(
             """
             MATCH (u:User {id:$user_id})
             OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id:$cid})<-[:PART_OF]-(f:FOLDER)
@@ -572,20 +581,10 @@ async def get_all_folders(
             OPTIONAL MATCH (folder)-[:CONTAINS]->(child:FOLDER)
             WITH folder, props, noteIds, collect(child.id) AS childFolderIds
             
-            RETURN {
-                id: props.id,
-                name: props.name,
-                parentId: props.parentId,
-                position: coalesce(props.position, 0),
-                campaignId: props.campaignId,
-                ownerId: props.ownerId,
-                createdAt: coalesce(props.createdAt, 0),
-                updatedAt: coalesce(props.updatedAt, 0),
-                noteIds: noteIds,
-                childFolderIds: childFolderIds
-            } AS folder
+            RETURN """ + _FOLDER_PROJECTION + """ AS folder
             ORDER BY folder.position
             """,
+            bookmarks_=bookmarks,
             user_id=user_id,
             cid=cid if cid != "global" else None,
         )
@@ -601,90 +600,254 @@ async def get_all_folders(
 
 
 # ──────────────────────────────────────────── chat sync endpoints ──
+_CHATS_SINCE_QUERY = """
+    MATCH (u:User {id:$user_id})
+    OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id:$cid})<-[:PART_OF]-(chat:ChatSession)
+    OPTIONAL MATCH (u)-[:PART_OF]->(chat2:ChatSession)
+    WITH coalesce(chat, chat2) AS chat
+    WHERE chat IS NOT NULL AND chat.updatedAt > $ts
+    WITH chat, properties(chat) AS props
+    RETURN """ + _CHAT_PROJECTION + """ AS chat
+    """
+
+
 @router.get("/{cid}/chats/since/{ts}")
 async def get_chat_updates(
     cid: str,
     ts: int,
     user_id: str = Depends(get_current_user),
+    bookmarks: ReadBookmarks = None,
 ):
     """Return chat sessions updated since timestamp."""
     try:
         # Cleanup is now handled by frontend on a 24-hour schedule
         # No need to run on every sync to avoid performance issues
         
-        records = query(
-            """
-            MATCH (u:User {id:$user_id})
-            OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id:$cid})<-[:PART_OF]-(chat:ChatSession)
-            OPTIONAL MATCH (u)-[:PART_OF]->(chat2:ChatSession)
-            WITH coalesce(chat, chat2) AS chat
-            WHERE chat IS NOT NULL AND chat.updatedAt > $ts
-            WITH chat, properties(chat) AS props
-            RETURN {
-                id: props.id,
-                campaignId: props.campaignId,
-                ownerId: props.ownerId,
-                title: props.title,
-                contextNodeId: props.contextNodeId,
-                createdAt: coalesce(props.createdAt, 0),
-                updatedAt: coalesce(props.updatedAt, 0),
-                messageCount: coalesce(props.messageCount, 0),
-                isCompacted: coalesce(props.isCompacted, false)
-            } AS chat
-            """,
+        records = await aread_query(
+            _CHATS_SINCE_QUERY,
+            bookmarks_=bookmarks,
             user_id=user_id,
             cid=cid if cid != "global" else None,
             ts=ts,
         )
-        # Convert timestamps in chats
-        result = []
-        for r in records:
-            chat = r["chat"]
-            convert_neo4j_timestamps(chat)
-            result.append(chat)
-        return result
+        return process_rows(records, "chat")
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+_CHAT_MESSAGES_SINCE_QUERY = """
+    MATCH (u:User {id:$user_id})
+    OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id:$cid})<-[:PART_OF]-(chat:ChatSession)-[:HAS_MESSAGE]->(msg:ChatMessage)
+    OPTIONAL MATCH (u)-[:PART_OF]->(chat2:ChatSession)-[:HAS_MESSAGE]->(msg2:ChatMessage)
+    WITH coalesce(msg, msg2) AS msg, coalesce(chat, chat2) AS chat
+    WHERE msg IS NOT NULL AND msg.createdAt > $ts
+    WITH msg, chat, properties(msg) AS props
+    RETURN """ + _MESSAGE_PROJECTION + """ AS message
+    """
+
+
 @router.get("/{cid}/chat-messages/since/{ts}")
 async def get_chat_message_updates(
     cid: str,
     ts: int,
     user_id: str = Depends(get_current_user),
+    bookmarks: ReadBookmarks = None,
 ):
     """Return chat messages updated since timestamp."""
     try:
-        records = query(
-            """
-            MATCH (u:User {id:$user_id})
-            OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id:$cid})<-[:PART_OF]-(chat:ChatSession)-[:HAS_MESSAGE]->(msg:ChatMessage)
-            OPTIONAL MATCH (u)-[:PART_OF]->(chat2:ChatSession)-[:HAS_MESSAGE]->(msg2:ChatMessage)
-            WITH coalesce(msg, msg2) AS msg, coalesce(chat, chat2) AS chat
-            WHERE msg IS NOT NULL AND msg.createdAt > $ts
-            WITH msg, chat, properties(msg) AS props
-            RETURN {
-                id: props.id,
-                chatId: chat.id,
-                campaignId: props.campaignId,
-                ownerId: props.ownerId,
-                role: props.role,
-                content: props.content,
-                createdAt: coalesce(props.createdAt, 0),
-                metadata: props.metadata,
-                isCompacted: coalesce(props.isCompacted, false)
-            } AS message
-            """,
+        records = await aread_query(
+            _CHAT_MESSAGES_SINCE_QUERY,
+            bookmarks_=bookmarks,
             user_id=user_id,
             cid=cid if cid != "global" else None,
             ts=ts,
         )
-        # Convert timestamps in messages
-        result = []
-        for r in records:
-            message = r["message"]
-            convert_neo4j_timestamps(message)
-            result.append(message)
-        return result
+        return process_rows(records, "message")
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+# ──────────────────────────────────────────────── one-round-trip pull ──
+# Change-log entity -> SyncPull field (also the client's table name)
+_PULL_FIELDS = {
+    "node": "nodes",
+    "edge": "edges",
+    "folders": "folders",
+    "chats": "chats",
+    "chatMessages": "chatMessages",
+}
+
+
+async def _read_snapshot(tx, cid: str, user_id: str) -> SyncPull:
+    """Everything the client can see, stamped with the current log head."""
+    # Read the head first: anything committed after it is re-sent by the next
+    # pull, which is harmless, whereas the reverse order could skip a change.
+    head, _ = await read_head(tx, log_scope(cid, user_id))
+
+    params = {
+        "user_id": user_id,
+        "cid": cid if cid != "global" else None,
+        "ts": -1,
+    }
+    nodes = await arun(tx, _NODES_SINCE_QUERY, **params)
+    edges = await arun(tx, _EDGES_SINCE_QUERY, **params)
+    folders = await arun(tx, _FOLDERS_SINCE_QUERY, **params)
+    chats = await arun(tx, _CHATS_SINCE_QUERY, **params)
+    messages = await arun(tx, _CHAT_MESSAGES_SINCE_QUERY, **params)
+
+    return SyncPull(
+        cursor=head,
+        hasMore=False,
+        full=True,
+        nodes=process_node_result(nodes),
+        edges=process_edge_result(edges),
+        folders=process_rows(folders, "folder"),
+        chats=process_rows(chats, "chat"),
+        chatMessages=process_rows(messages, "message"),
+    )
+
+
+async def _read_pull(tx, cid: str, user_id: str, since: int, limit: int) -> SyncPull:
+    if since == 0:
+        await _check_campaign(tx, cid, user_id)
+        return await _read_snapshot(tx, cid, user_id)
+
+    feed = await _read_change_feed(tx, cid, user_id, since, limit)
+    if feed.reset:
+        return await _read_snapshot(tx, cid, user_id)
+
+    pull = SyncPull(cursor=feed.cursor, hasMore=feed.hasMore)
+    for ch in feed.changes:
+        field = _PULL_FIELDS.get(ch.entity)
+        if field is None:
+            continue
+        if ch.data is None:
+            pull.deleted.append(SyncDeletion(entity=field, id=ch.entityId))
+        else:
+            getattr(pull, field).append(ch.data)
+    return pull
+
+
+@router.get("/{cid}/pull", response_model=SyncPull)
+async def pull_changes(
+    cid: str,
+    since: int = Query(0, ge=0, description="Cursor from the previous pull; 0 for a full sync"),
+    limit: int = Query(500, ge=1, le=5000),
+    user_id: str = Depends(get_current_user),
+    bookmarks: ReadBookmarks = None,
+):
+    """
+    Return every entity delta (nodes, edges, folders, chats, chat messages and
+    deletions) after `since` in one read transaction, with one shared cursor.
+
+    `since=0`, or a cursor older than the retained change log, returns a full
+    snapshot with `full=true`.
+    """
+    try:
+        async with async_session("r", bookmarks) as session:
+            return await session.execute_read(_read_pull, cid, user_id, since, limit)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+# ─────────────────────────────────────────────────── live event stream ──
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def _sse(event: str, data: str, id: int | None = None) -> str:
+    frame = f"event: {event}\n"
+    if id is not None:
+        frame += f"id: {id}\n"
+    return frame + f"data: {data}\n\n"
+
+
+async def _pull(
+    cid: str, user_id: str, since: int, bookmarks: list[str] | None = None
+) -> SyncPull:
+    async with async_session("r", bookmarks) as session:
+        return await session.execute_read(_read_pull, cid, user_id, since, 500)
+
+
+async def _event_stream(
+    request: Request,
+    cid: str,
+    user_id: str,
+    since: int,
+    bookmarks: list[str] | None = None,
+):
+    cursor = since
+    broker = get_sync_event_broker()
+
+    async with broker.listen(log_scope(cid, user_id)) as events:
+        # Catch up first: anything committed before we subscribed has already
+        # been published, so it would otherwise wait for the next change.
+        # A client with no cursor gets a full snapshot here.
+        pending = True
+
+        while not await request.is_disconnected():
+            if pending:
+                pending = False
+                has_more = True
+                while has_more:
+                    pull = await _pull(cid, user_id, cursor, bookmarks)
+                    has_more = pull.hasMore
+                    if pull.cursor != cursor or pull.full:
+                        cursor = pull.cursor
+                        yield _sse("delta", pull.model_dump_json(), id=cursor)
+
+            try:
+                event = await asyncio.wait_for(
+                    events.get(), timeout=SSE_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                # Comment frame keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+
+            # Drain the backlog so a burst of pushes costs one change-log read
+            batch = [event]
+            while not events.empty():
+                batch.append(events.get_nowait())
+
+            for ev in batch:
+                if ev.get("type") == "changes":
+                    pending = pending or ev.get("cursor", 0) > cursor
+                    # The push may have committed on a server this stream's
+                    # follower has not caught up with yet
+                    bookmarks = ev.get("bookmarks") or bookmarks
+                elif ev.get("type") == "resync":
+                    pending = True
+                else:
+                    yield _sse(ev.get("type", "message"), json.dumps(ev))
+
+
+@router.get("/{cid}/events")
+async def stream_sync_events(
+    cid: str,
+    request: Request,
+    since: int = Query(0, ge=0, description="Cursor from the last pull"),
+    user_id: str = Depends(get_current_user),
+    bookmarks: ReadBookmarks = None,
+):
+    """
+    Server-Sent Events stream of sync deltas for a campaign.
+
+    Each `delta` event carries a SyncPull body (same shape as /pull) and its
+    cursor as the event id. Non-data notifications, such as `embedded` from
+    the embedding worker, are forwarded as their own event types.
+    """
+    try:
+        async with async_session("r", bookmarks) as session:
+            await session.execute_read(_check_campaign, cid, user_id)
+    except HTTPException:
+        raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
+
+    return StreamingResponse(
+        _event_stream(request, cid, user_id, since, bookmarks),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -26,6 +26,8 @@ class MarkdownNodeBase(BaseModel):
             "updatedAt": self.metadata.updated_at.isoformat(),
             "title": self.content.title,
             "markdown": self.content.markdown,
+            # New content is found by the embedding backfill's index lookup
+            "needsEmbedding": True,
         }
 
         # Only include embedding if it exists
@@ -49,6 +51,44 @@ class MarkdownNodeBase(BaseModel):
         return self.__class__.__name__
 
 
+# Node types a client may create. Mirrors NOTE_TYPES in the app; "Node" is
+# the label given to a pushed node without a type.
+NodeType = Literal[
+    "Campaign",
+    "Character",
+    "Event",
+    "Item",
+    "Location",
+    "Lore",
+    "NPC",
+    "Node",
+    "Note",
+    "Quest",
+    "Rule",
+    "Session",
+]
+
+# Relationship types a client may create. Mirrors RelationshipType in
+# apps/app/src/types/node.ts.
+ClientRelationshipType = Literal[
+    "DEPICTS",
+    "FOLLOWS",
+    "FROM",
+    "INVOLVES",
+    "KNOWS",
+    "LIVES_IN",
+    "MENTIONS",
+    "OCCURS_IN",
+    "PART_OF",
+    "WITHIN",
+]
+
+# Relationship types only the server writes
+ServerRelationshipType = Literal[
+    "OWNS", "CONTAINS", "HAS_MESSAGE", "EMBEDS", "CHUNK_OF"
+]
+
+
 class Change(BaseModel):
     op: str  # create | update | delete | upsert
     entity: Literal["node", "edge", "folders", "chats", "chatMessages"]
@@ -57,6 +97,40 @@ class Change(BaseModel):
     ts: int  # epoch ms
 
 
+class ChangeFailure(BaseModel):
+    index: int  # position of the change in the pushed list
+    entity: str
+    entityId: str
+    op: str
+    error: str
+
+
+class SyncPushResult(BaseModel):
+    status: str  # ok | partial
+    applied: int
+    skipped: int = 0  # older than the stored entity (last writer wins)
+    coalesced: int = 0  # folded into another change for the same entity
+    cursor: int | None = None  # change-log seq after this push
+    failed: list[ChangeFailure] = []
+    bookmarks: list[str] = []  # send back as X-Sync-Bookmarks to read this push
+
+
+class ChangeEvent(BaseModel):
+    seq: int
+    entity: str
+    entityId: str
+    op: str  # upsert | delete
+    ts: int
+    data: dict[str, Any] | None = None  # current state, None for tombstones
+
+
+class ChangeFeed(BaseModel):
+    cursor: int  # pass back as `since` on the next request
+    hasMore: bool
+    reset: bool = False  # cursor predates retained history; resync fully
+    changes: list[ChangeEvent] = []
+
+
 class Note(BaseModel):
     id: str
     type: str
@@ -65,7 +139,18 @@ class Note(BaseModel):
     attributes: dict[str, Any] = {}
     updatedAt: int
     createdAt: int
-    embedded_at: datetime | None = None
+
+
+class NoteBody(Note):
+    editorJson: dict[str, Any] | None = None
+
+
+class SidebarNode(BaseModel):
+    id: str
+    type: str
+    title: str
+    updatedAt: int
+    folderId: str | None = None
 
 
 class Target(BaseModel):
@@ -84,3 +169,20 @@ class Edge(BaseModel):
     updatedAt: int
     createdAt: int | None  # present in some rows, None in others
     attributes: dict[str, Any] = {}  # what you return as "attributes"
+
+
+class SyncDeletion(BaseModel):
+    entity: str  # nodes | edges | folders | chats | chatMessages
+    id: str
+
+
+class SyncPull(BaseModel):
+    cursor: int  # change-log seq; pass back as `since` on the next request
+    hasMore: bool
+    full: bool = False  # snapshot rather than a delta (first sync or expired cursor)
+    nodes: list[Note] = []
+    edges: list[Edge] = []
+    folders: list[dict[str, Any]] = []
+    chats: list[dict[str, Any]] = []
+    chatMessages: list[dict[str, Any]] = []
+    deleted: list[SyncDeletion] = []
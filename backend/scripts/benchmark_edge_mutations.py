@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for edge updates and deletes through POST /sync/{cid}.
+
+Grows the total number of relationships in the database step by step and, at
+each step, times a push of edge updates followed by a push of edge deletes.
+With the per-type id indexes the per-edge latency should stay flat as the
+edge count grows; with an untyped id match it grows linearly. Runs against
+the database configured in NEO4J_URI and removes everything it creates.
+
+Usage:
+    python -m backend.scripts.benchmark_edge_mutations [--totals 1000,10000,50000]
+        [--batch 100]
+"""
+
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+# Add the project root to the path so we can import backend modules
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.insert(0, project_root)
+
+from backend.models.components import Change
+from backend.services.neo4j import aclose, query, verify
+from backend.services.neo4j.setup_relationship_ids import (
+    create_relationship_id_indexes,
+)
+from backend.services.sync import apply_changes
+
+FILLER_BATCH = 5000
+
+
+def setup_campaign() -> tuple[str, str]:
+    """Create a throwaway user and campaign with two notes to link."""
+    run_id = uuid.uuid4().hex[:8]
+    user_id = f"bench-user-{run_id}"
+    campaign_id = f"bench-camp-{run_id}"
+    query(
+        """
+        MERGE (u:User {id: $user_id})
+        CREATE (c:Campaign:Entity {id: $campaign_id, title: 'Edge benchmark'})
+        CREATE (u)-[:OWNS]->(c)
+        CREATE (:Note:Entity {id: $campaign_id + '-a', title: 'A'})-[:PART_OF]->(c)
+        CREATE (:Note:Entity {id: $campaign_id + '-b', title: 'B'})-[:PART_OF]->(c)
+        """,
+        user_id=user_id,
+        campaign_id=campaign_id,
+    )
+    return user_id, campaign_id
+
+
+def add_filler_edges(campaign_id: str, count: int) -> None:
+    """Add `count` MENTIONS edges between the campaign's two notes."""
+    for start in range(0, count, FILLER_BATCH):
+        query(
+            """
+            MATCH (a:Entity {id: $campaign_id + '-a'}), (b:Entity {id: $campaign_id + '-b'})
+            UNWIND range($start, $end - 1) AS i
+            CREATE (a)-[:MENTIONS {id: $campaign_id + '-filler-' + toString(i)}]->(b)
+            """,
+            campaign_id=campaign_id,
+            start=start,
+            end=min(start + FILLER_BATCH, count),
+        )
+
+
+def cleanup_campaign(user_id: str, campaign_id: str) -> None:
+    query(
+        """
+        MATCH (c:Campaign {id: $campaign_id})
+        OPTIONAL MATCH (c)<-[:PART_OF]-(n)
+        DETACH DELETE n, c
+        """,
+        campaign_id=campaign_id,
+    )
+    query("MATCH (u:User {id: $user_id}) DETACH DELETE u", user_id=user_id)
+
+
+def edge_changes(campaign_id: str, prefix: str, op: str, size: int) -> list[Change]:
+    now = int(time.time() * 1000)
+    changes = []
+    for i in range(size):
+        edge_id = f"{prefix}-{i}"
+        payload = {}
+        if op == "create":
+            payload = {
+                "id": edge_id,
+                "fromId": f"{campaign_id}-a",
+                "toId": f"{campaign_id}-b",
+                "relType": "KNOWS",
+            }
+        elif op == "update":
+            payload = {"attributes": {"weight": i}}
+        changes.append(
+            Change(op=op, entity="edge", entityId=edge_id, payload=payload, ts=now)
+        )
+    return changes
+
+
+async def timed_push(user_id: str, campaign_id: str, changes: list[Change]) -> float:
+    start = time.perf_counter()
+    result, _ = await apply_changes(campaign_id, user_id, changes)
+    elapsed = time.perf_counter() - start
+    if result.failed:
+        print(f"   ⚠️  {len(result.failed)} changes failed: {result.failed[0].error}")
+    return elapsed
+
+
+async def run(totals: list[int], batch: int) -> None:
+    user_id, campaign_id = setup_campaign()
+    print(f"{'edges':>8} {'update/edge':>12} {'delete/edge':>12}")
+    try:
+        current = 0
+        for total in sorted(totals):
+            add_filler_edges(campaign_id, total - current)
+            current = total
+
+            prefix = f"{campaign_id}-bench-{total}"
+            await timed_push(
+                user_id, campaign_id, edge_changes(campaign_id, prefix, "create", batch)
+            )
+            update = await timed_push(
+                user_id, campaign_id, edge_changes(campaign_id, prefix, "update", batch)
+            )
+            delete = await timed_push(
+                user_id, campaign_id, edge_changes(campaign_id, prefix, "delete", batch)
+            )
+            print(
+                f"{total:>8} {update / batch * 1000:>9.2f} ms {delete / batch * 1000:>9.2f} ms"
+            )
+    finally:
+        cleanup_campaign(user_id, campaign_id)
+        await aclose()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark edge update/delete latency")
+    parser.add_argument(
+        "--totals",
+        default="1000,10000,50000",
+        help="Comma-separated relationship counts to measure at",
+    )
+    parser.add_argument(
+        "--batch", type=int, default=100, help="Edges per update/delete push"
+    )
+    args = parser.parse_args()
+
+    print("🔗 Verifying Neo4j connection...")
+    verify()
+    print("✅ Neo4j connection verified\n")
+    create_relationship_id_indexes(["MENTIONS", "KNOWS"])
+    print()
+    asyncio.run(run([int(t) for t in args.totals.split(",")], args.batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for POST /sync/{cid}.
+
+Compares the batched apply engine (one transaction, one UNWIND statement per
+entity/op/label group) against applying the same changes one at a time, which
+is what the push endpoint used to do. Runs against the database configured in
+NEO4J_URI and removes everything it creates.
+
+Usage: python -m backend.scripts.benchmark_sync_push [--sizes 50,200,500]
+"""
+
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+# Add the project root to the path so we can import backend modules
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.insert(0, project_root)
+
+from backend.models.components import Change
+from backend.services.neo4j import aclose, query, verify
+from backend.services.sync import apply_changes
+
+NODE_TYPES = ["Note", "NPC", "Location", "Session"]
+
+
+def setup_campaign() -> tuple[str, str]:
+    """Create a throwaway user and campaign."""
+    run_id = uuid.uuid4().hex[:8]
+    user_id = f"bench-user-{run_id}"
+    campaign_id = f"bench-camp-{run_id}"
+    query(
+        """
+        MERGE (u:User {id: $user_id})
+        CREATE (c:Campaign:Entity {id: $campaign_id, title: 'Sync benchmark'})
+        CREATE (u)-[:OWNS]->(c)
+        """,
+        user_id=user_id,
+        campaign_id=campaign_id,
+    )
+    return user_id, campaign_id
+
+
+def cleanup_campaign(user_id: str, campaign_id: str) -> None:
+    query(
+        """
+        MATCH (c:Campaign {id: $campaign_id})
+        OPTIONAL MATCH (c)<-[:PART_OF]-(n)
+        DETACH DELETE n, c
+        """,
+        campaign_id=campaign_id,
+    )
+    query("MATCH (u:User {id: $user_id}) DETACH DELETE u", user_id=user_id)
+
+
+def make_changes(size: int, prefix: str) -> list[Change]:
+    """A mixed push: half node creates, a quarter updates, a quarter edges."""
+    now = int(time.time() * 1000)
+    creates = size // 2
+    node_ids = [f"{prefix}-node-{i}" for i in range(creates)]
+    changes = [
+        Change(
+            op="create",
+            entity="node",
+            entityId=node_id,
+            payload={
+                "id": node_id,
+                "type": NODE_TYPES[i % len(NODE_TYPES)],
+                "title": f"Benchmark node {i}",
+                "markdown": "Lorem ipsum " * 20,
+            },
+            ts=now,
+        )
+        for i, node_id in enumerate(node_ids)
+    ]
+    for i in range(size // 4):
+        changes.append(
+            Change(
+                op="update",
+                entity="node",
+                entityId=node_ids[i % creates],
+                payload={"markdown": f"Edited {i} " * 20},
+                ts=now + 1,
+            )
+        )
+    while len(changes) < size:
+        i = len(changes)
+        edge_id = f"{prefix}-edge-{i}"
+        changes.append(
+            Change(
+                op="create",
+                entity="edge",
+                entityId=edge_id,
+                payload={
+                    "id": edge_id,
+                    "fromId": node_ids[i % creates],
+                    "toId": node_ids[(i + 1) % creates],
+                    "relType": "MENTIONS",
+                },
+                ts=now + 2,
+            )
+        )
+    return changes
+
+
+async def bench_sequential(user_id: str, campaign_id: str, changes: list[Change]) -> float:
+    start = time.perf_counter()
+    for ch in changes:
+        await apply_changes(campaign_id, user_id, [ch])
+    return time.perf_counter() - start
+
+
+async def bench_batched(user_id: str, campaign_id: str, changes: list[Change]) -> float:
+    start = time.perf_counter()
+    result, _ = await apply_changes(campaign_id, user_id, changes)
+    elapsed = time.perf_counter() - start
+    if result.failed:
+        print(f"   ⚠️  {len(result.failed)} changes failed: {result.failed[0].error}")
+    return elapsed
+
+
+async def run(sizes: list[int]) -> None:
+    print(f"{'changes':>8} {'sequential':>12} {'batched':>12} {'speedup':>8}")
+    for size in sizes:
+        user_id, campaign_id = setup_campaign()
+        try:
+            seq = await bench_sequential(
+                user_id, campaign_id, make_changes(size, f"seq{size}")
+            )
+            batch = await bench_batched(
+                user_id, campaign_id, make_changes(size, f"bat{size}")
+            )
+        finally:
+            cleanup_campaign(user_id, campaign_id)
+
+        print(
+            f"{size:>8} {size / seq:>9.0f}/s {size / batch:>9.0f}/s {seq / batch:>7.1f}x"
+        )
+    await aclose()
+
+
+def main():
+    sizes = [50, 200, 500]
+    if "--sizes" in sys.argv:
+        sizes = [int(s) for s in sys.argv[sys.argv.index("--sizes") + 1].split(",")]
+
+    print("🔗 Verifying Neo4j connection...")
+    verify()
+    print("✅ Neo4j connection verified\n")
+    asyncio.run(run(sizes))
+
+
+if __name__ == "__main__":
+    main()
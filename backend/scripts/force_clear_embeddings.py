@@ -16,6 +16,19 @@ project_root = os.path.dirname(
 sys.path.insert(0, project_root)
 
 from backend.services.neo4j import query, verify
+from backend.services.neo4j.setup_embeddings import clear_all_embeddings
+
+
+def count_embeddings() -> int:
+    """Count embedding and chunk nodes plus legacy vectors on content nodes."""
+    result = query(
+        """
+        CALL { MATCH (e) WHERE e:Embedding OR e:Chunk RETURN count(e) AS embeddings }
+        CALL { MATCH (n) WHERE n.embedding IS NOT NULL RETURN count(n) AS legacy }
+        RETURN embeddings + legacy AS total
+        """
+    )
+    return result[0]["total"] if result else 0
 
 
 def force_clear_all_embeddings():
@@ -23,44 +36,21 @@ def force_clear_all_embeddings():
     try:
         print("🔄 Force clearing ALL embeddings...")
         
-        # First, get a count of nodes with embeddings
-        count_query = """
-        MATCH (n)
-        WHERE n.embedding IS NOT NULL
-        RETURN count(n) as total
-        """
-        
-        result = query(count_query)
-        total_before = result[0]["total"] if result else 0
-        print(f"Found {total_before} nodes with embeddings")
+        total_before = count_embeddings()
+        print(f"Found {total_before} embeddings")
         
         if total_before == 0:
             print("✅ No embeddings found - database is already clean")
             return
         
-        # Clear ALL embedding-related properties
-        clear_query = """
-        MATCH (n)
-        WHERE n.embedding IS NOT NULL
-        REMOVE n.embedding, n.contentHash, n.embeddedAt
-        RETURN count(n) as cleared
-        """
-        
-        result = query(clear_query)
-        cleared = result[0]["cleared"] if result else 0
+        # Delete :Embedding and :Chunk nodes in batches and strip legacy properties
+        clear_all_embeddings()
         
         # Verify all embeddings are gone
-        verify_query = """
-        MATCH (n)
-        WHERE n.embedding IS NOT NULL
-        RETURN count(n) as remaining
-        """
-        
-        result = query(verify_query)
-        remaining = result[0]["remaining"] if result else 0
+        remaining = count_embeddings()
         
-        print(f"✅ Cleared embeddings from {cleared} nodes")
-        print(f"✅ {remaining} nodes still have embeddings (should be 0)")
+        print(f"✅ Cleared {total_before - remaining} embeddings")
+        print(f"✅ {remaining} embeddings still remain (should be 0)")
         
         if remaining > 0:
             print("⚠️ Warning: Some embeddings still remain. Manual cleanup may be needed.")
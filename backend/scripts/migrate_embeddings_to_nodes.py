@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Move embedding vectors off content nodes onto (:Embedding)-[:EMBEDS]-> nodes.
+
+Older databases store `embedding`, `contentHash` and `embeddedAt` directly on
+Note/NPC/Location nodes. This copies each vector to an :Embedding node keyed
+by (nodeId, model), links it with [:EMBEDS], and strips the legacy properties,
+one batch per transaction. It is safe to re-run: migrated nodes no longer
+carry `embedding` and the MERGE is idempotent.
+
+Usage:
+    python -m backend.scripts.migrate_embeddings_to_nodes [--batch-size N]
+        [--model NAME] [--dry-run] [--drop-legacy-indexes]
+"""
+
+import os
+import sys
+import time
+from itertools import batched
+
+# Add the parent directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+project_root = os.path.dirname(backend_dir)
+sys.path.insert(0, project_root)
+
+from backend.services.neo4j import query, stream_query, verify
+from backend.services.neo4j.setup_embeddings import (
+    create_vector_index,
+    drop_legacy_vector_indexes,
+)
+
+# elementId lookups are index-free seeks, so each batch touches only its rows
+MIGRATE_BATCH_QUERY = """
+UNWIND $element_ids AS eid
+MATCH (n) WHERE elementId(n) = eid AND n.embedding IS NOT NULL
+MERGE (e:Embedding {nodeId: n.id, model: $model})
+SET e.vector = n.embedding,
+    e.dims = size(n.embedding),
+    e.contentHash = n.contentHash,
+    e.embeddedAt = coalesce(n.embeddedAt, timestamp())
+MERGE (e)-[:EMBEDS]->(n)
+REMOVE n.embedding, n.contentHash, n.embeddedAt
+RETURN count(n) AS migrated
+"""
+
+
+LEGACY_PREDICATE = "n.embedding IS NOT NULL AND n.id IS NOT NULL"
+
+
+def count_legacy_nodes() -> int:
+    """How many content nodes still carry a vector."""
+    result = query(f"MATCH (n) WHERE {LEGACY_PREDICATE} RETURN count(n) AS legacy")
+    return result[0]["legacy"] if result else 0
+
+
+def migrate(batch_size: int, model: str, dry_run: bool = False) -> int:
+    total = count_legacy_nodes()
+    print(f"📝 Found {total} nodes with legacy embedding properties")
+    if dry_run or not total:
+        return 0
+
+    # Streamed so only one batch of element ids is in memory at a time
+    element_ids = (
+        r["eid"]
+        for r in stream_query(
+            f"MATCH (n) WHERE {LEGACY_PREDICATE} RETURN elementId(n) AS eid",
+            fetch_size_=batch_size,
+        )
+    )
+    migrated = 0
+    started = time.time()
+    for batch in batched(element_ids, batch_size):
+        result = query(MIGRATE_BATCH_QUERY, element_ids=list(batch), model=model)
+        migrated += result[0]["migrated"] if result else 0
+        rate = migrated / max(time.time() - started, 1e-6)
+        print(f"   Migrated {migrated}/{total} nodes ({rate:.0f}/s)")
+
+    return migrated
+
+
+def main():
+    """Main migration function."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Move embedding vectors onto :Embedding nodes"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=500,
+        help="Nodes migrated per transaction (default: 500)",
+    )
+    parser.add_argument(
+        "--model",
+        default=os.getenv("EMBEDDING_MODEL", "text-embedding-3-small"),
+        help="Model name recorded on migrated embeddings",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only count the nodes that would be migrated",
+    )
+    parser.add_argument(
+        "--drop-legacy-indexes",
+        action="store_true",
+        help="Drop the per-label vector indexes once migration completes",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        print("Verifying Neo4j connection...")
+        verify()
+        print("✅ Neo4j connection successful")
+
+        if not args.dry_run:
+            create_vector_index()
+
+        migrated = migrate(args.batch_size, args.model, dry_run=args.dry_run)
+        if not args.dry_run:
+            print(f"✅ Migrated {migrated} embeddings to :Embedding nodes")
+
+        remaining = count_legacy_nodes()
+        if remaining:
+            print(f"⚠️  {remaining} nodes still carry legacy embeddings")
+        elif args.drop_legacy_indexes and not args.dry_run:
+            drop_legacy_vector_indexes()
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Script to set up (and prune) the sync change log in Neo4j.
+
+Creates the constraint and indexes used by cursor-based incremental sync.
+Run this once before deploying the /sync/{cid}/changes endpoint, and with
+--prune on a schedule to enforce the retention window.
+
+Usage:
+    python -m backend.scripts.setup_change_log [--check] [--prune DAYS]
+"""
+
+import sys
+import os
+
+# Add the parent directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+project_root = os.path.dirname(backend_dir)
+sys.path.insert(0, project_root)
+
+from backend.services.neo4j import verify
+from backend.services.neo4j.setup_change_log import (
+    create_change_log_schema,
+    check_change_log_schema,
+    prune_change_log,
+)
+
+
+def main():
+    """Main setup function."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Set up the sync change log")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Check existing schema instead of setting up",
+    )
+    parser.add_argument(
+        "--prune",
+        type=int,
+        metavar="DAYS",
+        help="Delete change events older than DAYS days",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        print("Verifying Neo4j connection...")
+        verify()
+        print("✅ Neo4j connection successful")
+
+        if args.check:
+            check_change_log_schema()
+        elif args.prune is not None:
+            prune_change_log(retention_days=args.prune)
+        else:
+            create_change_log_schema()
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
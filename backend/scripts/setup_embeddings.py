@@ -15,13 +15,15 @@ project_root = os.path.dirname(
 )
 sys.path.insert(0, project_root)
 
-from backend.services.neo4j import query, verify
+from backend.services.neo4j import verify
 from backend.services.neo4j.setup_embeddings import (
+    backfill_needs_embedding,
     create_vector_index,
     check_vector_index,
     migrate_to_new_dimensions,
 )
-from backend.services.embeddings.service import get_embedding_service
+from backend.services.embeddings.pipeline import embed_nodes
+from backend.services.embeddings.store import find_needing_embedding
 
 
 async def setup_vector_index():
@@ -31,6 +33,9 @@ async def setup_vector_index():
         create_vector_index()
         print("✅ Vector index created successfully")
 
+        # Flag content written before the staleness index existed
+        backfill_needs_embedding()
+
         # Check index status
         print("\n📊 Index status:")
         check_vector_index()
@@ -47,67 +52,22 @@ async def generate_initial_embeddings():
     print("\n🤖 Generating embeddings for all nodes...")
 
     try:
-        # Get all nodes that don't have embeddings yet
-        nodes_query = """
-        MATCH (n)
-        WHERE n.title IS NOT NULL 
-        AND n.embedding IS NULL
-        AND (n:Campaign OR n:Session OR n:NPC OR n:Character OR n:Location OR n:Note)
-        RETURN n.id AS id, n.title AS title, n.markdown AS markdown, labels(n)[0] AS type
-        ORDER BY n.createdAt DESC
-        """
-
-        nodes = query(nodes_query)
-
-        if not nodes:
+        # Nodes flagged as missing or stale embeddings, from the index
+        node_ids = find_needing_embedding()
+
+        if not node_ids:
             print("✅ No nodes need embeddings")
             return True
 
-        print(f"📝 Found {len(nodes)} nodes to embed...")
-
-        embedding_service = get_embedding_service()
-        success_count = 0
-        error_count = 0
-
-        for i, node in enumerate(nodes):
-            try:
-                # Generate embedding
-                text_to_embed = f"{node['title']}\n{node['markdown'] or ''}"
-                embedding = embedding_service.generate_embedding(text_to_embed)
-
-                # Generate content hash
-                import hashlib
-
-                content_hash = hashlib.md5(text_to_embed.encode()).hexdigest()
-
-                # Store embedding
-                import time
-                timestamp = int(time.time() * 1000)
-                
-                update_query = """
-                MATCH (n {id: $node_id})
-                SET n.embedding = $embedding, 
-                    n.embeddedAt = $timestamp,
-                    n.contentHash = $content_hash
-                """
-                query(
-                    update_query,
-                    node_id=node["id"],
-                    embedding=embedding,
-                    content_hash=content_hash,
-                    timestamp=timestamp,
-                )
-
-                success_count += 1
-
-                # Progress indicator
-                if (i + 1) % 10 == 0:
-                    print(f"   Processed {i + 1}/{len(nodes)} nodes...")
-
-            except Exception as e:
-                print(f"❌ Error embedding node {node['id']} ({node['title']}): {e}")
-                error_count += 1
-                continue
+        print(f"📝 Found {len(node_ids)} nodes to embed...")
+
+        # The pipeline embeds concurrently through the async client and
+        # reports texts the provider rejected instead of storing zero vectors
+        results = await asyncio.to_thread(embed_nodes, node_ids)
+        for error in results["errors"]:
+            print(f"❌ Error embedding node {error}")
+        success_count = results["updated"]
+        error_count = len(results["errors"])
 
         print(f"\n✅ Embedding complete!")
         print(f"   ✅ Success: {success_count}")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Script to bootstrap the shared :Entity label and its id constraint.
+
+Creates the `entity_id` uniqueness constraint and labels every existing
+content node with :Entity in batches. Run this before deploying code that
+looks nodes up by `(n:Entity {id})`. Safe to re-run.
+
+Usage:
+    python -m backend.scripts.setup_entities [--check] [--dry-run] [--batch-size N]
+"""
+
+import sys
+import os
+
+# Add the parent directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+project_root = os.path.dirname(backend_dir)
+sys.path.insert(0, project_root)
+
+from backend.services.neo4j import verify
+from backend.services.neo4j.setup_entities import (
+    backfill_entity_label,
+    bootstrap_entity_schema,
+    check_entity_schema,
+)
+
+
+def main():
+    """Main setup function."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bootstrap the :Entity label")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Check existing schema instead of setting up",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only count the nodes that would be labelled",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Nodes labelled per transaction (default: 1000)",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        print("Verifying Neo4j connection...")
+        verify()
+        print("✅ Neo4j connection successful")
+
+        if args.check:
+            check_entity_schema()
+        elif args.dry_run:
+            backfill_entity_label(dry_run=True)
+        else:
+            bootstrap_entity_schema(batch_size=args.batch_size)
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Script to create an `id` index for every relationship type in Neo4j.
+
+Edge updates, deletes and change-feed reads look relationships up by id. Run
+this once on existing databases; the sync push indexes new types itself.
+Safe to re-run.
+
+Usage:
+    python -m backend.scripts.setup_relationship_ids [--check]
+"""
+
+import sys
+import os
+
+# Add the parent directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+project_root = os.path.dirname(backend_dir)
+sys.path.insert(0, project_root)
+
+from backend.services.neo4j import verify
+from backend.services.neo4j.setup_relationship_ids import (
+    create_relationship_id_indexes,
+    check_relationship_id_indexes,
+)
+
+
+def main():
+    """Main setup function."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Create relationship id indexes"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Check existing indexes instead of setting up",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        print("Verifying Neo4j connection...")
+        verify()
+        print("✅ Neo4j connection successful")
+
+        if args.check:
+            check_relationship_id_indexes()
+        else:
+            create_relationship_id_indexes()
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -86,7 +86,7 @@ class EmbeddingSystemTester:
                 self.test_node_ids.append(node_id)
                 
                 query("""
-                    CREATE (n:Note {
+                    CREATE (n:Note:Entity {
                         id: $node_id,
                         title: $title,
                         type: 'Note',
@@ -189,7 +189,7 @@ class EmbeddingSystemTester:
         try:
             # First clear embeddings from test nodes
             for node_id in self.test_node_ids:
-                query("MATCH (n {id: $node_id}) REMOVE n.embedding, n.embeddedAt", 
+                query("MATCH (e)-[:EMBEDS|CHUNK_OF]->(n:Entity {id: $node_id}) DETACH DELETE e", 
                       node_id=node_id)
             
             # Test finding missing embeddings
@@ -233,14 +233,14 @@ class EmbeddingSystemTester:
             ]
             
             # Test sync hook processing
-            initial_count = len(hook.nodes_to_check)
+            initial_count = hook.stats().get("pending_nodes", 0)
             hook.on_sync_changes(mock_changes)
-            final_count = len(hook.nodes_to_check)
+            final_count = hook.stats().get("pending_nodes", 0)
             
             success = final_count > initial_count
             
             return self.assert_test(success, "Sync hook functionality", 
-                                  f"Nodes to check didn't increase: {initial_count} -> {final_count}")
+                                  f"Pending nodes didn't increase: {initial_count} -> {final_count}")
             
         except Exception as e:
             return self.assert_test(False, "Sync hook functionality", str(e))
@@ -274,7 +274,7 @@ class EmbeddingSystemTester:
         try:
             # Test environment variables are readable
             background_enabled = os.getenv("EMBEDDING_BACKGROUND_ENABLED", "true")
-            sync_threshold = os.getenv("SYNC_EMBEDDING_THRESHOLD", "5")
+            quiet_seconds = os.getenv("EMBEDDING_QUIET_SECONDS", "10")
             embedding_model = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
             
             # Create hook to test config loading
@@ -282,8 +282,7 @@ class EmbeddingSystemTester:
             
             config_loaded = (
                 hasattr(hook, 'use_background_queue') and
-                hasattr(hook, 'sync_count_threshold') and
-                hook.sync_count_threshold > 0
+                hook.dirty.quiet_seconds > 0
             )
             
             return self.assert_test(config_loaded, "Environment configuration", 
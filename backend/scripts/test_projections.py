@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Regression check: no embedding vector or internal property leaves the server.
+
+Static checks render every registered projection and scan the read/search
+routers for ad-hoc `{.*}` projections. Live checks seed a campaign whose node
+and edge carry a full-size embedding plus contentHash/embeddedAt, call every
+sync read endpoint through the app, and scan the JSON for leaks.
+
+Usage:
+    python -m backend.scripts.test_projections [--static]
+"""
+
+import os
+import re
+import sys
+import time
+import uuid
+from datetime import datetime
+
+# Add the project root to the path so we can import backend modules
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.insert(0, project_root)
+
+from backend.services.neo4j.projections import (
+    INTERNAL_PROPERTIES,
+    PROJECTIONS,
+    find_leaks,
+    project,
+)
+
+backend_dir = os.path.join(project_root, "backend")
+
+# Modules whose queries feed client responses
+CLIENT_QUERY_MODULES = [
+    "api/routers/sync.py",
+    "api/routers/notes.py",
+    "api/routers/search.py",
+    "services/embeddings/vector_search.py",
+]
+
+results = {"passed": 0, "failed": 0}
+
+
+def log(message: str, level: str = "INFO"):
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] {level}: {message}")
+
+
+def check(condition: bool, name: str, detail: str = ""):
+    if condition:
+        results["passed"] += 1
+        log(f"✅ {name}", "PASS")
+    else:
+        results["failed"] += 1
+        log(f"❌ {name}: {detail}", "FAIL")
+
+
+def test_static():
+    for entity in PROJECTIONS:
+        cypher = project(entity)
+        named = [p for p in INTERNAL_PROPERTIES if re.search(rf"\.{p}\b", cypher)]
+        check(
+            not named and ".*" not in cypher,
+            f"projection '{entity}' is a whitelist",
+            f"exposes {named or '.*'}",
+        )
+
+    # A sample vector must be caught
+    check(
+        find_leaks({"a": [{"v": [0.1] * 1536}]}) == ["$.a[0].v"],
+        "find_leaks detects nested vectors",
+    )
+
+    for module in CLIENT_QUERY_MODULES:
+        with open(os.path.join(backend_dir, module)) as f:
+            source = f.read()
+        check(
+            "{.*" not in source and not re.search(r"RETURN\s+n\s*$", source, re.M),
+            f"{module} has no wildcard projections",
+            "found `{.*` or a bare `RETURN n`",
+        )
+
+
+def seed(user_id: str, campaign_id: str) -> list[str]:
+    """Create a campaign with an embedded node and an embedded edge."""
+    from backend.services.neo4j import query
+
+    now = int(time.time() * 1000)
+    node_ids = [f"proj-node-{uuid.uuid4().hex[:8]}" for _ in range(2)]
+    query(
+        """
+        MERGE (u:User {id: $user_id})
+        CREATE (c:Campaign:Entity {id: $campaign_id, title: 'Projection check'})
+        CREATE (u)-[:OWNS]->(c)
+        WITH c
+        UNWIND $node_ids AS nid
+        CREATE (n:Note:Entity {
+            id: nid, type: 'Note', title: 'Leak check', markdown: 'body',
+            campaignId: $campaign_id, createdAt: $now, updatedAt: $now,
+            embedding: $vector, contentHash: 'abc', embeddedAt: $now
+        })-[:PART_OF]->(c)
+        WITH collect(n) AS nodes
+        WITH nodes[0] AS a, nodes[1] AS b
+        CREATE (a)-[:MENTIONS {
+            id: $edge_id, createdAt: $now, updatedAt: $now,
+            embedding: $vector, contentHash: 'abc'
+        }]->(b)
+        """,
+        user_id=user_id,
+        campaign_id=campaign_id,
+        node_ids=node_ids,
+        edge_id=f"proj-edge-{uuid.uuid4().hex[:8]}",
+        vector=[0.01] * 1536,
+        now=now,
+    )
+    return node_ids
+
+
+def cleanup(user_id: str, campaign_id: str):
+    from backend.services.neo4j import query
+
+    query(
+        """
+        MATCH (c:Campaign {id: $campaign_id})
+        OPTIONAL MATCH (c)<-[:PART_OF]-(n)
+        DETACH DELETE n, c
+        """,
+        campaign_id=campaign_id,
+    )
+    query("MATCH (u:User {id: $user_id}) DETACH DELETE u", user_id=user_id)
+
+
+def test_live():
+    from fastapi.testclient import TestClient
+    from backend.api.index import app
+    from backend.api.auth import get_current_user
+
+    run_id = uuid.uuid4().hex[:8]
+    user_id, campaign_id = f"proj-user-{run_id}", f"proj-camp-{run_id}"
+    node_ids = seed(user_id, campaign_id)
+    app.dependency_overrides[get_current_user] = lambda: user_id
+
+    endpoints = [
+        f"/sync/{campaign_id}/sidebar",
+        f"/sync/{campaign_id}/sidebar?slim=true",
+        f"/sync/{campaign_id}/nodes?ids={','.join(node_ids)}",
+        f"/sync/{campaign_id}/nodes/since/0",
+        f"/sync/{campaign_id}/edges/since/0",
+        f"/sync/{campaign_id}/node/{node_ids[0]}/edges",
+        f"/sync/{campaign_id}/pull?since=0",
+    ]
+    try:
+        with TestClient(app) as client:
+            for url in endpoints:
+                response = client.get(url)
+                if response.status_code != 200:
+                    check(False, url, f"HTTP {response.status_code}")
+                    continue
+                leaks = find_leaks(response.json())
+                check(not leaks, f"{url} leaks nothing", ", ".join(leaks[:5]))
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+        cleanup(user_id, campaign_id)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check that no vector leaves the server")
+    parser.add_argument(
+        "--static", action="store_true", help="Skip checks that need Neo4j"
+    )
+    args = parser.parse_args()
+
+    test_static()
+    if not args.static:
+        test_live()
+
+    log(f"✅ Passed: {results['passed']}  ❌ Failed: {results['failed']}")
+    sys.exit(0 if results["failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
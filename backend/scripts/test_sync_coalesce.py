@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Regression check: sync pushes are coalesced and planned as intended.
+
+coalesce_changes() and plan_changes() are pure, so these checks need neither
+Neo4j nor Redis. They cover folding an entity's changes into one net change
+(create + update, update after delete, delete after create), ordering by `ts`
+rather than push position, and reporting a planning failure against the
+client's index through `origins`.
+
+Usage:
+    python -m backend.scripts.test_sync_coalesce
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# Add the project root to the path so we can import backend modules
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.insert(0, project_root)
+
+from backend.models.components import Change
+from backend.services.sync.apply import plan_changes
+from backend.services.sync.coalesce import coalesce_changes
+
+results = {"passed": 0, "failed": 0}
+
+
+def log(message: str, level: str = "INFO"):
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] {level}: {message}")
+
+
+def check(condition: bool, name: str, detail: str = ""):
+    if condition:
+        results["passed"] += 1
+        log(f"✅ {name}", "PASS")
+    else:
+        results["failed"] += 1
+        log(f"❌ {name}: {detail}", "FAIL")
+
+
+def change(op: str, entity_id: str, ts: int, entity: str = "node", **payload) -> Change:
+    return Change(op=op, entity=entity, entityId=entity_id, payload=payload, ts=ts)
+
+
+def test_create_then_update():
+    net, origins = coalesce_changes(
+        [
+            change("create", "n1", 1, type="Note", title="Draft", markdown="a"),
+            change("update", "n1", 2, markdown="b"),
+            change("update", "n1", 3, title="Final"),
+        ]
+    )
+    check(len(net) == 1, "create + updates fold into one change", f"got {len(net)}")
+    check(
+        net[0].op == "create" and net[0].ts == 3,
+        "the net change is a create at the latest ts",
+        f"got {net[0].op} at {net[0].ts}",
+    )
+    check(
+        net[0].payload == {"type": "Note", "title": "Final", "markdown": "b"},
+        "later payload keys win",
+        f"got {net[0].payload}",
+    )
+    check(origins == [2], "reported against the last update", f"got {origins}")
+
+
+def test_update_after_delete():
+    net, origins = coalesce_changes(
+        [change("delete", "n1", 1), change("update", "n1", 2, title="Late")]
+    )
+    check(
+        [c.op for c in net] == ["delete"],
+        "an update after a delete leaves the delete",
+        f"got {[c.op for c in net]}",
+    )
+    check(origins == [0], "reported against the delete", f"got {origins}")
+
+    net, origins = coalesce_changes(
+        [change("delete", "n1", 1), change("create", "n1", 2, type="Note")]
+    )
+    check(
+        [c.op for c in net] == ["create"] and origins == [1],
+        "a create after a delete re-creates",
+        f"got {[c.op for c in net]} from {origins}",
+    )
+
+
+def test_delete_after_create():
+    net, origins = coalesce_changes(
+        [change("create", "n1", 1, type="Note"), change("delete", "n1", 2)]
+    )
+    check(
+        [c.op for c in net] == ["delete"],
+        "a delete after a create is still sent",
+        f"got {[c.op for c in net]}",
+    )
+    check(origins == [1], "reported against the delete", f"got {origins}")
+
+
+def test_ts_order():
+    # Pushed out of order: the delete is older than the create
+    net, origins = coalesce_changes(
+        [change("create", "n1", 5, type="Note"), change("delete", "n1", 1)]
+    )
+    check(
+        [c.op for c in net] == ["create"] and origins == [0],
+        "changes fold in ts order, not push order",
+        f"got {[c.op for c in net]} from {origins}",
+    )
+
+    net, _ = coalesce_changes(
+        [
+            change("update", "n1", 3, title="Newest"),
+            change("update", "n1", 2, title="Older"),
+        ]
+    )
+    check(
+        net[0].payload["title"] == "Newest" and net[0].ts == 3,
+        "the newest update wins whatever its position",
+        f"got {net[0].payload} at {net[0].ts}",
+    )
+
+    net, _ = coalesce_changes(
+        [
+            change("update", "b", 1, title="B"),
+            change("update", "a", 2, title="A"),
+            change("update", "b", 3, markdown="B"),
+        ]
+    )
+    check(
+        [c.entityId for c in net] == ["b", "a"],
+        "net changes keep each entity's first appearance",
+        f"got {[c.entityId for c in net]}",
+    )
+
+
+def test_failure_origins():
+    changes = [
+        change("update", "n1", 1, title="A"),
+        change("create", "e1", 1, entity="edge", fromId="n1"),
+        change("update", "n1", 2, title="B"),
+        change("update", "e1", 2, entity="edge", toId="n2"),
+        change("create", "n2", 3, type="NotAType"),
+    ]
+    net, origins = coalesce_changes(changes)
+    groups, failures = plan_changes(net)
+    reported = sorted(origins[f.index] for f in failures)
+    check(
+        reported == [3, 4],
+        "planning failures map back to the client's indexes",
+        f"got {reported}",
+    )
+    planned = sorted(row["idx"] for group in groups for row in group.rows)
+    check(
+        [origins[idx] for idx in planned] == [2],
+        "the valid net change is planned",
+        f"got {[origins[idx] for idx in planned]}",
+    )
+
+
+def main():
+    test_create_then_update()
+    test_update_after_delete()
+    test_delete_after_create()
+    test_ts_order()
+    test_failure_origins()
+
+    log(f"✅ Passed: {results['passed']}  ❌ Failed: {results['failed']}")
+    sys.exit(0 if results["failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# backend/services/embeddings/backfill.py
+
+"""
+Checkpoints and throttling of embedding backfills.
+
+A backfill walks the nodes of a campaign, or every node, in id order, as a
+chain of short worker jobs (tasks.backfill_embeddings, scheduled by
+scheduler.py). After each pipeline batch, the job commits a checkpoint to
+Redis. The checkpoint holds:
+
+    cursor    id of the last node the walk reached
+    counters  processed, updated, skipped and failed nodes, and batches
+    timing    active time spent embedding, throughput and ETA
+    status    running, paused, done or failed
+
+A job that times out, a worker that dies or a deploy therefore loses at most
+one batch. Starting the backfill again resumes from the cursor unless it is
+restarted or its mode changes. Pausing takes effect before the next batch,
+and resuming continues where the walk stopped.
+
+However many backfills are queued, at most EMBEDDING_BACKFILL_CONCURRENCY
+jobs embed at once across all workers. Each job keeps at most
+EMBEDDING_BACKFILL_MAX_REQUESTS provider requests in flight. A backfill can
+therefore run against production during peak hours, leaving provider quota
+and worker capacity to interactive embedding.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any
+try:
+    from backend.services.queue_service import get_redis_connection
+except ImportError:
+    from services.queue_service import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+CONCURRENCY = int(os.getenv("EMBEDDING_BACKFILL_CONCURRENCY", "1"))
+MAX_REQUESTS = int(os.getenv("EMBEDDING_BACKFILL_MAX_REQUESTS", "2"))
+
+KEY_PREFIX = "emb:backfill:v1"
+SLOTS_KEY = f"{KEY_PREFIX}:slots"
+# A slot held by a job that died is freed after this long
+SLOT_TTL_S = 20 * 60
+# How long a slice waits for a free slot before trying again
+SLOT_RETRY_S = 15
+# How long a finished checkpoint stays around for status reports
+DONE_TTL_S = 7 * 24 * 3600
+# Error messages kept on a checkpoint
+MAX_ERRORS = 20
+
+RUNNING = "running"
+PAUSED = "paused"
+DONE = "done"
+FAILED = "failed"
+
+# Take a slot if fewer than ARGV[3] unexpired holders have one
+_ACQUIRE_SLOT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[4])
+    return 1
+end
+return 0
+"""
+
+
+def scope_of(campaign_id: str | None) -> str:
+    return campaign_id or "global"
+
+
+class BackfillCheckpoints:
+    def __init__(self, concurrency: int = CONCURRENCY):
+        self.concurrency = concurrency
+        self._acquire_slot = None
+
+    def _key(self, campaign_id: str | None) -> str:
+        return f"{KEY_PREFIX}:checkpoint:{scope_of(campaign_id)}"
+
+    def get(self, campaign_id: str | None) -> dict[str, Any] | None:
+        """The checkpoint of a campaign's backfill, with throughput and ETA."""
+        fields = get_redis_connection().hgetall(self._key(campaign_id))
+        if not fields:
+            return None
+        checkpoint = {k.decode(): json.loads(v) for k, v in fields.items()}
+        return {**checkpoint, **_progress(checkpoint)}
+
+    def save(self, campaign_id: str | None, **fields: Any) -> None:
+        """Commit checkpoint fields; fields not given keep their values."""
+        fields["updatedAt"] = time.time()
+        get_redis_connection().hset(
+            self._key(campaign_id),
+            mapping={k: json.dumps(v) for k, v in fields.items()},
+        )
+
+    def begin(
+        self, campaign_id: str | None, force: bool, restart: bool = False
+    ) -> dict[str, Any]:
+        """
+        Mark a campaign's backfill as running, resuming an unfinished
+        checkpoint of the same mode unless `restart`. Returns the checkpoint.
+        """
+        checkpoint = self.get(campaign_id)
+        resume = (
+            checkpoint is not None
+            and not restart
+            and checkpoint["status"] != DONE
+            and checkpoint["force"] == force
+        )
+        if resume:
+            self.save(campaign_id, status=RUNNING, error=None)
+        else:
+            conn = get_redis_connection()
+            conn.delete(self._key(campaign_id))
+            self.save(
+                campaign_id,
+                scope=scope_of(campaign_id),
+                force=force,
+                status=RUNNING,
+                after=None,
+                total=None,
+                processed=0,
+                updated=0,
+                skipped=0,
+                failed=0,
+                batches=0,
+                errors=[],
+                error=None,
+                activeSeconds=0.0,
+                startedAt=time.time(),
+                finishedAt=None,
+            )
+        logger.info(f"{'Resuming' if resume else 'Starting'} embedding backfill of {scope_of(campaign_id)}")
+        return self.get(campaign_id)
+
+    def record_batch(
+        self,
+        campaign_id: str | None,
+        checkpoint: dict[str, Any],
+        after: str,
+        results: dict[str, Any],
+        seconds: float,
+    ) -> dict[str, Any]:
+        """Advance the cursor past a batch and commit the new checkpoint."""
+        for key in ("processed", "updated", "skipped"):
+            checkpoint[key] += results[key]
+        checkpoint["failed"] += len(results["errors"])
+        checkpoint["errors"] = (checkpoint["errors"] + results["errors"])[-MAX_ERRORS:]
+        checkpoint["batches"] += 1
+        checkpoint["activeSeconds"] += seconds
+        checkpoint["after"] = after
+        self.save(
+            campaign_id,
+            **{
+                key: checkpoint[key]
+                for key in (
+                    "after", "processed", "updated", "skipped", "failed",
+                    "errors", "batches", "activeSeconds",
+                )
+            },
+        )
+        checkpoint.update(_progress(checkpoint))
+        return checkpoint
+
+    def finish(self, campaign_id: str | None, status: str, error: str | None = None) -> None:
+        """Record how the walk ended; a finished checkpoint expires."""
+        fields: dict[str, Any] = {"status": status}
+        if status == FAILED:
+            fields["error"] = error
+        if status == DONE:
+            fields["finishedAt"] = time.time()
+        self.save(campaign_id, **fields)
+        if status == DONE:
+            get_redis_connection().expire(self._key(campaign_id), DONE_TTL_S)
+
+    def status(self, campaign_id: str | None) -> str | None:
+        raw = get_redis_connection().hget(self._key(campaign_id), "status")
+        return json.loads(raw) if raw else None
+
+    def pause(self, campaign_id: str | None) -> bool:
+        """Ask a running backfill to stop before its next batch."""
+        if self.status(campaign_id) != RUNNING:
+            return False
+        self.save(campaign_id, status=PAUSED)
+        return True
+
+    def all(self) -> list[dict[str, Any]]:
+        """Every known checkpoint, most recently updated first."""
+        conn = get_redis_connection()
+        checkpoints = []
+        for key in conn.scan_iter(f"{KEY_PREFIX}:checkpoint:*"):
+            scope = key.decode().rsplit(":", 1)[-1]
+            checkpoint = self.get(None if scope == "global" else scope)
+            if checkpoint:
+                checkpoints.append(checkpoint)
+        return sorted(checkpoints, key=lambda c: c.get("updatedAt") or 0, reverse=True)
+
+    def acquire_slot(self, token: str) -> bool:
+        """Take one of the CONCURRENCY backfill slots shared by every worker."""
+        conn = get_redis_connection()
+        if self._acquire_slot is None:
+            self._acquire_slot = conn.register_script(_ACQUIRE_SLOT)
+        now = time.time()
+        return bool(
+            self._acquire_slot(
+                keys=[SLOTS_KEY],
+                args=[now, now + SLOT_TTL_S, self.concurrency, token],
+                client=conn,
+            )
+        )
+
+    def release_slot(self, token: str) -> None:
+        get_redis_connection().zrem(SLOTS_KEY, token)
+
+    def slots_in_use(self) -> int:
+        conn = get_redis_connection()
+        return conn.zcount(SLOTS_KEY, time.time(), "+inf")
+
+
+def _progress(checkpoint: dict[str, Any]) -> dict[str, Any]:
+    """Throughput over active time, and the ETA it gives for what is left."""
+    active = checkpoint.get("activeSeconds") or 0
+    processed = checkpoint.get("processed") or 0
+    rate = processed / active if active else None
+    total = checkpoint.get("total")
+    remaining = max(0, total - processed) if total is not None else None
+    eta = remaining / rate if rate and remaining is not None else None
+    return {
+        "nodesPerSecond": round(rate, 2) if rate else None,
+        "remaining": remaining,
+        "etaSeconds": round(eta) if eta is not None else None,
+    }
+
+
+# Use as a singleton instance
+_backfill_checkpoints = None
+
+
+def get_backfill_checkpoints() -> BackfillCheckpoints:
+    """Get the singleton backfill checkpoints instance."""
+    global _backfill_checkpoints
+    if _backfill_checkpoints is None:
+        _backfill_checkpoints = BackfillCheckpoints()
+    return _backfill_checkpoints
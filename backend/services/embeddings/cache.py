@@ -0,0 +1,254 @@
+# backend/services/embeddings/cache.py
+
+"""
+Content-addressed cache of embedding vectors.
+
+The same text (templates, imported reference content, duplicated notes, the
+empty-note placeholder) is often embedded for many nodes and many users. The
+cache keys a vector by (model, dims, sha256 of the normalised text), so any
+node, user or process that embeds that text again gets the stored vector
+instead of a provider call.
+
+Tiers, checked in order:
+    disk   optional SQLite file in EMBEDDING_CACHE_DIR, local to the machine
+    redis  shared by the API and every worker, survives restarts
+
+Both tiers evict least recently used entries beyond their size limit. Cache
+failures never fail an embedding; they count as misses. Hit and miss counters
+are kept in Redis so /admin/embeddings/status shows every process's traffic.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+import numpy as np
+try:
+    from backend.services.queue_service import get_redis_connection
+except ImportError:
+    from services.queue_service import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+# ~6 KB per 1536-dim vector, so 10k entries is ~60 MB of Redis memory
+MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "10000"))
+DISK_DIR = os.getenv("EMBEDDING_CACHE_DIR")
+DISK_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_DISK_MAX_ENTRIES", "50000"))
+
+KEY_PREFIX = "emb:cache:v1"
+LRU_KEY = f"{KEY_PREFIX}:lru"
+STATS_KEY = f"{KEY_PREFIX}:stats"
+
+
+def normalize_text(text: str) -> str:
+    """The form of `text` that is hashed and sent to the provider."""
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+def encode_vector(vector: list[float]) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def decode_vector(blob: bytes) -> list[float]:
+    return np.frombuffer(blob, dtype=np.float32).tolist()
+
+
+class _DiskTier:
+    """SQLite table of vectors with a last-used timestamp for LRU eviction."""
+
+    def __init__(self, directory: str, max_entries: int):
+        os.makedirs(directory, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(directory, "embeddings.sqlite3"), check_same_thread=False
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors "
+            "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS vectors_used ON vectors (used)")
+        self._db.commit()
+
+    def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        if not keys:
+            return {}
+        marks = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT key, vector FROM vectors WHERE key IN ({marks})", keys
+            ).fetchall()
+            if rows:
+                self._db.execute(
+                    f"UPDATE vectors SET used = ? WHERE key IN ({marks})",
+                    [time.time(), *keys],
+                )
+                self._db.commit()
+        return dict(rows)
+
+    def put_many(self, items: dict[str, bytes]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO vectors (key, vector, used) VALUES (?, ?, ?)",
+                [(key, blob, now) for key, blob in items.items()],
+            )
+            self._db.execute(
+                "DELETE FROM vectors WHERE key IN (SELECT key FROM vectors "
+                "ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def size(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM vectors").fetchone()[0]
+
+
+class EmbeddingCache:
+    def __init__(self):
+        self.enabled = CACHE_ENABLED
+        self.disk = None
+        if self.enabled and DISK_DIR:
+            try:
+                self.disk = _DiskTier(DISK_DIR, DISK_MAX_ENTRIES)
+            except Exception as e:
+                logger.warning(f"Embedding disk cache unavailable: {e}")
+
+    @staticmethod
+    def key(model: str, dims: int, text: str) -> str:
+        digest = hashlib.sha256(normalize_text(text).encode()).hexdigest()
+        return f"{KEY_PREFIX}:{model}:{dims}:{digest}"
+
+    def _count(self, **counts: int) -> None:
+        try:
+            pipe = get_redis_connection().pipeline(transaction=False)
+            for name, value in counts.items():
+                if value:
+                    pipe.hincrby(STATS_KEY, name, value)
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"Failed to update embedding cache stats: {e}")
+
+    def get_many(self, model: str, dims: int, texts: list[str]) -> dict[str, list[float]]:
+        """Cached vectors for the texts that have one, keyed by text."""
+        if not self.enabled or not texts:
+            return {}
+        keys = {text: self.key(model, dims, text) for text in set(texts)}
+        found: dict[str, bytes] = {}
+
+        disk_hits = 0
+        if self.disk is not None:
+            try:
+                found.update(self.disk.get_many(list(keys.values())))
+                disk_hits = len(found)
+            except Exception as e:
+                logger.warning(f"Embedding disk cache read failed: {e}")
+
+        redis_hits = 0
+        missing = [key for key in keys.values() if key not in found]
+        if missing:
+            try:
+                conn = get_redis_connection()
+                blobs = conn.mget(missing)
+                from_redis = {k: b for k, b in zip(missing, blobs) if b is not None}
+                if from_redis:
+                    conn.zadd(LRU_KEY, {k: time.time() for k in from_redis})
+                    if self.disk is not None:
+                        self.disk.put_many(from_redis)
+                found.update(from_redis)
+                redis_hits = len(from_redis)
+            except Exception as e:
+                logger.warning(f"Embedding cache read failed: {e}")
+
+        self._count(
+            disk_hits=disk_hits,
+            redis_hits=redis_hits,
+            misses=len(keys) - len(found),
+        )
+        return {text: decode_vector(found[key]) for text, key in keys.items() if key in found}
+
+    def put_many(self, model: str, dims: int, vectors: dict[str, list[float]]) -> None:
+        """Store vectors keyed by the text they embed."""
+        if not self.enabled or not vectors:
+            return
+        items = {
+            self.key(model, dims, text): encode_vector(vector)
+            for text, vector in vectors.items()
+            # A zero vector is never a real embedding; do not let one spread
+            if any(vector)
+        }
+        if not items:
+            return
+        if self.disk is not None:
+            try:
+                self.disk.put_many(items)
+            except Exception as e:
+                logger.warning(f"Embedding disk cache write failed: {e}")
+        try:
+            conn = get_redis_connection()
+            pipe = conn.pipeline(transaction=False)
+            pipe.mset(items)
+            pipe.zadd(LRU_KEY, {key: time.time() for key in items})
+            pipe.execute()
+            self._evict(conn)
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+        self._count(writes=len(items))
+
+    def _evict(self, conn) -> None:
+        overflow = conn.zcard(LRU_KEY) - MAX_ENTRIES
+        if overflow <= 0:
+            return
+        evicted = [key for key, _ in conn.zpopmin(LRU_KEY, overflow)]
+        if evicted:
+            conn.delete(*evicted)
+            self._count(evictions=len(evicted))
+
+    def stats(self) -> dict:
+        """Counters shared by every process, plus this process's disk tier."""
+        stats = {
+            "enabled": self.enabled,
+            "max_entries": MAX_ENTRIES,
+            "disk_enabled": self.disk is not None,
+        }
+        try:
+            conn = get_redis_connection()
+            counters = {k.decode(): int(v) for k, v in conn.hgetall(STATS_KEY).items()}
+            stats["entries"] = conn.zcard(LRU_KEY)
+        except Exception as e:
+            counters = {}
+            stats["error"] = str(e)
+        for name in ("disk_hits", "redis_hits", "misses", "writes", "evictions"):
+            stats[name] = counters.get(name, 0)
+        lookups = stats["disk_hits"] + stats["redis_hits"] + stats["misses"]
+        stats["hit_ratio"] = (
+            round((stats["disk_hits"] + stats["redis_hits"]) / lookups, 4)
+            if lookups
+            else None
+        )
+        if self.disk is not None:
+            try:
+                stats["disk_entries"] = self.disk.size()
+            except Exception:
+                pass
+        return stats
+
+
+# Use as a singleton instance
+_embedding_cache = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the singleton embedding cache instance."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache()
+    return _embedding_cache
@@ -0,0 +1,184 @@
+# backend/services/embeddings/chunking.py
+
+"""
+Markdown-aware chunking of node content for embedding.
+
+A single vector for a whole session log or lore document is dominated by
+whatever the document is mostly about, and anything past the provider's input
+limit is lost. Content is instead split into chunks of at most
+EMBEDDING_CHUNK_MAX_TOKENS:
+
+    sections    split on markdown headings (outside code fences)
+    paragraphs  packed together up to the token budget; a paragraph that is
+                too long on its own is split on sentences, then on tokens
+
+Formatting that carries no meaning for retrieval (link targets, image URLs,
+emphasis markers, list bullets, table rules, HTML) is stripped first. Each
+chunk starts with the node title and its heading path so it can be matched on
+context it does not repeat itself.
+
+Every chunk carries the hash of its text; an edit only changes the hashes of
+the chunks it touches, and only those are re-embedded.
+"""
+
+import hashlib
+import os
+import re
+from typing import Any
+try:
+    from backend.services.embeddings.cache import normalize_text
+except ImportError:
+    from services.embeddings.cache import normalize_text
+
+CHUNK_MAX_TOKENS = int(os.getenv("EMBEDDING_CHUNK_MAX_TOKENS", "512"))
+
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# Inline markup, applied in order
+_INLINE = [
+    (re.compile(r"<!--.*?-->", re.S), ""),
+    (re.compile(r"!\[([^\]]*)\]\([^)]*\)"), r"\1"),  # images -> alt text
+    (re.compile(r"\[\[([^\]|]+)\|([^\]]+)\]\]"), r"\2"),  # [[target|alias]]
+    (re.compile(r"\[\[([^\]]+)\]\]"), r"\1"),  # [[target]]
+    (re.compile(r"\[([^\]]+)\]\([^)]*\)"), r"\1"),  # links -> text
+    (re.compile(r"</?[A-Za-z][^>\n]*>"), ""),  # HTML tags
+    (re.compile(r"(\*\*|__|~~|`)"), ""),
+    (re.compile(r"(?<![\w*])\*(?=\S)(.+?)(?<=\S)\*(?![\w*])"), r"\1"),
+    (re.compile(r"(?<![\w_])_(?=\S)(.+?)(?<=\S)_(?![\w_])"), r"\1"),
+]
+
+# Line prefixes and whole lines that are only structure
+_LINE_PREFIX = re.compile(r"^\s*(?:>\s*)*(?:[-*+]\s+(?:\[[ xX]\]\s+)?|\d+[.)]\s+)?")
+_RULE = re.compile(r"^\s*(?:[-*_]\s*){3,}$|^\s*\|?\s*:?-{3,}:?\s*(?:\|\s*:?-{3,}:?\s*)*\|?\s*$")
+
+
+def strip_markdown(text: str) -> str:
+    """Drop formatting that costs tokens without adding meaning."""
+    lines = []
+    for line in text.split("\n"):
+        if _FENCE.match(line) or _RULE.match(line):
+            continue
+        line = _LINE_PREFIX.sub("", line)
+        if "|" in line:
+            line = " ".join(cell.strip() for cell in line.strip().strip("|").split("|"))
+        lines.append(line)
+    text = "\n".join(lines)
+    for pattern, replacement in _INLINE:
+        text = pattern.sub(replacement, text)
+    text = re.sub(r"[ \t]+", " ", text)
+    return re.sub(r"\n\s*\n\s*", "\n\n", text).strip()
+
+
+def _sections(markdown: str) -> list[tuple[list[str], str]]:
+    """(heading path, body) for each heading-delimited section."""
+    sections = []
+    path: list[tuple[int, str]] = []
+    lines: list[str] = []
+    in_fence = False
+    for line in markdown.split("\n"):
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING.match(line)
+        if match is None:
+            lines.append(line)
+            continue
+        sections.append(([heading for _, heading in path], "\n".join(lines)))
+        lines = []
+        level = len(match.group(1))
+        path = [(l, h) for l, h in path if l < level]
+        path.append((level, strip_markdown(match.group(2))))
+    sections.append(([heading for _, heading in path], "\n".join(lines)))
+    return sections
+
+
+def _hash(text: str) -> str:
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+class _Packer:
+    """Greedily packs paragraphs of one section into token-bounded chunks."""
+
+    def __init__(self, encoding, max_tokens: int):
+        self.encoding = encoding
+        self.max_tokens = max_tokens
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text))
+
+    def _pieces(self, paragraph: str, budget: int) -> list[str]:
+        """The paragraph, or parts of it that each fit the budget."""
+        if self.count(paragraph) <= budget:
+            return [paragraph]
+        pieces = []
+        for sentence in _SENTENCE_END.split(paragraph):
+            tokens = self.encoding.encode(sentence)
+            for start in range(0, len(tokens), budget):
+                pieces.append(self.encoding.decode(tokens[start:start + budget]))
+        return pieces
+
+    def pack(self, prefix: str, body: str) -> list[tuple[str, int]]:
+        budget = max(32, self.max_tokens - self.count(prefix) - 1)
+        chunks = []
+        # Pieces of one paragraph rejoin with a space, paragraphs with a blank line
+        paragraphs: list[list[str]] = []
+        used = 0
+        for paragraph in body.split("\n\n"):
+            paragraphs.append([])
+            for piece in self._pieces(paragraph, budget):
+                tokens = self.count(piece)
+                if used and used + tokens > budget:
+                    chunks.append(paragraphs)
+                    paragraphs, used = [[]], 0
+                paragraphs[-1].append(piece)
+                used += tokens
+        if used:
+            chunks.append(paragraphs)
+        chunks = ["\n\n".join(" ".join(p) for p in c if p) for c in chunks]
+        return [
+            (text, self.count(text)) for text in (f"{prefix}\n{c}" for c in chunks)
+        ]
+
+
+def chunk_markdown(
+    title: str, markdown: str, encoding, max_tokens: int = CHUNK_MAX_TOKENS
+) -> list[dict[str, Any]]:
+    """
+    Split a node's content into chunks to embed.
+
+    Returns `{"idx", "heading", "text", "tokens", "hash"}` per chunk, in
+    document order. Content with no body yields a single chunk of the title.
+    """
+    title = strip_markdown(title or "")
+    packer = _Packer(encoding, max_tokens)
+    chunks = []
+    for path, body in _sections(markdown or ""):
+        body = strip_markdown(body)
+        if not body:
+            continue
+        heading = " > ".join(path)
+        prefix = " > ".join(part for part in [title, heading] if part)
+        for text, tokens in packer.pack(prefix, body):
+            text = normalize_text(text)
+            chunks.append(
+                {
+                    "idx": len(chunks),
+                    "heading": heading or None,
+                    "text": text,
+                    "tokens": tokens,
+                    "hash": _hash(text),
+                }
+            )
+    if not chunks:
+        text = normalize_text(title) or " "
+        chunks.append(
+            {
+                "idx": 0,
+                "heading": None,
+                "text": text,
+                "tokens": packer.count(text),
+                "hash": _hash(text),
+            }
+        )
+    return chunks
@@ -0,0 +1,406 @@
+# backend/services/embeddings/client.py
+
+"""
+Async embedding client with adaptive concurrency.
+
+Texts are split into token-bounded batches that are sent to the provider
+concurrently. The number of requests in flight is an AIMD limit: it grows by
+one per window of successful requests, up to EMBEDDING_MAX_CONCURRENCY, and
+halves on a 429. A `retry-after` from the provider pauses every request of
+this process until it has passed. The limit is shared by every event loop of
+the process (the API loop and the loops that blocking callers run in
+threadpool threads), so it bounds the process's requests as a whole.
+
+Rate limits, timeouts and 5xx responses are retried with backoff; a batch
+rejected outright is split in half so that one bad input cannot fail its
+neighbours.
+
+Nothing here turns a failure into a vector. Texts that could not be embedded
+are returned in `EmbeddedTexts.errors` and callers decide what to do.
+
+Providers are pluggable: anything with `max_inputs` and an
+`async embed(texts) -> list[list[float]]` that raises EmbeddingProviderError.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator, Protocol
+
+logger = logging.getLogger(__name__)
+
+INITIAL_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "16"))
+MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+REQUEST_TIMEOUT = float(os.getenv("EMBEDDING_REQUEST_TIMEOUT", "30"))
+
+# OpenAI accepts up to 2048 inputs and 300k tokens per embeddings request;
+# stay well below so one request never takes long enough to time out
+MAX_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "100000"))
+MAX_BATCH_INPUTS = int(os.getenv("EMBEDDING_BATCH_MAX_INPUTS", "256"))
+
+# Concurrent 429s from one burst should only halve the limit once
+DECREASE_INTERVAL_S = 1.0
+BACKOFF_BASE_S = 0.5
+BACKOFF_MAX_S = 30.0
+
+
+class EmbeddingError(RuntimeError):
+    """A text could not be embedded."""
+
+
+class EmbeddingProviderError(EmbeddingError):
+    """A provider request failed; says whether and when to retry it."""
+
+    def __init__(
+        self,
+        message: str,
+        retryable: bool = False,
+        rate_limited: bool = False,
+        retry_after: float | None = None,
+    ):
+        super().__init__(message)
+        self.retryable = retryable or rate_limited
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+
+
+class EmbeddingProvider(Protocol):
+    max_inputs: int
+
+    async def embed(self, texts: list[str]) -> list[list[float]]: ...
+
+
+def _retry_after(headers: Any) -> float | None:
+    """Seconds to wait from `retry-after-ms` / `retry-after`, if present."""
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        # HTTP-date form; fall back to our own backoff
+        pass
+    return None
+
+
+class OpenAIEmbeddingProvider:
+    max_inputs = 2048
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise RuntimeError("OPENAI_API_KEY environment variable not set")
+        # AsyncOpenAI pools connections on the loop that created it, and
+        # blocking callers each run their own loop, so keep one client per
+        # loop; aclose() closes it before the loop ends
+        self._clients: dict[asyncio.AbstractEventLoop, Any] = {}
+        self._clients_lock = threading.Lock()
+
+    def _client(self):
+        from openai import AsyncOpenAI
+
+        loop = asyncio.get_running_loop()
+        with self._clients_lock:
+            if loop not in self._clients:
+                # Retries are ours, so that 429s reach the concurrency limit
+                self._clients[loop] = AsyncOpenAI(
+                    api_key=self.api_key, max_retries=0, timeout=REQUEST_TIMEOUT
+                )
+            return self._clients[loop]
+
+    async def aclose(self) -> None:
+        """Close the client of the running loop and its connection pool."""
+        with self._clients_lock:
+            client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        import openai
+
+        try:
+            response = await self._client().embeddings.create(
+                input=texts, model=self.model_name
+            )
+        except openai.RateLimitError as e:
+            raise EmbeddingProviderError(
+                str(e), rate_limited=True, retry_after=_retry_after(e.response.headers)
+            ) from e
+        except (openai.APIConnectionError, openai.InternalServerError) as e:
+            # APIConnectionError includes timeouts
+            raise EmbeddingProviderError(str(e), retryable=True) from e
+        except openai.APIError as e:
+            raise EmbeddingProviderError(str(e)) from e
+        return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+
+
+class SentenceTransformerProvider:
+    max_inputs = 256
+
+    def __init__(self, model_name: str):
+        try:
+            from sentence_transformers import SentenceTransformer
+            self.model = SentenceTransformer(model_name)
+        except Exception as e:
+            raise RuntimeError(f"Failed to load embedding model: {model_name}") from e
+        self.dimensions = self.model.get_sentence_embedding_dimension()
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        try:
+            vectors = await asyncio.to_thread(
+                self.model.encode, texts, convert_to_tensor=False
+            )
+        except Exception as e:
+            raise EmbeddingProviderError(str(e)) from e
+        return vectors.tolist()
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on concurrent provider requests, shared by the process.
+
+    State is guarded by a thread lock, since each event loop runs in its own
+    thread. A request waiting for a slot waits on a future of its own loop,
+    and a release on any loop wakes it thread-safely.
+    """
+
+    def __init__(
+        self,
+        initial: int = INITIAL_CONCURRENCY,
+        maximum: int = MAX_CONCURRENCY,
+        minimum: int = 1,
+    ):
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self._waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    async def _acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                pause = self.paused_until - time.monotonic()
+                if pause <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            try:
+                # Woken by a release, or when the pause is over
+                await asyncio.wait_for(waiter, pause if pause > 0 else None)
+            except TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    try:
+                        self._waiters.remove((loop, waiter))
+                    except ValueError:
+                        pass
+
+    def _wake_all(self) -> None:
+        with self._lock:
+            waiters = list(self._waiters)
+            self._waiters.clear()
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_set_waiter, waiter)
+            except RuntimeError:
+                # Its loop has closed; nothing is waiting there any more
+                pass
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self._acquire()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._wake_all()
+
+    def on_success(self) -> None:
+        # +1 per `limit` successes, i.e. roughly one per window
+        with self._lock:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_rate_limit(self, retry_after: float | None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_decrease >= DECREASE_INTERVAL_S:
+                self.limit = max(self.minimum, self.limit / 2)
+                self._last_decrease = now
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "max_limit": self.maximum,
+                "in_flight": self.in_flight,
+                "waiting": len(self._waiters),
+                "paused_for_s": round(max(0.0, self.paused_until - time.monotonic()), 2),
+            }
+
+
+def _set_waiter(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+@dataclass
+class EmbeddedTexts:
+    """Per-text outcome: a vector, or an error for texts that failed."""
+
+    vectors: list[list[float] | None]
+    errors: dict[int, str] = field(default_factory=dict)
+    batches: int = 0
+
+
+def token_batches(
+    items: list[dict[str, Any]],
+    max_tokens: int = MAX_BATCH_TOKENS,
+    max_inputs: int = MAX_BATCH_INPUTS,
+) -> Iterator[list[dict[str, Any]]]:
+    """Split items carrying a `tokens` count into provider-sized batches."""
+    batch: list[dict[str, Any]] = []
+    batch_tokens = 0
+    for item in items:
+        if batch and (
+            batch_tokens + item["tokens"] > max_tokens or len(batch) >= max_inputs
+        ):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += item["tokens"]
+    if batch:
+        yield batch
+
+
+class AsyncEmbeddingClient:
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        concurrency: AdaptiveConcurrency | None = None,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.provider = provider
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        self.max_retries = max_retries
+        self.counters = {
+            "requests": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "failed_texts": 0,
+        }
+
+    async def _request(self, texts: list[str]) -> list[list[float]]:
+        """One batch, retried on rate limits and transient errors."""
+        attempt = 0
+        while True:
+            async with self.concurrency.slot():
+                self.counters["requests"] += 1
+                try:
+                    vectors = await self.provider.embed(texts)
+                except EmbeddingProviderError as e:
+                    error = e
+                else:
+                    self.concurrency.on_success()
+                    return vectors
+            if error.rate_limited:
+                self.counters["rate_limited"] += 1
+                self.concurrency.on_rate_limit(error.retry_after)
+            if not error.retryable or attempt >= self.max_retries:
+                raise error
+            attempt += 1
+            self.counters["retries"] += 1
+            if not error.retry_after:
+                # With a retry-after, slot() already waits until it has passed
+                delay = min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2**attempt)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def _embed_batch(
+        self, batch: list[dict[str, Any]], result: EmbeddedTexts
+    ) -> None:
+        try:
+            vectors = await self._request([item["text"] for item in batch])
+        except EmbeddingProviderError as e:
+            if not e.retryable and len(batch) > 1:
+                # Rejected outright: isolate the input(s) the provider refused
+                half = len(batch) // 2
+                await asyncio.gather(
+                    self._embed_batch(batch[:half], result),
+                    self._embed_batch(batch[half:], result),
+                )
+                return
+            for item in batch:
+                result.errors[item["index"]] = str(e)
+            self.counters["failed_texts"] += len(batch)
+            return
+        for item, vector in zip(batch, vectors):
+            result.vectors[item["index"]] = vector
+
+    async def embed(
+        self,
+        texts: list[str],
+        token_counts: list[int] | None = None,
+        max_concurrency: int | None = None,
+    ) -> EmbeddedTexts:
+        """
+        Embed texts concurrently; failures are reported per text.
+
+        `max_concurrency` caps the requests of this call in flight, below the
+        adaptive limit shared by the process.
+        """
+        result = EmbeddedTexts(vectors=[None] * len(texts))
+        if not texts:
+            return result
+        if token_counts is None:
+            # Rough count, only used to size batches
+            token_counts = [len(text) // 4 + 1 for text in texts]
+        items = [
+            {"index": i, "text": text, "tokens": tokens}
+            for i, (text, tokens) in enumerate(zip(texts, token_counts))
+        ]
+        batches = list(
+            token_batches(
+                items, max_inputs=min(MAX_BATCH_INPUTS, self.provider.max_inputs)
+            )
+        )
+        result.batches = len(batches)
+        if max_concurrency:
+            capped = asyncio.Semaphore(max_concurrency)
+
+            async def embed_batch(batch: list[dict[str, Any]]) -> None:
+                async with capped:
+                    await self._embed_batch(batch, result)
+        else:
+            async def embed_batch(batch: list[dict[str, Any]]) -> None:
+                await self._embed_batch(batch, result)
+
+        await asyncio.gather(*(embed_batch(b) for b in batches))
+        return result
+
+    async def aclose(self) -> None:
+        """Release the provider's resources bound to the running loop."""
+        close = getattr(self.provider, "aclose", None)
+        if close is not None:
+            await close()
+
+    def stats(self) -> dict:
+        """Counters and the current concurrency limit, for this process."""
+        return {**self.counters, **self.concurrency.stats()}
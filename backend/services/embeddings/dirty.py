@@ -0,0 +1,112 @@
+# backend/services/embeddings/dirty.py
+
+"""
+Debounced, cross-worker set of nodes whose content changed.
+
+Sync pushes add node ids to a Redis sorted set scored by the time of their
+last edit; every edit moves the score forward. A node is handed to the
+embedding pipeline only once it has been quiet for EMBEDDING_QUIET_SECONDS,
+so a burst of autosaves becomes one embedding call, whichever API worker
+received each push and however often those workers are recycled.
+
+Flushing runs on the RQ worker (tasks.flush_dirty_embeddings), scheduled for
+when the oldest pending edit becomes quiet. At most one flush is scheduled at
+a time; the claim expires, so a lost job is replaced by the next push.
+
+A node popped by a flush that then fails keeps its `needsEmbedding` flag
+(store.py) and is picked up by the next backfill.
+"""
+
+import logging
+import os
+import time
+try:
+    from backend.services.queue_service import get_redis_connection
+except ImportError:
+    from services.queue_service import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+QUIET_SECONDS = float(os.getenv("EMBEDDING_QUIET_SECONDS", "10"))
+FLUSH_BATCH_SIZE = int(os.getenv("EMBEDDING_FLUSH_BATCH_SIZE", "200"))
+
+KEY = "emb:dirty:v1"
+SCHEDULED_KEY = f"{KEY}:scheduled"
+# How long a flush claim outlives its due time before another may be scheduled
+SCHEDULE_GRACE_S = 60
+
+# Pop up to ARGV[2] members last edited at or before ARGV[1], atomically, so
+# concurrent flushes never embed the same node twice
+_POP_QUIET = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #ids > 0 then
+    redis.call('ZREM', KEYS[1], unpack(ids))
+end
+return ids
+"""
+
+
+class DirtySet:
+    def __init__(self, quiet_seconds: float = QUIET_SECONDS):
+        self.quiet_seconds = quiet_seconds
+        self._pop_quiet = None
+
+    def mark(self, node_ids: list[str]) -> None:
+        """Record an edit of each node now, restarting its quiet period."""
+        if not node_ids:
+            return
+        now = time.time()
+        get_redis_connection().zadd(KEY, {node_id: now for node_id in node_ids})
+
+    def pop_quiet(self, limit: int = FLUSH_BATCH_SIZE) -> list[str]:
+        """Remove and return nodes that have been quiet long enough."""
+        conn = get_redis_connection()
+        if self._pop_quiet is None:
+            self._pop_quiet = conn.register_script(_POP_QUIET)
+        cutoff = time.time() - self.quiet_seconds
+        ids = self._pop_quiet(keys=[KEY], args=[cutoff, limit], client=conn)
+        return [i.decode() if isinstance(i, bytes) else i for i in ids]
+
+    def pop_all(self, limit: int = FLUSH_BATCH_SIZE) -> list[str]:
+        """Remove and return pending nodes regardless of their quiet period."""
+        conn = get_redis_connection()
+        return [member.decode() for member, _ in conn.zpopmin(KEY, limit)]
+
+    def next_due(self) -> float | None:
+        """Seconds until the oldest pending node becomes quiet; None if empty."""
+        oldest = get_redis_connection().zrange(KEY, 0, 0, withscores=True)
+        if not oldest:
+            return None
+        return max(0.0, oldest[0][1] + self.quiet_seconds - time.time())
+
+    def claim_flush(self, delay: float) -> bool:
+        """Claim the single scheduled flush slot; False if one is pending."""
+        ttl_ms = int((delay + SCHEDULE_GRACE_S) * 1000)
+        return bool(get_redis_connection().set(SCHEDULED_KEY, 1, nx=True, px=ttl_ms))
+
+    def release_flush(self) -> None:
+        get_redis_connection().delete(SCHEDULED_KEY)
+
+    def stats(self) -> dict:
+        """Pending nodes, shared by every API and worker process."""
+        conn = get_redis_connection()
+        pending = conn.zcard(KEY)
+        oldest = conn.zrange(KEY, 0, 0, withscores=True)
+        return {
+            "pending_nodes": pending,
+            "oldest_edit_age_s": round(time.time() - oldest[0][1], 1) if oldest else None,
+            "quiet_seconds": self.quiet_seconds,
+            "flush_scheduled": bool(conn.exists(SCHEDULED_KEY)),
+        }
+
+
+# Use as a singleton instance
+_dirty_set = None
+
+
+def get_dirty_set() -> DirtySet:
+    """Get the singleton dirty set instance."""
+    global _dirty_set
+    if _dirty_set is None:
+        _dirty_set = DirtySet()
+    return _dirty_set
@@ -0,0 +1,209 @@
+# backend/services/embeddings/pipeline.py
+
+"""
+Batched embedding pipeline for many nodes at once.
+
+Embedding N nodes one by one costs N Neo4j reads, N provider calls and N
+Neo4j writes. The pipeline does it in four stages instead:
+
+    read    one UNWIND read of every node's content, its contentHash and the
+            hashes of its stored chunks
+    filter  drop nodes whose content hash matches their stored embedding,
+            split the rest into chunks (chunking.py) and keep only chunks
+            whose hash is not already stored for the node
+    embed   send the remaining texts through the async embedding client
+            (client.py): concurrent batches bounded by
+            EMBEDDING_BATCH_MAX_TOKENS and EMBEDDING_BATCH_MAX_INPUTS
+    write   one UNWIND statement storing every node's chunks and clearing
+            their `needsEmbedding` flags
+
+Nodes with a chunk the provider could not embed are reported in `errors` and
+left as they were, so they are picked up again by the next run.
+
+Each stage's latency is reported in the result under `timings_ms`.
+"""
+
+import logging
+import time
+from typing import Any
+try:
+    from backend.services.embeddings.chunking import chunk_markdown
+    from backend.services.embeddings.service import get_embedding_service
+    from backend.services.embeddings.store import (
+        EMBEDDING_STATE_COLUMNS,
+        mark_embeddings_current,
+        write_embeddings,
+    )
+    from backend.services.embeddings.updates import get_embedding_update_service
+    from backend.services.llm.token_counter import TokenCounter
+    from backend.services.neo4j import query
+except ImportError:
+    from services.embeddings.chunking import chunk_markdown
+    from services.embeddings.service import get_embedding_service
+    from services.embeddings.store import (
+        EMBEDDING_STATE_COLUMNS,
+        mark_embeddings_current,
+        write_embeddings,
+    )
+    from services.embeddings.updates import get_embedding_update_service
+    from services.llm.token_counter import TokenCounter
+    from services.neo4j import query
+
+logger = logging.getLogger(__name__)
+
+READ_NODES_QUERY = """
+UNWIND $ids AS nid
+MATCH (n:Entity {id: nid})
+OPTIONAL MATCH (e:Embedding {model: $model})-[:EMBEDS]->(n)
+RETURN """ + EMBEDDING_STATE_COLUMNS
+
+
+def _new_results() -> dict[str, Any]:
+    return {
+        "processed": 0,
+        "updated": 0,
+        "skipped": 0,
+        "errors": [],
+        "embedded": [],
+        "batches": 0,
+        "chunks_embedded": 0,
+        "chunks_reused": 0,
+        "timings_ms": {},
+    }
+
+
+def embed_rows(
+    nodes: list[dict[str, Any]],
+    force: bool = False,
+    check: bool = True,
+    max_concurrency: int | None = None,
+) -> dict[str, Any]:
+    """
+    Filter, chunk, embed and write nodes already read with
+    EMBEDDING_STATE_COLUMNS. With `force`, every chunk is re-embedded; with
+    `check=False`, nodes are embedded even if their content hash is current,
+    still reusing the vectors of unchanged chunks. `max_concurrency` caps the
+    provider requests in flight, for callers that must leave quota to others.
+
+    Returns the usual task counters (processed, updated, skipped, errors),
+    the ids that got a new embedding, chunk counts and the latency of each
+    stage.
+    """
+    embedding_service = get_embedding_service()
+    update_service = get_embedding_update_service()
+    model = embedding_service.model_name
+    results = _new_results()
+    timings = results["timings_ms"]
+    results["processed"] = len(nodes)
+    if not nodes:
+        return results
+
+    started = time.perf_counter()
+    encoding = TokenCounter.get_encoding_for_model(model)
+    pending = []
+    to_embed = []
+    current = []
+    for node in nodes:
+        if check and not force and not update_service.needs_re_embedding(node):
+            results["skipped"] += 1
+            if node.get("needsEmbedding"):
+                # Flagged by an edit that left the content as it was
+                current.append(node)
+            continue
+        title = node["title"] or ""
+        markdown = node["markdown"] or ""
+        stored = set() if force else set(node.get("chunkHashes") or [])
+        chunks = chunk_markdown(title, markdown, encoding)
+        item = {
+            "id": node["id"],
+            "updatedAt": node.get("updatedAt"),
+            "contentHash": update_service.get_content_hash(title, markdown),
+            "chunks": chunks,
+            "failed": None,
+        }
+        pending.append(item)
+        new_hashes = set()
+        for chunk in chunks:
+            if chunk["hash"] in stored:
+                results["chunks_reused"] += 1
+            elif chunk["hash"] not in new_hashes:
+                new_hashes.add(chunk["hash"])
+                to_embed.append((item, chunk))
+    timings["filter"] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    result = embedding_service.embed_texts(
+        [chunk["text"] for _, chunk in to_embed],
+        token_counts=[chunk["tokens"] for _, chunk in to_embed],
+        max_concurrency=max_concurrency,
+    )
+    results["batches"] = result.batches
+    vectors: dict[tuple[str, str], list[float]] = {}
+    for index, ((item, chunk), vector) in enumerate(zip(to_embed, result.vectors)):
+        if vector is None:
+            item["failed"] = item["failed"] or result.errors.get(index)
+            continue
+        vectors[(item["id"], chunk["hash"])] = vector
+    results["chunks_embedded"] = len(vectors)
+
+    embedded = []
+    for item in pending:
+        if item["failed"]:
+            results["errors"].append(f"{item['id']}: {item['failed']}")
+            continue
+        for chunk in item["chunks"]:
+            chunk["vector"] = vectors.get((item["id"], chunk["hash"]))
+        embedded.append(item)
+    timings["embed"] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    if embedded:
+        written = write_embeddings(embedded, model, embedding_service.dimensions)
+        if written < len(embedded):
+            # Nodes deleted between the read and the write
+            results["errors"].append(
+                f"{len(embedded) - written} nodes were deleted before their embeddings were written"
+            )
+    if current:
+        mark_embeddings_current(current)
+    timings["write"] = (time.perf_counter() - started) * 1000
+
+    results["updated"] = len(embedded)
+    results["embedded"] = [item["id"] for item in embedded]
+    for stage, ms in timings.items():
+        timings[stage] = round(ms, 1)
+    return results
+
+
+def embed_nodes(node_ids: list[str], force: bool = False) -> dict[str, Any]:
+    """
+    Embed the given nodes through the batched pipeline.
+
+    Returns the counters of embed_rows(), with the read stage timed too and
+    ids that do not exist reported as errors.
+    """
+    embedding_service = get_embedding_service()
+    if not node_ids:
+        return _new_results()
+
+    started = time.perf_counter()
+    ids = list(dict.fromkeys(node_ids))
+    # Routed to the writer: the ids usually come from a push moments ago
+    nodes = query(READ_NODES_QUERY, ids=ids, model=embedding_service.model_name)
+    read_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    results = embed_rows(nodes, force=force)
+    found = {node["id"] for node in nodes}
+    results["errors"] = [
+        f"{node_id}: Node not found" for node_id in ids if node_id not in found
+    ] + results["errors"]
+    results["processed"] = len(ids)
+
+    results["timings_ms"] = {"read": read_ms, **results["timings_ms"]}
+    logger.info(
+        f"Embedding pipeline: {len(ids)} nodes, {results['updated']} written, "
+        f"{results['chunks_embedded']} chunks embedded in {results['batches']} "
+        f"batches, {results['chunks_reused']} reused; "
+        + ", ".join(f"{stage} {ms} ms" for stage, ms in results["timings_ms"].items())
+    )
+    return results
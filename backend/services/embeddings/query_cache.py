@@ -0,0 +1,201 @@
+# backend/services/embeddings/query_cache.py
+
+"""
+Cache of search-query embeddings.
+
+Every vector search needs an embedding of the query text, and the same
+queries repeat constantly: search-as-you-type refinements, the same search
+from several tabs, several users searching for a common term. Queries are
+normalised on whitespace and case and cached in two tiers:
+
+    local  bounded in-process LRU with a TTL
+    redis  shared by every API worker, expires after the same TTL
+
+Concurrent requests for the same query share one embedding call: within a
+process they await the same task, and across workers a short Redis lock lets
+one worker embed while the others wait for its result.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+try:
+    from backend.services.embeddings.cache import decode_vector, encode_vector
+    from backend.services.embeddings.client import EmbeddingError
+    from backend.services.embeddings.service import get_embedding_service
+    from backend.services.queue_service import get_async_redis_connection
+except ImportError:
+    from services.embeddings.cache import decode_vector, encode_vector
+    from services.embeddings.client import EmbeddingError
+    from services.embeddings.service import get_embedding_service
+    from services.queue_service import get_async_redis_connection
+
+logger = logging.getLogger(__name__)
+
+MAX_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+TTL_SECONDS = int(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "3600"))
+
+KEY_PREFIX = "emb:query:v1"
+# How long another worker may hold the embedding lock, and how long to wait
+# for its result before embedding anyway
+LOCK_MS = 5000
+LOCK_WAIT_S = 2.0
+LOCK_POLL_S = 0.05
+
+# Delete the lock only if ARGV[1] still holds it, so a worker whose lock
+# expired cannot release one another worker took since
+_RELEASE_LOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class QueryEmbeddingCache:
+    def __init__(self, max_size: int = MAX_SIZE, ttl: int = TTL_SECONDS):
+        self.embedding_service = get_embedding_service()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._local: OrderedDict[str, tuple[float, list[float]]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.counters = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "coalesced": 0,
+            "misses": 0,
+            "errors": 0,
+        }
+
+    def key(self, normalized: str) -> str:
+        digest = hashlib.sha256(normalized.encode()).hexdigest()
+        return f"{KEY_PREFIX}:{self.embedding_service.model_name}:{digest}"
+
+    def _local_get(self, key: str) -> list[float] | None:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires, vector = entry
+        if expires < time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return vector
+
+    def _local_put(self, key: str, vector: list[float]) -> None:
+        self._local[key] = (time.monotonic() + self.ttl, vector)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    async def embed(self, text: str) -> list[float]:
+        """The embedding of a search query, from cache when possible."""
+        normalized = normalize_query(text)
+        if not normalized:
+            return []
+        key = self.key(normalized)
+
+        vector = self._local_get(key)
+        if vector is not None:
+            self.counters["local_hits"] += 1
+            return vector
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.counters["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(self._load(key, normalized))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller disconnecting does not cancel the others
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, normalized: str) -> list[float]:
+        redis = None
+        locked = False
+        token = uuid.uuid4().hex
+        try:
+            redis = get_async_redis_connection()
+            blob = await redis.get(key)
+            if blob is None:
+                locked = bool(
+                    await redis.set(f"{key}:lock", token, nx=True, px=LOCK_MS)
+                )
+                if not locked:
+                    blob = await self._wait_for(redis, key)
+            if blob is not None:
+                vector = decode_vector(blob)
+                self.counters["redis_hits"] += 1
+                self._local_put(key, vector)
+                return vector
+        except Exception as e:
+            logger.warning(f"Query embedding cache read failed: {e}")
+
+        self.counters["misses"] += 1
+        try:
+            try:
+                vector = await self.embedding_service.agenerate_embedding(normalized)
+            except EmbeddingError:
+                self.counters["errors"] += 1
+                raise
+            self._local_put(key, vector)
+            if redis is not None:
+                try:
+                    await redis.set(key, encode_vector(vector), ex=self.ttl)
+                except Exception as e:
+                    logger.warning(f"Query embedding cache write failed: {e}")
+            return vector
+        finally:
+            if locked:
+                try:
+                    release = redis.register_script(_RELEASE_LOCK)
+                    await release(keys=[f"{key}:lock"], args=[token])
+                except Exception:
+                    pass
+
+    async def _wait_for(self, redis, key: str) -> bytes | None:
+        """Poll for the result of another worker's in-flight embedding."""
+        deadline = time.monotonic() + LOCK_WAIT_S
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_S)
+            blob = await redis.get(key)
+            if blob is not None:
+                return blob
+            if not await redis.exists(f"{key}:lock"):
+                return await redis.get(key)
+        return None
+
+    def stats(self) -> dict:
+        """Counters for this process."""
+        lookups = sum(
+            self.counters[name]
+            for name in ("local_hits", "redis_hits", "coalesced", "misses")
+        )
+        hits = lookups - self.counters["misses"]
+        return {
+            **self.counters,
+            "local_entries": len(self._local),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+        }
+
+
+# Use as a singleton instance
+_query_embedding_cache = None
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Get the singleton query embedding cache instance."""
+    global _query_embedding_cache
+    if _query_embedding_cache is None:
+        _query_embedding_cache = QueryEmbeddingCache()
+    return _query_embedding_cache
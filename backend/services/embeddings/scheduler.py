@@ -0,0 +1,353 @@
+# backend/services/embeddings/scheduler.py
+
+"""
+Priority-aware scheduling of embedding jobs on the RQ worker.
+
+Every embedding job goes through this module and into one of three priority
+classes. Each class has its own queue, and worker.py listens to them in
+order:
+
+    interactive  nodes a user just edited (the dirty-set flush) and manual
+                 "embed pending now" requests; seconds matter, since the
+                 user's next search should find the note
+    maintenance  bounded admin sweeps such as "embed up to N missing nodes"
+    backfill     campaign-wide or global (re-)embedding, which can take
+                 minutes to hours
+
+A backfill never runs as a single job, and its progress is checkpointed in
+Redis (backfill.py). Each job embeds one slice of at most
+EMBEDDING_BACKFILL_SLICE_BATCHES pipeline batches and stops early as soon as
+interactive or maintenance work is waiting. It then enqueues the rest of the
+walk at the back of the backfill queue. An interactive job therefore waits at
+most one pipeline batch, and backfills of several campaigns take turns slice
+by slice, however large any of them is.
+
+Jobs are deduplicated:
+
+    node jobs      a per-node key, per class and mode, is held from enqueue
+                   until the job starts. A node that is already waiting in
+                   a queued job is not queued again.
+    backfill       one chain per campaign, owned by the id of its queued
+                   job. Asking again while it runs returns that job; a stale
+                   job of a superseded chain exits when it starts.
+
+The queue wait (enqueue to start) and processing time of every job are
+recorded per class in Redis and reported by stats().
+"""
+
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+from rq import get_current_job
+try:
+    from backend.services.embeddings.backfill import (
+        DONE,
+        RUNNING,
+        get_backfill_checkpoints,
+    )
+    from backend.services.queue_service import get_redis_connection, get_task_queue
+except ImportError:
+    from services.embeddings.backfill import (
+        DONE,
+        RUNNING,
+        get_backfill_checkpoints,
+    )
+    from services.queue_service import get_redis_connection, get_task_queue
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+MAINTENANCE = "maintenance"
+BACKFILL = "backfill"
+
+# Highest priority first
+PRIORITIES = [INTERACTIVE, MAINTENANCE, BACKFILL]
+QUEUES = {priority: f"embeddings_{priority}" for priority in PRIORITIES}
+
+# Pipeline batches per backfill job before the walk yields to the queue
+BACKFILL_SLICE_BATCHES = int(os.getenv("EMBEDDING_BACKFILL_SLICE_BATCHES", "5"))
+
+KEY_PREFIX = "emb:sched:v1"
+# Dedup keys outlive a lost job by this long at most
+NODE_KEY_TTL_S = 3600
+BACKFILL_KEY_TTL_S = 3600
+# Latency samples kept per class for percentiles
+LATENCY_SAMPLES = 500
+
+# Refresh the chain's key if `job_id` owns it, or take it if it expired
+_OWN_BACKFILL = """
+local owner = redis.call('GET', KEYS[1])
+if owner == ARGV[1] or not owner then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+
+def _node_key(priority: str, force: bool, node_id: str) -> str:
+    mode = "force" if force else "check"
+    return f"{KEY_PREFIX}:node:{priority}:{mode}:{node_id}"
+
+
+def _backfill_key(campaign_id: str | None) -> str:
+    return f"{KEY_PREFIX}:backfill:{campaign_id or 'global'}"
+
+
+def _latency_key(priority: str) -> str:
+    return f"{KEY_PREFIX}:latency:{priority}"
+
+
+def get_queue(priority: str):
+    """The RQ queue of a priority class."""
+    return get_task_queue(QUEUES[priority])
+
+
+def run_job(
+    priority: str,
+    func: Callable[..., Any],
+    args: tuple = (),
+    kwargs: dict[str, Any] | None = None,
+    release: list[str] | None = None,
+) -> Any:
+    """
+    RQ entry point of every scheduled job: releases the job's dedup keys,
+    runs it and records its queue wait and processing time.
+    """
+    started = time.time()
+    wait_s = None
+    job = get_current_job()
+    if job is not None and job.enqueued_at is not None:
+        enqueued = job.enqueued_at
+        if enqueued.tzinfo is None:
+            enqueued = enqueued.replace(tzinfo=timezone.utc)
+        wait_s = max(0.0, (datetime.now(timezone.utc) - enqueued).total_seconds())
+    if release:
+        # Released before running, so an edit made during the job queues again
+        get_redis_connection().delete(*release)
+    try:
+        return func(*args, **(kwargs or {}))
+    finally:
+        _record(priority, wait_s, time.time() - started)
+
+
+def _record(priority: str, wait_s: float | None, run_s: float) -> None:
+    try:
+        key = _latency_key(priority)
+        pipe = get_redis_connection().pipeline()
+        pipe.lpush(key, f"{-1 if wait_s is None else round(wait_s, 3)}:{round(run_s, 3)}")
+        pipe.ltrim(key, 0, LATENCY_SAMPLES - 1)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record embedding job latency: {e}")
+
+
+def submit(
+    priority: str,
+    func: Callable[..., Any],
+    *args: Any,
+    job_timeout: str = "10m",
+    delay: float | None = None,
+    job_id: str | None = None,
+    release: list[str] | None = None,
+    **kwargs: Any,
+):
+    """
+    Enqueue `func(*args, **kwargs)` in a priority class, after `delay`
+    seconds if given. Returns the RQ job.
+    """
+    queue = get_queue(priority)
+    options = {
+        "args": (priority, func, args, kwargs, release),
+        "job_timeout": job_timeout,
+        "job_id": job_id,
+        "description": f"{priority}: {func.__name__}",
+    }
+    if delay is not None:
+        return queue.enqueue_in(timedelta(seconds=delay), run_job, **options)
+    return queue.enqueue(run_job, **options)
+
+
+def submit_nodes(
+    node_ids: list[str], priority: str = INTERACTIVE, force: bool = False
+) -> dict[str, Any]:
+    """
+    Enqueue embedding of the given nodes, leaving out nodes already waiting in
+    a queued job of the same class and mode.
+
+    Returns the job id (None if every node was already queued) and the number
+    of nodes queued and deduplicated.
+    """
+    try:
+        from backend.services.embeddings.tasks import process_nodes_batch_embedding
+    except ImportError:
+        from services.embeddings.tasks import process_nodes_batch_embedding
+
+    node_ids = list(dict.fromkeys(node_ids))
+    job_id = uuid.uuid4().hex
+    conn = get_redis_connection()
+    pipe = conn.pipeline()
+    for node_id in node_ids:
+        pipe.set(_node_key(priority, force, node_id), job_id, nx=True, ex=NODE_KEY_TTL_S)
+    claimed = [node_id for node_id, ok in zip(node_ids, pipe.execute()) if ok]
+    result = {"job_id": None, "queued": len(claimed), "deduplicated": len(node_ids) - len(claimed)}
+    if not claimed:
+        return result
+
+    keys = [_node_key(priority, force, node_id) for node_id in claimed]
+    try:
+        submit(
+            priority, process_nodes_batch_embedding, claimed,
+            force=force, job_id=job_id, release=keys,
+        )
+    except Exception:
+        conn.delete(*keys)
+        raise
+    result["job_id"] = job_id
+    return result
+
+
+def submit_backfill(
+    campaign_id: str | None = None, force: bool = False, restart: bool = False
+) -> dict[str, Any]:
+    """
+    Start a preemptible backfill of a campaign, or of every node with None
+    or "global", unless one is already running for it.
+
+    An unfinished backfill of the same mode resumes from its checkpoint;
+    `restart` walks from the beginning instead.
+
+    Returns the id of the job queued for the walk, whether it was already
+    running, and the checkpoint.
+    """
+    if campaign_id == "global":
+        campaign_id = None
+    conn = get_redis_connection()
+    checkpoints = get_backfill_checkpoints()
+    key = _backfill_key(campaign_id)
+    job_id = uuid.uuid4().hex
+    if not conn.set(key, job_id, nx=True, ex=BACKFILL_KEY_TTL_S):
+        existing = conn.get(key)
+        return {
+            "job_id": existing.decode() if existing else None,
+            "deduplicated": True,
+            "checkpoint": checkpoints.get(campaign_id),
+        }
+    try:
+        checkpoint = checkpoints.begin(campaign_id, force, restart=restart)
+        _submit_slice(campaign_id, job_id)
+    except Exception:
+        conn.delete(key)
+        raise
+    return {"job_id": job_id, "deduplicated": False, "checkpoint": checkpoint}
+
+
+def resume_backfill(campaign_id: str | None) -> dict[str, Any] | None:
+    """
+    Resume a paused or failed backfill from its checkpoint, in the mode it
+    was started with. None if there is no unfinished backfill to resume.
+    """
+    if campaign_id == "global":
+        campaign_id = None
+    checkpoints = get_backfill_checkpoints()
+    checkpoint = checkpoints.get(campaign_id)
+    if checkpoint is None or checkpoint["status"] == DONE:
+        return None
+    # A slice still queued from before the pause carries on with the walk
+    checkpoints.save(campaign_id, status=RUNNING)
+    return submit_backfill(campaign_id, force=checkpoint["force"])
+
+
+def _submit_slice(campaign_id: str | None, job_id: str, delay: float | None = None) -> None:
+    try:
+        from backend.services.embeddings.tasks import backfill_embeddings
+    except ImportError:
+        from services.embeddings.tasks import backfill_embeddings
+
+    submit(
+        BACKFILL, backfill_embeddings, campaign_id,
+        job_timeout="15m", job_id=job_id, delay=delay,
+    )
+
+
+def continue_backfill(campaign_id: str | None, delay: float | None = None) -> str:
+    """
+    Enqueue the next slice of a running backfill at the back of the backfill
+    queue, after whatever other campaigns queued meanwhile, or `delay`
+    seconds from now. Returns its job id.
+    """
+    job_id = uuid.uuid4().hex
+    get_redis_connection().set(_backfill_key(campaign_id), job_id, ex=BACKFILL_KEY_TTL_S)
+    _submit_slice(campaign_id, job_id, delay=delay)
+    return job_id
+
+
+def owns_backfill(campaign_id: str | None, job_id: str) -> bool:
+    """
+    Whether the job is the current slice of the campaign's backfill. Keeps
+    the chain's key alive while it is.
+    """
+    conn = get_redis_connection()
+    owner = conn.register_script(_OWN_BACKFILL)
+    return bool(
+        owner(keys=[_backfill_key(campaign_id)], args=[job_id, BACKFILL_KEY_TTL_S], client=conn)
+    )
+
+
+def finish_backfill(campaign_id: str | None) -> None:
+    """Release a campaign's backfill chain once its walk stops."""
+    get_redis_connection().delete(_backfill_key(campaign_id))
+
+
+def should_yield(priority: str = BACKFILL) -> bool:
+    """Whether work of a higher class than `priority` is waiting."""
+    higher = PRIORITIES[:PRIORITIES.index(priority)]
+    try:
+        return any(len(get_queue(p)) for p in higher)
+    except Exception as e:
+        logger.warning(f"Failed to check embedding queues: {e}")
+        return False
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 3)
+
+
+def stats() -> dict[str, Any]:
+    """Queue depth and recent queue-wait and processing latency per class."""
+    conn = get_redis_connection()
+    classes = {}
+    for priority in PRIORITIES:
+        queue = get_queue(priority)
+        waits, runs = [], []
+        for sample in conn.lrange(_latency_key(priority), 0, -1):
+            wait_s, run_s = (float(v) for v in sample.decode().split(":"))
+            if wait_s >= 0:
+                waits.append(wait_s)
+            runs.append(run_s)
+        classes[priority] = {
+            "queue": queue.name,
+            "queued": len(queue),
+            "scheduled": queue.scheduled_job_registry.count,
+            "running": queue.started_job_registry.count,
+            "failed": queue.failed_job_registry.count,
+            "samples": len(runs),
+            "wait_s": {"p50": _percentile(waits, 0.5), "p95": _percentile(waits, 0.95)},
+            "processing_s": {"p50": _percentile(runs, 0.5), "p95": _percentile(runs, 0.95)},
+        }
+    backfills = [
+        key.decode().rsplit(":", 1)[-1]
+        for key in conn.scan_iter(f"{KEY_PREFIX}:backfill:*")
+    ]
+    return {
+        "classes": classes,
+        "active_backfills": backfills,
+        "backfill_slots_in_use": get_backfill_checkpoints().slots_in_use(),
+        "backfill_slice_batches": BACKFILL_SLICE_BATCHES,
+    }
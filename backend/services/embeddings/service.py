@@ -1,8 +1,16 @@
+import asyncio
 import os
 import numpy as np
 from typing import List
-from openai import OpenAI
 from backend.models.components import MarkdownNodeBase
+from backend.services.embeddings.cache import get_embedding_cache, normalize_text
+from backend.services.embeddings.client import (
+    AsyncEmbeddingClient,
+    EmbeddedTexts,
+    EmbeddingError,
+    OpenAIEmbeddingProvider,
+    SentenceTransformerProvider,
+)
 
 
 class EmbeddingService:
@@ -17,14 +25,7 @@ class EmbeddingService:
                 - all-MiniLM-L6-v2: 384 dimensions (sentence transformers fallback)
         """
         self.model_name = model_name
-        
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY environment variable not set")
-        
-        self.client = OpenAI(api_key=api_key)
-        
+
         # Set dimensions based on model
         model_dimensions = {
             "text-embedding-3-small": 1536,
@@ -35,69 +36,133 @@ class EmbeddingService:
             "all-mpnet-base-v2": 768,
             "all-MiniLM-L12-v2": 384,
         }
-        
+
         self.dimensions: int = model_dimensions.get(model_name, 1536)
-        
+
         # Determine if we're using OpenAI or sentence transformers
         self.use_openai = model_name.startswith(("text-embedding", "ada"))
-        
-        if not self.use_openai:
+
+        if self.use_openai:
+            provider = OpenAIEmbeddingProvider(model_name)
+        else:
             # Fallback to sentence transformers for local models
+            provider = SentenceTransformerProvider(model_name)
+            if provider.dimensions:
+                self.dimensions = provider.dimensions
+
+        self.client = AsyncEmbeddingClient(provider)
+
+        # Identical texts share one vector across nodes, users and restarts
+        self.cache = get_embedding_cache()
+
+    async def aembed_texts(
+        self,
+        texts: list[str],
+        token_counts: list[int] | None = None,
+        max_concurrency: int | None = None,
+    ) -> EmbeddedTexts:
+        """
+        Embed many texts, from the cache where possible.
+
+        Texts that could not be embedded have no vector and an entry in
+        `errors`; nothing is ever replaced by a zero vector. `max_concurrency`
+        caps the provider requests of this call in flight.
+        """
+        # The provider rejects empty input; all empty texts share one vector
+        processed = [
+            normalize_text(text) if text and text.strip() else " " for text in texts
+        ]
+        result = EmbeddedTexts(vectors=[None] * len(processed))
+        if not processed:
+            return result
+
+        # The cache talks to Redis synchronously; keep it off the event loop
+        cached = await asyncio.to_thread(
+            self.cache.get_many, self.model_name, self.dimensions, processed
+        )
+
+        # Only texts missing from the cache go to the provider, each once
+        positions: dict[str, list[int]] = {}
+        for i, text in enumerate(processed):
+            if text not in cached:
+                positions.setdefault(text, []).append(i)
+        if positions:
+            missing = list(positions)
+            generated = await self.client.embed(
+                missing,
+                token_counts=(
+                    [token_counts[positions[text][0]] for text in missing]
+                    if token_counts
+                    else None
+                ),
+                max_concurrency=max_concurrency,
+            )
+            result.batches = generated.batches
+            fresh = {}
+            for j, text in enumerate(missing):
+                if generated.vectors[j] is None:
+                    for i in positions[text]:
+                        result.errors[i] = generated.errors.get(j, "Embedding failed")
+                else:
+                    fresh[text] = generated.vectors[j]
+            await asyncio.to_thread(
+                self.cache.put_many, self.model_name, self.dimensions, fresh
+            )
+            cached.update(fresh)
+
+        for i, text in enumerate(processed):
+            result.vectors[i] = cached.get(text)
+        return result
+
+    def embed_texts(
+        self,
+        texts: list[str],
+        token_counts: list[int] | None = None,
+        max_concurrency: int | None = None,
+    ) -> EmbeddedTexts:
+        """Blocking aembed_texts() for workers and scripts (no running loop)."""
+        return self._run(self.aembed_texts(texts, token_counts, max_concurrency))
+
+    def _run(self, coro):
+        """Run a coroutine in a loop of its own, closing the clients it opened."""
+
+        async def run():
             try:
-                from sentence_transformers import SentenceTransformer
-                self.model = SentenceTransformer(model_name)
-                actual_dims = self.model.get_sentence_embedding_dimension()
-                if actual_dims:
-                    self.dimensions = actual_dims
-            except Exception as e:
-                raise RuntimeError(f"Failed to load embedding model: {model_name}") from e
+                return await coro
+            finally:
+                await self.client.aclose()
+
+        return asyncio.run(run())
+
+    async def aclose(self) -> None:
+        """Close the clients of the running loop, e.g. at API shutdown."""
+        await self.client.aclose()
+
+    async def agenerate_embedding(self, text: str) -> list[float]:
+        """Embed one text. Raises EmbeddingError if it cannot be embedded."""
+        result = await self.aembed_texts([text])
+        if result.errors:
+            raise EmbeddingError(result.errors[0])
+        return result.vectors[0]
 
     def generate_embedding(self, text: str) -> list[float]:
-        """Generate embedding for a single text."""
-
-        if not text or not text.strip():
-            return [0.0] * self.dimensions
-
-        try:
-            if self.use_openai:
-                response = self.client.embeddings.create(
-                    input=text,
-                    model=self.model_name
-                )
-                return response.data[0].embedding
-            else:
-                # Fallback to sentence transformers
-                embedding = self.model.encode(text, convert_to_tensor=False)
-                return embedding.tolist()
-        except Exception as e:
-            print(f"Error generating embedding for text: {e}")
-            # Return zero vector on error
-            return [0.0] * self.dimensions
+        """Generate embedding for a single text. Raises EmbeddingError on failure."""
+        return self._run(self.agenerate_embedding(text))
 
     def generate_embeddings_batch(self, texts: list[str]) -> list[list[float]]:
-        """Generate embeddings for multiple texts efficiently."""
-
-        if not texts:
-            return []
-
-        processed_texts = [text if text and text.strip() else " " for text in texts]
-        
-        try:
-            if self.use_openai:
-                # OpenAI supports batch embedding requests
-                response = self.client.embeddings.create(
-                    input=processed_texts,
-                    model=self.model_name
-                )
-                return [data.embedding for data in response.data]
-            else:
-                # Fallback to sentence transformers
-                embeddings = self.model.encode(processed_texts, convert_to_tensor=False)
-                return embeddings.tolist()
-        except Exception as e:
-            print(f"Error generating batch embeddings: {e}")
-            # Return zero vectors for all texts
-            return [[0.0] * self.dimensions for _ in processed_texts]
+        """
+        Generate embeddings for multiple texts efficiently.
+
+        Raises EmbeddingError if any text fails; use embed_texts() to get
+        per-text failures instead.
+        """
+        result = self.embed_texts(texts)
+        if result.errors:
+            raise EmbeddingError(
+                f"{len(result.errors)} of {len(texts)} texts could not be embedded: "
+                f"{next(iter(result.errors.values()))}"
+            )
+        return result.vectors
 
     def embed_node(self, node: MarkdownNodeBase) -> MarkdownNodeBase:
         """Add embedding to a node."""
@@ -133,3 +198,9 @@ def get_embedding_service() -> EmbeddingService:
         model_name = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
         _embedding_service = EmbeddingService(model_name)
     return _embedding_service
+
+
+async def aclose_embedding_service() -> None:
+    """Close the singleton's clients of the running loop, if it was created."""
+    if _embedding_service is not None:
+        await _embedding_service.aclose()
@@ -0,0 +1,241 @@
+# backend/services/embeddings/store.py
+
+"""
+Storage layout for embedding vectors.
+
+Vectors live on their own nodes rather than as a property of the
+Note/NPC/Location node they describe, so graph traversals, sync reads and
+deletes of content nodes never page ~6-12 KB of floats in:
+
+    (:Embedding {nodeId, model, dims, contentHash, chunks, embeddedAt})
+        -[:EMBEDS]->(content)
+    (:Chunk {nodeId, model, hash, idx, heading, vector, embeddedAt})
+        -[:CHUNK_OF]->(content)
+
+The :Embedding node records that a node is embedded and the hash of the
+content it was embedded from. The vectors are on its :Chunk nodes, one per
+chunk of the content (chunking.py), and a single vector index on :Chunk serves
+every content type. Chunks are keyed by the hash of their text, so an edit
+keeps the vectors of every chunk it did not change.
+
+`nodeId` duplicates the content node's id so that (nodeId, model) and
+(nodeId, model, hash) can be uniqueness constraints: they keep concurrent
+writers from duplicating vectors and give the write path an index to MERGE on.
+
+Embeddings written before chunking hold a single `vector` on the :Embedding
+node and no `chunks` count; they stay searchable until they are re-embedded.
+
+Content nodes carry a `needsEmbedding` flag, backed by a range index. The sync
+push sets it when a title or markdown changes and the embedding write clears
+it, so finding the work for a backfill is an index lookup that returns ids,
+not a scan that reads every node's content.
+"""
+
+from typing import Any, Iterable
+try:
+    from backend.services.neo4j import query, read_query
+except ImportError:
+    from services.neo4j import query, read_query
+
+EMBEDDING_LABEL = "Embedding"
+EMBEDDING_INDEX = "embeddingVectors"
+CHUNK_LABEL = "Chunk"
+CHUNK_INDEX = "chunkVectors"
+
+# Content labels that get embedded and searched
+EMBEDDABLE_LABELS = ["Campaign", "Session", "NPC", "Character", "Location", "Note"]
+
+NEEDS_EMBEDDING_INDEX = "entity_needs_embedding"
+
+
+def embeddable_predicate(var: str = "n") -> str:
+    """Cypher predicate for "`var` is embeddable content"."""
+    return "(" + " OR ".join(f"{var}:{label}" for label in EMBEDDABLE_LABELS) + ")"
+
+
+# Cypher predicate for "n is embeddable content"
+EMBEDDABLE_PREDICATE = embeddable_predicate("n")
+
+# Columns describing a node's content and its current embedding; `n` is the
+# content node and `e` its optional :Embedding for $model
+EMBEDDING_STATE_COLUMNS = """n.id AS id,
+       n.title AS title,
+       n.markdown AS markdown,
+       e IS NOT NULL AS hasEmbedding,
+       e.contentHash AS contentHash,
+       e.chunks AS chunks,
+       [(c:Chunk {model: $model})-[:CHUNK_OF]->(n) | c.hash] AS chunkHashes,
+       n.updatedAt AS updatedAt,
+       n.needsEmbedding AS needsEmbedding"""
+
+# The flag is only cleared if the node is unchanged since it was read; an edit
+# in between keeps it set for the next run
+_CLEAR_NEEDS_EMBEDDING = """
+SET n.needsEmbedding = CASE
+    WHEN coalesce(n.updatedAt, 0) = coalesce(row.updatedAt, 0) THEN false
+    ELSE n.needsEmbedding
+END"""
+
+# One MERGE per row on the (nodeId, model) constraint. Chunks no longer in the
+# content, and anything from another model, are removed; chunks whose hash is
+# unchanged are sent without a vector and keep the one they have.
+WRITE_EMBEDDINGS_QUERY = """
+UNWIND $rows AS row
+MATCH (n:Entity {id: row.id})""" + _CLEAR_NEEDS_EMBEDDING + """
+MERGE (e:Embedding {nodeId: row.id, model: $model})
+SET e.dims = $dims,
+    e.contentHash = row.contentHash,
+    e.chunks = size(row.chunks),
+    e.embeddedAt = timestamp()
+REMOVE e.vector
+MERGE (e)-[:EMBEDS]->(n)
+WITH n, e, row
+CALL {
+    WITH n, e
+    MATCH (other:Embedding)-[:EMBEDS]->(n)
+    WHERE other <> e
+    DETACH DELETE other
+}
+CALL {
+    WITH n, row
+    MATCH (old:Chunk)-[:CHUNK_OF]->(n)
+    WHERE old.model <> $model OR NOT old.hash IN [c IN row.chunks | c.hash]
+    DETACH DELETE old
+}
+CALL {
+    WITH n, row
+    UNWIND row.chunks AS chunk
+    MERGE (c:Chunk {nodeId: row.id, model: $model, hash: chunk.hash})
+    SET c.idx = chunk.idx,
+        c.heading = chunk.heading
+    FOREACH (_ IN CASE WHEN chunk.vector IS NULL THEN [] ELSE [1] END |
+        SET c.vector = chunk.vector,
+            c.embeddedAt = timestamp()
+    )
+    MERGE (c)-[:CHUNK_OF]->(n)
+}
+RETURN count(n) AS written
+"""
+
+
+def _chunk_row(chunk: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "hash": chunk["hash"],
+        "idx": chunk["idx"],
+        "heading": chunk.get("heading"),
+        "vector": chunk.get("vector"),
+    }
+
+
+def write_embeddings(
+    embeddings: Iterable[dict[str, Any]], model: str, dims: int
+) -> int:
+    """
+    Store the chunk vectors of many nodes in one statement.
+
+    Each item is `{"id", "contentHash", "updatedAt", "chunks"}`, where
+    `updatedAt` is the node's as read, and every chunk has
+    `hash`, `idx`, `heading` and, unless its hash is already stored for the
+    node, `vector`. Returns the number of content nodes written; ids that no
+    longer exist are skipped.
+    """
+    rows = [
+        {
+            "id": e["id"],
+            "contentHash": e.get("contentHash"),
+            "updatedAt": e.get("updatedAt"),
+            "chunks": [_chunk_row(chunk) for chunk in e["chunks"]],
+        }
+        for e in embeddings
+    ]
+    if not rows:
+        return 0
+    result = query(WRITE_EMBEDDINGS_QUERY, rows=rows, model=model, dims=dims)
+    return result[0]["written"] if result else 0
+
+
+MARK_CURRENT_QUERY = """
+UNWIND $rows AS row
+MATCH (n:Entity {id: row.id})""" + _CLEAR_NEEDS_EMBEDDING + """
+RETURN count(n) AS cleared
+"""
+
+
+def mark_embeddings_current(nodes: Iterable[dict[str, Any]]) -> int:
+    """Clear `needsEmbedding` on nodes whose stored embedding was found current."""
+    rows = [{"id": n["id"], "updatedAt": n.get("updatedAt")} for n in nodes]
+    if not rows:
+        return 0
+    result = query(MARK_CURRENT_QUERY, rows=rows)
+    return result[0]["cleared"] if result else 0
+
+
+# Index seek on the flag; the campaign filter only runs on flagged nodes
+NEEDS_EMBEDDING_QUERY = """
+MATCH (n:Entity)
+WHERE n.needsEmbedding = true
+AND ($campaign_id IS NULL OR EXISTS { (n)-[:PART_OF]->(:Campaign {id: $campaign_id}) })
+RETURN n.id AS id
+ORDER BY coalesce(n.updatedAt, n.createdAt) DESC
+"""
+
+
+def find_needing_embedding(
+    campaign_id: str | None = None, limit: int | None = None
+) -> list[str]:
+    """Ids of content flagged for embedding, most recently updated first."""
+    cypher = NEEDS_EMBEDDING_QUERY
+    if limit is not None:
+        cypher += "LIMIT $limit"
+    rows = query(cypher, campaign_id=campaign_id, limit=limit)
+    return [row["id"] for row in rows]
+
+
+def _backfill_scope(flagged_only: bool) -> str:
+    """Cypher filter on `n` for the nodes a backfill walks."""
+    if flagged_only:
+        scope = "n.needsEmbedding = true"
+    else:
+        scope = f"{EMBEDDABLE_PREDICATE} AND n.title IS NOT NULL"
+    return f"""{scope}
+    AND ($campaign_id IS NULL OR EXISTS {{ (n)-[:PART_OF]->(:Campaign {{id: $campaign_id}}) }})"""
+
+
+def read_backfill_page(
+    model: str,
+    campaign_id: str | None = None,
+    after: str | None = None,
+    limit: int = 100,
+    flagged_only: bool = True,
+) -> list[dict[str, Any]]:
+    """
+    The next page of a backfill walk: content nodes with an id after `after`,
+    in id order, read with EMBEDDING_STATE_COLUMNS.
+
+    With `flagged_only`, only nodes flagged for embedding (an index seek);
+    otherwise every embeddable node, for forced re-embedding. Walking by id
+    moves past nodes that failed to embed instead of returning to them.
+    """
+    cypher = f"""
+    MATCH (n:Entity)
+    WHERE {_backfill_scope(flagged_only)}
+    AND ($after IS NULL OR n.id > $after)
+    WITH n ORDER BY n.id LIMIT $limit
+    OPTIONAL MATCH (e:Embedding {{model: $model}})-[:EMBEDS]->(n)
+    RETURN {EMBEDDING_STATE_COLUMNS}
+    ORDER BY id
+    """
+    return read_query(
+        cypher, model=model, campaign_id=campaign_id, after=after, limit=limit
+    )
+
+
+def count_backfill(campaign_id: str | None = None, flagged_only: bool = True) -> int:
+    """How many nodes a backfill walk from the start would read."""
+    cypher = f"""
+    MATCH (n:Entity)
+    WHERE {_backfill_scope(flagged_only)}
+    RETURN count(n) AS total
+    """
+    result = read_query(cypher, campaign_id=campaign_id)
+    return result[0]["total"] if result else 0
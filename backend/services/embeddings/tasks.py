@@ -2,21 +2,78 @@
 
 """
 Background tasks for embedding generation using Redis Queue.
+
+Tasks are enqueued through the scheduler (scheduler.py), which picks their
+priority class and queue.
 """
 
 import os
 import logging
+import time
 from typing import List, Dict, Any, Optional
+from rq import get_current_job
 try:
-    from backend.services.embeddings.updates import get_embedding_update_service
+    from backend.services.embeddings import scheduler
+    from backend.services.embeddings.backfill import (
+        DONE,
+        FAILED,
+        MAX_REQUESTS as BACKFILL_MAX_REQUESTS,
+        RUNNING,
+        SLOT_RETRY_S as BACKFILL_SLOT_RETRY_S,
+        get_backfill_checkpoints,
+    )
+    from backend.services.embeddings.dirty import get_dirty_set
+    from backend.services.embeddings.pipeline import embed_nodes, embed_rows
+    from backend.services.embeddings.service import get_embedding_service
+    from backend.services.embeddings.updates import EMBED_BATCH_SIZE, get_embedding_update_service
     from backend.services.neo4j import query
+    from backend.services.sync.events import publish
+    from backend.services.embeddings.store import count_backfill, find_needing_embedding, read_backfill_page
 except ImportError:
-    from services.embeddings.updates import get_embedding_update_service
+    from services.embeddings import scheduler
+    from services.embeddings.backfill import (
+        DONE,
+        FAILED,
+        MAX_REQUESTS as BACKFILL_MAX_REQUESTS,
+        RUNNING,
+        SLOT_RETRY_S as BACKFILL_SLOT_RETRY_S,
+        get_backfill_checkpoints,
+    )
+    from services.embeddings.dirty import get_dirty_set
+    from services.embeddings.pipeline import embed_nodes, embed_rows
+    from services.embeddings.service import get_embedding_service
+    from services.embeddings.updates import EMBED_BATCH_SIZE, get_embedding_update_service
     from services.neo4j import query
+    from services.sync.events import publish
+    from services.embeddings.store import count_backfill, find_needing_embedding, read_backfill_page
 
 logger = logging.getLogger(__name__)
 
 
+def _notify_embedded(node_ids: List[str]) -> None:
+    """Tell connected clients which nodes got fresh embeddings, per sync scope."""
+    if not node_ids:
+        return
+    try:
+        rows = query(
+            """
+            UNWIND $ids AS nid
+            MATCH (n:Entity {id: nid})
+            OPTIONAL MATCH (n)-[:PART_OF]->(c:Campaign)
+            OPTIONAL MATCH (u:User)-[:PART_OF]->(n)
+            WITH n, coalesce(c.id, 'global:' + u.id) AS scope
+            WHERE scope IS NOT NULL
+            RETURN scope, collect(DISTINCT n.id) AS ids
+            """,
+            ids=node_ids,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to resolve scopes for embedded nodes: {e}")
+        return
+    for row in rows:
+        publish(row["scope"], {"type": "embedded", "entity": "node", "ids": row["ids"]})
+
+
 def process_node_embedding(node_id: str, force: bool = False) -> Dict[str, Any]:
     """
     Background task to process embedding for a single node.
@@ -32,41 +89,13 @@ def process_node_embedding(node_id: str, force: bool = False) -> Dict[str, Any]:
         update_service = get_embedding_update_service()
         
         if force:
-            # Force regeneration - get node data directly
-            result = query(
-                """
-                MATCH (n {id: $node_id})
-                RETURN n.title AS title, n.markdown AS markdown
-                """,
-                node_id=node_id,
-            )
-            
-            if not result:
-                return {"error": "Node not found", "updated": False, "node_id": node_id}
-            
-            node_data = result[0]
-            embedding_service = update_service.embedding_service
-            text_to_embed = f"{node_data['title']}\n{node_data['markdown'] or ''}"
-            embedding = embedding_service.generate_embedding(text_to_embed)
-            
-            content_hash = update_service.get_content_hash(
-                node_data["title"] or "", node_data["markdown"] or ""
-            )
-            
-            query(
-                """
-                MATCH (n {id: $node_id})
-                SET n.embedding = $embedding, 
-                    n.embeddedAt = timestamp(),
-                    n.contentHash = $content_hash
-                """,
-                node_id=node_id,
-                embedding=embedding,
-                content_hash=content_hash,
-            )
-            
+            # Force regeneration of every chunk, through the pipeline
+            results = embed_nodes([node_id], force=True)
+            if results["errors"]:
+                return {"error": results["errors"][0], "updated": False, "node_id": node_id}
+
             return {
-                "message": f"Embedding generated (forced) - {len(embedding)} dimensions",
+                "message": f"Embedding generated (forced) - {results['chunks_embedded']} chunks",
                 "updated": True,
                 "node_id": node_id
             }
@@ -84,6 +113,10 @@ def process_node_embedding(node_id: str, force: bool = False) -> Dict[str, Any]:
 def process_nodes_batch_embedding(node_ids: List[str], force: bool = False) -> Dict[str, Any]:
     """
     Background task to process embeddings for multiple nodes.
+
+    Runs the batched pipeline (services/embeddings/pipeline.py): one read,
+    batched provider calls and one write, with per-stage timings in the
+    result.
     
     Args:
         node_ids: List of node IDs to process
@@ -93,25 +126,11 @@ def process_nodes_batch_embedding(node_ids: List[str], force: bool = False) -> D
         Dict with batch processing results
     """
     try:
-        results = {
-            "processed": 0,
-            "updated": 0,
-            "skipped": 0,
-            "errors": []
-        }
-        
-        for node_id in node_ids:
-            results["processed"] += 1
-            result = process_node_embedding(node_id, force=force)
-            
-            if result.get("updated"):
-                results["updated"] += 1
-            elif result.get("error"):
-                results["errors"].append(f"{node_id}: {result['error']}")
-            else:
-                results["skipped"] += 1
-        
+        results = embed_nodes(node_ids, force=force)
+        embedded = results.pop("embedded")
+
         logger.info(f"Batch embedding completed: {results['updated']} updated, {results['skipped']} skipped, {len(results['errors'])} errors")
+        _notify_embedded(embedded)
         return results
         
     except Exception as e:
@@ -124,9 +143,58 @@ def process_nodes_batch_embedding(node_ids: List[str], force: bool = False) -> D
         }
 
 
+def schedule_dirty_flush(delay: Optional[float] = None) -> bool:
+    """
+    Schedule flush_dirty_embeddings on the worker, unless one is pending.
+
+    `delay` defaults to the quiet period, which is when a node edited now
+    becomes due. Returns whether a flush was scheduled.
+    """
+    dirty = get_dirty_set()
+    if delay is None:
+        delay = dirty.quiet_seconds
+    if not dirty.claim_flush(delay):
+        return False
+    try:
+        scheduler.submit(scheduler.INTERACTIVE, flush_dirty_embeddings, delay=delay)
+    except Exception:
+        dirty.release_flush()
+        raise
+    return True
+
+
+def flush_dirty_embeddings() -> Dict[str, Any]:
+    """
+    Background task embedding every node of the dirty set that has been quiet
+    for the debounce period, in pipeline-sized batches.
+
+    Reschedules itself for when the next pending node becomes quiet.
+    """
+    dirty = get_dirty_set()
+    # Edits arriving from here on may schedule the next flush
+    dirty.release_flush()
+
+    totals: Dict[str, Any] = {"processed": 0, "updated": 0, "skipped": 0, "errors": []}
+    try:
+        while node_ids := dirty.pop_quiet():
+            results = embed_nodes(node_ids)
+            _notify_embedded(results.pop("embedded"))
+            for key in ("processed", "updated", "skipped"):
+                totals[key] += results[key]
+            totals["errors"].extend(results["errors"])
+    finally:
+        delay = dirty.next_due()
+        if delay is not None:
+            schedule_dirty_flush(delay)
+
+    if totals["processed"]:
+        logger.info(f"Flushed {totals['processed']} quiet nodes: {totals['updated']} updated, {totals['skipped']} skipped, {len(totals['errors'])} errors")
+    return totals
+
+
 def find_and_process_missing_embeddings(campaign_id: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
     """
-    Background task to find nodes without embeddings and process them.
+    Background task to find nodes whose embedding is missing or stale and process them.
     
     Args:
         campaign_id: Campaign ID to limit search to, or None for global nodes
@@ -136,45 +204,24 @@ def find_and_process_missing_embeddings(campaign_id: Optional[str] = None, limit
         Dict with processing results
     """
     try:
-        # Find nodes without embeddings
-        if campaign_id and campaign_id != "global":
-            nodes_query = """
-            MATCH (c:Campaign {id: $campaign_id})<-[:PART_OF]-(n)
-            WHERE n.title IS NOT NULL 
-            AND (n.embedding IS NULL OR size(n.embedding) = 0)
-            RETURN n.id AS id
-            ORDER BY coalesce(n.updatedAt, n.createdAt) DESC
-            LIMIT $limit
-            """
-            params = {"campaign_id": campaign_id, "limit": limit}
-        else:
-            nodes_query = """
-            MATCH (n)
-            WHERE (n:Campaign OR n:Session OR n:NPC OR n:Character OR n:Location OR n:Note)
-            AND n.title IS NOT NULL
-            AND (n.embedding IS NULL OR size(n.embedding) = 0)
-            RETURN n.id AS id
-            ORDER BY coalesce(n.updatedAt, n.createdAt) DESC
-            LIMIT $limit
-            """
-            params = {"limit": limit}
-        
-        nodes = query(nodes_query, **params)
+        # Index lookup on the flag kept current by sync pushes; no content is read
+        nodes = find_needing_embedding(
+            None if campaign_id == "global" else campaign_id, limit=limit
+        )
         
         if not nodes:
             return {
-                "message": "No nodes found without embeddings",
+                "message": "No nodes need embeddings",
                 "processed": 0,
                 "updated": 0,
                 "skipped": 0,
                 "errors": []
             }
         
-        # Process the nodes
-        node_ids = [node["id"] for node in nodes]
-        logger.info(f"Found {len(node_ids)} nodes without embeddings, processing...")
+        logger.info(f"Found {len(nodes)} nodes needing embeddings, processing...")
         
-        return process_nodes_batch_embedding(node_ids, force=True)
+        # Not forced: flagged nodes whose content hash is current are only unflagged
+        return process_nodes_batch_embedding(nodes, force=False)
         
     except Exception as e:
         logger.error(f"Failed to find and process missing embeddings: {e}")
@@ -212,4 +259,113 @@ def process_campaign_embeddings(campaign_id: str, force: bool = False, limit: Op
             "updated": 0,
             "skipped": 0,
             "errors": [f"Campaign processing failed: {str(e)}"]
-        }
\ No newline at end of file
+        }
+
+
+def _report_progress(checkpoint: Dict[str, Any]) -> None:
+    """Expose a backfill's progress in the meta of the running RQ job."""
+    job = get_current_job()
+    if job is None:
+        return
+    job.meta["backfill"] = {
+        key: checkpoint.get(key)
+        for key in (
+            "scope", "force", "status", "after", "total", "processed", "updated",
+            "skipped", "failed", "batches", "nodesPerSecond", "remaining", "etaSeconds",
+        )
+    }
+    job.save_meta()
+
+
+def backfill_embeddings(campaign_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Background task embedding one slice of a backfill walk over a campaign,
+    or over every node with None, in node id order.
+
+    The walk's mode and cursor come from its checkpoint (backfill.py), which
+    is committed after every batch. The slice stops after
+    scheduler.BACKFILL_SLICE_BATCHES batches, or earlier when the backfill is
+    paused or higher-priority embedding work is waiting, and enqueues the rest
+    of the walk unless paused. Waits for a free backfill slot if every one
+    is taken.
+
+    Args:
+        campaign_id: Campaign ID to process, or None for every node
+
+    Returns:
+        Dict with the checkpoint after this slice
+    """
+    job = get_current_job()
+    job_id = job.id if job else f"local-{os.getpid()}"
+    scope = campaign_id or "all nodes"
+    if job is not None and not scheduler.owns_backfill(campaign_id, job_id):
+        return {"message": f"Backfill of {scope} was superseded by another run"}
+
+    checkpoints = get_backfill_checkpoints()
+    if not checkpoints.acquire_slot(job_id):
+        next_job_id = scheduler.continue_backfill(campaign_id, delay=BACKFILL_SLOT_RETRY_S)
+        return {"message": f"Every backfill slot is busy; retrying in {BACKFILL_SLOT_RETRY_S}s", "next_job_id": next_job_id}
+
+    try:
+        checkpoint = checkpoints.get(campaign_id)
+        if checkpoint is None:
+            scheduler.finish_backfill(campaign_id)
+            return {"message": f"No checkpoint for the backfill of {scope}"}
+        force = checkpoint["force"]
+        if checkpoint["total"] is None:
+            checkpoint["total"] = count_backfill(campaign_id, flagged_only=not force)
+            checkpoints.save(campaign_id, total=checkpoint["total"])
+        model = get_embedding_service().model_name
+
+        done = False
+        stopped = False
+        for batch_number in range(scheduler.BACKFILL_SLICE_BATCHES):
+            if checkpoints.status(campaign_id) != RUNNING:
+                stopped = True
+                break
+            if batch_number:
+                if scheduler.should_yield(scheduler.BACKFILL):
+                    logger.info(f"Backfill of {scope} yielding to higher-priority embedding work")
+                    break
+                if job is not None and not scheduler.owns_backfill(campaign_id, job_id):
+                    return {"message": f"Backfill of {scope} was superseded by another run"}
+
+            started = time.perf_counter()
+            rows = read_backfill_page(
+                model, campaign_id, checkpoint["after"], EMBED_BATCH_SIZE, flagged_only=not force
+            )
+            if rows:
+                results = embed_rows(rows, force=force, max_concurrency=BACKFILL_MAX_REQUESTS)
+                _notify_embedded(results["embedded"])
+                checkpoint = checkpoints.record_batch(
+                    campaign_id, checkpoint, rows[-1]["id"], results, time.perf_counter() - started
+                )
+                _report_progress(checkpoint)
+            if len(rows) < EMBED_BATCH_SIZE:
+                done = True
+                break
+
+        if done:
+            checkpoints.finish(campaign_id, DONE)
+            scheduler.finish_backfill(campaign_id)
+            checkpoint = checkpoints.get(campaign_id)
+            _report_progress(checkpoint)
+            logger.info(f"Backfill of {scope} completed: {checkpoint['updated']} updated, {checkpoint['skipped']} skipped, {checkpoint['failed']} errors in {checkpoint['activeSeconds']:.0f}s")
+            return checkpoint
+
+        if stopped:
+            # Paused; resuming starts a new chain from the checkpoint
+            scheduler.finish_backfill(campaign_id)
+            logger.info(f"Backfill of {scope} paused after {checkpoint['processed']} nodes")
+            return checkpoints.get(campaign_id)
+
+        next_job_id = scheduler.continue_backfill(campaign_id)
+        return {**checkpoint, "next_job_id": next_job_id}
+
+    except Exception as e:
+        # The checkpoint keeps the cursor; starting the backfill again resumes it
+        checkpoints.finish(campaign_id, FAILED, str(e))
+        scheduler.finish_backfill(campaign_id)
+        raise
+    finally:
+        checkpoints.release_slot(job_id)
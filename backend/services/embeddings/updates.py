@@ -5,9 +5,20 @@ from typing import Any
 try:
     from backend.services.neo4j import query
     from backend.services.embeddings.service import get_embedding_service
+    from backend.services.embeddings.store import (
+        EMBEDDING_STATE_COLUMNS,
+        read_backfill_page,
+    )
 except ImportError:
     from services.neo4j import query
     from services.embeddings.service import get_embedding_service
+    from services.embeddings.store import (
+        EMBEDDING_STATE_COLUMNS,
+        read_backfill_page,
+    )
+
+# Nodes are read and embedded through the pipeline this many at a time
+EMBED_BATCH_SIZE = 100
 
 
 class EmbeddingUpdateService:
@@ -23,7 +34,11 @@ class EmbeddingUpdateService:
         """Determine if a node needs re-embedding."""
 
         # If no embedding exists, definitely needs embedding
-        if not node_data.get("embedding"):
+        if not node_data.get("hasEmbedding"):
+            return True
+
+        # Embedded as a single vector, before content was chunked
+        if node_data.get("chunks") is None:
             return True
 
         # If we have a content hash, compare it
@@ -40,17 +55,15 @@ class EmbeddingUpdateService:
         """Update embedding for a single node if needed."""
 
         # Get current node data
-        node_query = """
-        MATCH (n {id: $node_id})
-        RETURN n.id AS id, 
-               n.title AS title, 
-               n.markdown AS markdown,
-               n.embedding AS embedding,
-               n.contentHash AS contentHash,
-               n.updatedAt AS updatedAt
+        node_query = f"""
+        MATCH (n:Entity {{id: $node_id}})
+        OPTIONAL MATCH (e:Embedding {{model: $model}})-[:EMBEDS]->(n)
+        RETURN {EMBEDDING_STATE_COLUMNS}
         """
 
-        node_result = query(node_query, node_id=node_id)
+        node_result = query(
+            node_query, node_id=node_id, model=self.embedding_service.model_name
+        )
 
         if not node_result:
             return {"error": "Node not found", "updated": False}
@@ -61,102 +74,74 @@ class EmbeddingUpdateService:
         if not self.needs_re_embedding(node_data):
             return {"message": "No content change", "updated": False}
 
-        try:
-            # Generate new embedding
-            title = node_data["title"] or ""
-            markdown = node_data["markdown"] or ""
-            current_content = f"{title}\n{markdown}"
-            content_hash = self.get_content_hash(title, markdown)
-
-            new_embedding = self.embedding_service.generate_embedding(current_content)
-
-            # Update the node - just embedding, hash, and timestamp
-            update_query = """
-            MATCH (n {id: $node_id})
-            SET n.embedding = $embedding,
-                n.embeddedAt = int(datetime.now().timestamp() * 1000),
-                n.contentHash = $content_hash
-            """
-
-            query(
-                update_query,
-                node_id=node_id,
-                embedding=new_embedding,
-                content_hash=content_hash,
-            )
+        return self.embed_node(node_data)
 
-            return {"message": "Embedding updated", "updated": True}
+    def embed_node(self, node_data: dict[str, Any]) -> dict[str, Any]:
+        """Chunk, embed and store an already-read node."""
+        try:
+            from backend.services.embeddings.pipeline import embed_rows
+        except ImportError:
+            from services.embeddings.pipeline import embed_rows
 
+        try:
+            # Already checked by the caller; the pipeline still reuses the
+            # vectors of unchanged chunks
+            result = embed_rows([node_data], check=False)
         except Exception as e:
             return {"error": f"Failed to update embedding: {str(e)}", "updated": False}
 
+        if result["errors"]:
+            return {"error": f"Failed to update embedding: {result['errors'][0]}", "updated": False}
+        return {"message": "Embedding updated", "updated": True}
+
     def update_campaign_embeddings(
         self, campaign_id: str, force: bool = False
     ) -> dict[str, Any]:
         """Update embeddings for all nodes in a campaign that need it."""
 
-        # Get all nodes in the campaign
-        if campaign_id == "global":
-            nodes_query = """
-            MATCH (n)
-            WHERE (n:Campaign OR n:Session OR n:NPC OR n:Character OR n:Location OR n:Note)
-            AND n.title IS NOT NULL
-            RETURN n.id AS id, 
-                   n.title AS title, 
-                   n.markdown AS markdown,
-                   n.embedding AS embedding,
-                   n.contentHash AS contentHash,
-                   n.updatedAt AS updatedAt
-            ORDER BY n.updatedAt DESC
-            """
-            params = {}
-        else:
-            nodes_query = """
-            MATCH (n)
-            WHERE EXISTS((n)<-[:PART_OF]-(c:Campaign {id: $campaign_id}))
-            AND n.title IS NOT NULL
-            RETURN n.id AS id, 
-                   n.title AS title, 
-                   n.markdown AS markdown,
-                   n.embedding AS embedding,
-                   n.contentHash AS contentHash,
-                   n.updatedAt AS updatedAt
-            ORDER BY n.updatedAt DESC
-            """
-            params = {"campaign_id": campaign_id}
-
-        nodes = query(nodes_query, **params)
-
-        if not nodes:
-            return {
-                "message": "No nodes found",
-                "processed": 0,
-                "updated": 0,
-                "skipped": 0,
-            }
+        try:
+            from backend.services.embeddings.pipeline import embed_rows
+        except ImportError:
+            from services.embeddings.pipeline import embed_rows
 
         processed = 0
         updated = 0
         skipped = 0
         errors = []
 
-        for node in nodes:
-            processed += 1
-
-            # Skip if not forced and no change
-            if not force and not self.needs_re_embedding(node):
-                skipped += 1
-                continue
-
-            # Update embedding
-            result = self.update_node_embedding(node["id"])
+        def add(result: dict[str, Any]) -> None:
+            nonlocal processed, updated, skipped
+            processed += result["processed"]
+            updated += result["updated"]
+            skipped += result["skipped"]
+            errors.extend(result["errors"])
+
+        # Paged by id, so no read transaction stays open while a page is
+        # embedded over HTTP and written back. Without `force`, only flagged
+        # nodes are read (an index seek)
+        model = self.embedding_service.model_name
+        scope = None if campaign_id == "global" else campaign_id
+        after = None
+        while True:
+            page = read_backfill_page(
+                model,
+                scope,
+                after=after,
+                limit=EMBED_BATCH_SIZE,
+                flagged_only=not force,
+            )
+            if not page:
+                break
+            add(embed_rows(page, force=force))
+            after = page[-1]["id"]
 
-            if result.get("updated"):
-                updated += 1
-            elif result.get("error"):
-                errors.append(f"{node['id']}: {result['error']}")
-            else:
-                skipped += 1
+        if not processed:
+            return {
+                "message": "No nodes found",
+                "processed": 0,
+                "updated": 0,
+                "skipped": 0,
+            }
 
         return {
             "message": f"Processed {processed} nodes",
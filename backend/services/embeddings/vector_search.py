@@ -1,16 +1,75 @@
 from typing import List, Optional
-from backend.services.neo4j import query
+import numpy as np
+from backend.services.neo4j import aread_query
+from backend.services.neo4j.projections import project
 from backend.services.embeddings.service import get_embedding_service
+from backend.services.embeddings.query_cache import get_query_embedding_cache
+from backend.services.embeddings.store import (
+    CHUNK_INDEX,
+    EMBEDDABLE_LABELS,
+    EMBEDDING_INDEX,
+)
 from backend.models.schemas import VectorSearchResult
 
+_RESULT_PROJECTION = project("searchResult", p="n", extra={"similarity_score": "score"})
+
+
+# The shared index holds every model's vectors and every content type, so
+# fetch more candidates than needed before the model/access filters run.
+OVERFETCH_FACTOR = 4
+# Several chunks of one node can match; fetch enough that they do not crowd
+# other nodes out of the candidates
+CHUNKS_PER_NODE = 3
+
+# A node scores as its best-matching chunk (max-sim), so a long document is
+# found by the one section that answers the query. Nodes still holding a
+# single vector from before chunking are searched through the old index until
+# they are re-embedded.
+_SEARCH_QUERY = """
+MATCH (u:User {id: $uid})
+CALL {
+    CALL db.index.vector.queryNodes('""" + CHUNK_INDEX + """', $k, $embedding)
+    YIELD node AS hit, score
+    WHERE hit.model = $model
+    MATCH (hit)-[:CHUNK_OF]->(n)
+    RETURN n, score
+    UNION ALL
+    CALL db.index.vector.queryNodes('""" + EMBEDDING_INDEX + """', $k, $embedding)
+    YIELD node AS hit, score
+    WHERE hit.model = $model
+    MATCH (hit)-[:EMBEDS]->(n)
+    RETURN n, score
+}
+WITH u, n, max(score) AS score
+WHERE score >= $threshold
+AND ($exclude_id IS NULL OR n.id <> $exclude_id)
+AND NOT n:FOLDER
+AND any(label IN labels(n) WHERE label IN $labels)
+
+OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id: $cid})<-[:PART_OF]-(n)
+OPTIONAL MATCH (u)-[:PART_OF]->(n2)
+WHERE $cid IS NULL AND n2 = n
+
+WITH n, score, c, n2
+WHERE ($cid IS NOT NULL AND c IS NOT NULL) OR ($cid IS NULL AND n2 IS NOT NULL)
+
+RETURN """ + _RESULT_PROJECTION + """ AS result
+ORDER BY score DESC
+LIMIT $limit
+"""
+
+# Campaigns are embedded but not returned as search results
+SEARCHABLE_LABELS = [label for label in EMBEDDABLE_LABELS if label != "Campaign"]
+
 
 class VectorSearchService:
-    """Service for vector-based search operations using type-specific indexes."""
+    """Service for vector-based search over the shared :Chunk index."""
 
     def __init__(self):
         self.embedding_service = get_embedding_service()
+        self.query_cache = get_query_embedding_cache()
 
-    def search_nodes(
+    async def search_nodes(
         self,
         query_text: str,
         user_id: str,
@@ -19,35 +78,16 @@ class VectorSearchService:
         threshold: float = 0.7,
     ) -> List[VectorSearchResult]:
         """Search across all node types using vector similarity."""
-        # Get embedding for the query
-        query_embedding = self.embedding_service.generate_embedding(query_text)
+        # Repeated and concurrent queries share one embedding call
+        query_embedding = await self.query_cache.embed(query_text)
         if not query_embedding:
             return []
 
-        all_results = []
-
-        # Search each index type
-        for search_func in [
-            self._search_characters,
-            self._search_locations,
-            self._search_notes,
-            self._search_npcs,
-            self._search_sessions,
-        ]:
-            try:
-                results = search_func(
-                    query_embedding, user_id, campaign_id, limit, threshold
-                )
-                all_results.extend(results)
-            except Exception as e:
-                print(f"Error in search: {e}")
-                continue
-
-        # Sort by similarity and return top results
-        all_results.sort(key=lambda x: x.similarity_score, reverse=True)
-        return all_results[:limit]
+        return await self._search(
+            query_embedding, user_id, campaign_id, limit, threshold
+        )
 
-    def find_similar_to_node(
+    async def find_similar_to_node(
         self,
         node_id: str,
         user_id: str,
@@ -57,272 +97,36 @@ class VectorSearchService:
     ) -> List[VectorSearchResult]:
         """Find nodes similar to a specific node."""
 
-        # Get the target node's embedding
+        # The target is represented by the normalised mean of its chunks
         target_query = """
-            MATCH (n {id: $node_id})
-            WHERE n.embedding IS NOT NULL AND NOT n:FOLDER
-            RETURN n.embedding AS embedding
+            MATCH (e:Embedding {nodeId: $node_id, model: $model})-[:EMBEDS]->(n)
+            WHERE NOT n:FOLDER
+            OPTIONAL MATCH (c:Chunk {model: $model})-[:CHUNK_OF]->(n)
+            RETURN e.vector AS vector, collect(c.vector) AS chunkVectors
         """
 
-        target_result = query(target_query, node_id=node_id)
+        target_result = await aread_query(
+            target_query, node_id=node_id, model=self.embedding_service.model_name
+        )
         if not target_result:
             return []
-
-        target_embedding = target_result[0]["embedding"]
-        all_results = []
-
-        # Search all index types except campaigns
-        for search_func in [
-            self._search_characters,
-            self._search_locations,
-            self._search_notes,
-            self._search_npcs,
-            self._search_sessions,
-        ]:
-            try:
-                results = search_func(
-                    target_embedding,
-                    user_id,
-                    campaign_id,
-                    limit,
-                    threshold,
-                    exclude_id=node_id,
-                )
-                all_results.extend(results)
-            except Exception as e:
-                print(f"Error in similarity search: {e}")
-                continue
-
-        # Sort and return top results
-        all_results.sort(key=lambda x: x.similarity_score, reverse=True)
-        return all_results[:limit]
-
-    def _search_campaigns(
-        self,
-        embedding: List[float],
-        user_id: str,
-        campaign_id: Optional[str] = None,
-        limit: int = 10,
-        threshold: float = 0.7,
-        exclude_id: Optional[str] = None,
-    ) -> List[VectorSearchResult]:
-        """Search campaign embeddings."""
-        search_query = """
-        MATCH (u:User {id: $uid})
-        CALL db.index.vector.queryNodes('campaignEmbeddings', $limit, $embedding)
-        YIELD node AS n, score
-        WHERE score >= $threshold 
-        AND ($exclude_id IS NULL OR n.id <> $exclude_id)
-        AND NOT n:FOLDER
-        AND (
-            (u)-[:OWNS]->(n) OR 
-            (u)-[:PART_OF]->(n)
-        )
-        RETURN {
-            node_id: n.id,
-            title: n.title,
-            type: n.type,
-            similarity_score: score,
-            markdown: n.markdown
-        } AS result
-        ORDER BY score DESC
-        """
-
-        results = query(
-            search_query,
-            embedding=embedding,
-            limit=limit,
-            threshold=threshold,
-            exclude_id=exclude_id,
-            uid=user_id,
-        )
-        return [VectorSearchResult(**r["result"]) for r in results]
-
-    def _search_characters(
-        self,
-        embedding: List[float],
-        user_id: str,
-        campaign_id: Optional[str] = None,
-        limit: int = 10,
-        threshold: float = 0.7,
-        exclude_id: Optional[str] = None,
-    ) -> List[VectorSearchResult]:
-        """Search character embeddings."""
-        search_query = """
-        MATCH (u:User {id: $uid})
-        CALL db.index.vector.queryNodes('characterEmbeddings', $limit, $embedding)
-        YIELD node AS n, score
-        WHERE score >= $threshold 
-        AND ($exclude_id IS NULL OR n.id <> $exclude_id)
-        AND NOT n:FOLDER
-        
-        OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id: $cid})<-[:PART_OF]-(n)
-        OPTIONAL MATCH (u)-[:PART_OF]->(n2)
-        WHERE $cid IS NULL AND n2 = n
-        
-        WITH n, score, c, n2
-        WHERE ($cid IS NOT NULL AND c IS NOT NULL) OR ($cid IS NULL AND n2 IS NOT NULL)
-        
-        RETURN {
-            node_id: n.id,
-            title: n.title,
-            type: n.type,
-            similarity_score: score,
-            markdown: n.markdown
-        } AS result
-        ORDER BY score DESC
-        """
-
-        results = query(
-            search_query,
-            embedding=embedding,
-            limit=limit,
-            threshold=threshold,
-            exclude_id=exclude_id,
-            uid=user_id,
-            cid=campaign_id,
-        )
-        return [VectorSearchResult(**r["result"]) for r in results]
-
-    def _search_locations(
-        self,
-        embedding: List[float],
-        user_id: str,
-        campaign_id: Optional[str] = None,
-        limit: int = 10,
-        threshold: float = 0.7,
-        exclude_id: Optional[str] = None,
-    ) -> List[VectorSearchResult]:
-        """Search location embeddings."""
-        search_query = """
-        MATCH (u:User {id: $uid})
-        CALL db.index.vector.queryNodes('locationEmbeddings', $limit, $embedding)
-        YIELD node AS n, score
-        WHERE score >= $threshold 
-        AND ($exclude_id IS NULL OR n.id <> $exclude_id)
-        AND NOT n:FOLDER
-        
-        OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id: $cid})<-[:PART_OF]-(n)
-        OPTIONAL MATCH (u)-[:PART_OF]->(n2)
-        WHERE $cid IS NULL AND n2 = n
-        
-        WITH n, score, c, n2
-        WHERE ($cid IS NOT NULL AND c IS NOT NULL) OR ($cid IS NULL AND n2 IS NOT NULL)
-        
-        RETURN {
-            node_id: n.id,
-            title: n.title,
-            type: n.type,
-            similarity_score: score,
-            markdown: n.markdown
-        } AS result
-        ORDER BY score DESC
-        """
-
-        results = query(
-            search_query,
-            embedding=embedding,
-            limit=limit,
-            threshold=threshold,
-            exclude_id=exclude_id,
-            uid=user_id,
-            cid=campaign_id,
-        )
-        return [VectorSearchResult(**r["result"]) for r in results]
-
-    def _search_notes(
-        self,
-        embedding: List[float],
-        user_id: str,
-        campaign_id: Optional[str] = None,
-        limit: int = 10,
-        threshold: float = 0.7,
-        exclude_id: Optional[str] = None,
-    ) -> List[VectorSearchResult]:
-        """Search note embeddings."""
-        search_query = """
-        MATCH (u:User {id: $uid})
-        CALL db.index.vector.queryNodes('noteEmbeddings', $limit, $embedding)
-        YIELD node AS n, score
-        WHERE score >= $threshold 
-        AND ($exclude_id IS NULL OR n.id <> $exclude_id)
-        AND NOT n:FOLDER
-        
-        OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id: $cid})<-[:PART_OF]-(n)
-        OPTIONAL MATCH (u)-[:PART_OF]->(n2)
-        WHERE $cid IS NULL AND n2 = n
-        
-        WITH n, score, c, n2
-        WHERE ($cid IS NOT NULL AND c IS NOT NULL) OR ($cid IS NULL AND n2 IS NOT NULL)
-        
-        RETURN {
-            node_id: n.id,
-            title: n.title,
-            type: n.type,
-            similarity_score: score,
-            markdown: n.markdown
-        } AS result
-        ORDER BY score DESC
-        """
-
-        results = query(
-            search_query,
-            embedding=embedding,
-            limit=limit,
-            threshold=threshold,
-            exclude_id=exclude_id,
-            uid=user_id,
-            cid=campaign_id,
-        )
-        return [VectorSearchResult(**r["result"]) for r in results]
-
-    def _search_npcs(
-        self,
-        embedding: List[float],
-        user_id: str,
-        campaign_id: Optional[str] = None,
-        limit: int = 10,
-        threshold: float = 0.7,
-        exclude_id: Optional[str] = None,
-    ) -> List[VectorSearchResult]:
-        """Search NPC embeddings."""
-        search_query = """
-        MATCH (u:User {id: $uid})
-        CALL db.index.vector.queryNodes('npcEmbeddings', $limit, $embedding)
-        YIELD node AS n, score
-        WHERE score >= $threshold 
-        AND ($exclude_id IS NULL OR n.id <> $exclude_id)
-        AND NOT n:FOLDER
-        
-        OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id: $cid})<-[:PART_OF]-(n)
-        OPTIONAL MATCH (u)-[:PART_OF]->(n2)
-        WHERE $cid IS NULL AND n2 = n
-        
-        WITH n, score, c, n2
-        WHERE ($cid IS NOT NULL AND c IS NOT NULL) OR ($cid IS NULL AND n2 IS NOT NULL)
-        
-        RETURN {
-            node_id: n.id,
-            title: n.title,
-            type: n.type,
-            similarity_score: score,
-            markdown: n.markdown
-        } AS result
-        ORDER BY score DESC
-        """
-
-        results = query(
-            search_query,
-            embedding=embedding,
-            limit=limit,
-            threshold=threshold,
-            exclude_id=exclude_id,
-            uid=user_id,
-            cid=campaign_id,
+        vectors = target_result[0]["chunkVectors"] or [target_result[0]["vector"]]
+        vectors = [v for v in vectors if v]
+        if not vectors:
+            return []
+        centroid = np.mean(np.asarray(vectors, dtype=np.float32), axis=0)
+        centroid /= np.linalg.norm(centroid) or 1.0
+
+        return await self._search(
+            centroid.tolist(),
+            user_id,
+            campaign_id,
+            limit,
+            threshold,
+            exclude_id=node_id,
         )
-        return [VectorSearchResult(**r["result"]) for r in results]
 
-    def _search_sessions(
+    async def _search(
         self,
         embedding: List[float],
         user_id: str,
@@ -330,45 +134,28 @@ class VectorSearchService:
         limit: int = 10,
         threshold: float = 0.7,
         exclude_id: Optional[str] = None,
+        labels: Optional[List[str]] = None,
     ) -> List[VectorSearchResult]:
-        """Search session embeddings."""
-        search_query = """
-        MATCH (u:User {id: $uid})
-        CALL db.index.vector.queryNodes('sessionEmbeddings', $limit, $embedding)
-        YIELD node AS n, score
-        WHERE score >= $threshold 
-        AND ($exclude_id IS NULL OR n.id <> $exclude_id)
-        AND NOT n:FOLDER
-        
-        OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {id: $cid})<-[:PART_OF]-(n)
-        OPTIONAL MATCH (u)-[:PART_OF]->(n2)
-        WHERE $cid IS NULL AND n2 = n
-        
-        WITH n, score, c, n2
-        WHERE ($cid IS NOT NULL AND c IS NOT NULL) OR ($cid IS NULL AND n2 IS NOT NULL)
-        
-        RETURN {
-            node_id: n.id,
-            title: n.title,
-            type: n.type,
-            similarity_score: score,
-            markdown: n.markdown
-        } AS result
-        ORDER BY score DESC
-        """
-
-        results = query(
-            search_query,
-            embedding=embedding,
-            limit=limit,
-            threshold=threshold,
-            exclude_id=exclude_id,
-            uid=user_id,
-            cid=campaign_id,
-        )
+        """Query the embedding index once and filter to accessible content."""
+        try:
+            results = await aread_query(
+                _SEARCH_QUERY,
+                embedding=embedding,
+                k=limit * OVERFETCH_FACTOR * CHUNKS_PER_NODE,
+                limit=limit,
+                threshold=threshold,
+                model=self.embedding_service.model_name,
+                labels=labels or SEARCHABLE_LABELS,
+                exclude_id=exclude_id,
+                uid=user_id,
+                cid=campaign_id,
+            )
+        except Exception as e:
+            print(f"Error in search: {e}")
+            return []
         return [VectorSearchResult(**r["result"]) for r in results]
 
-    def suggest_relationships(
+    async def suggest_relationships(
         self, user_id: str, campaign_id: Optional[str] = None, threshold: float = 0.8
     ):
         """Suggest potential relationships between nodes based on content similarity."""
@@ -1,20 +1,62 @@
-from typing import LiteralString
-from neo4j import GraphDatabase, Query
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterable, Iterator, LiteralString
+from neo4j import (
+    AsyncGraphDatabase,
+    AsyncSession,
+    Bookmarks,
+    GraphDatabase,
+    Query,
+    READ_ACCESS,
+    WRITE_ACCESS,
+)
 from neo4j.exceptions import Neo4jError, ServiceUnavailable, AuthError
-import os
-
-_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-_USER = os.getenv("NEO4J_USERNAME", "neo4j")
-_PASS = os.getenv("NEO4J_PASSWORD", "secretgraph")
-
-_driver = GraphDatabase.driver(
-    _URI, 
-    auth=(_USER, _PASS), 
-    max_connection_pool_size=5,  # Reduced for Aura free tier
-    max_connection_lifetime=1800,  # 30 minutes
-    connection_acquisition_timeout=30  # 30 seconds
+from .instrumentation import arun, record, reset_stats, top_statements
+from .pools import (
+    ADMIN,
+    BACKGROUND,
+    INTERACTIVE,
+    URI as _URI,
+    aclose_all,
+    atrack,
+    close_all,
+    get_async_driver,
+    get_driver,
+    pool_metrics,
+    track,
 )
 
+# Each named pool is a separate driver (see pools.py). Sync helpers default to
+# the background pool: they run in RQ workers and scripts, outside an event
+# loop. Async helpers default to the interactive pool used by request
+# handlers. Pass `pool_=` to pick another.
+
+# Shared by every driver so that a read in this process always sees this
+# process's earlier writes, whichever pool or server either one used.
+_bookmark_manager = GraphDatabase.bookmark_manager()
+_async_bookmark_manager = AsyncGraphDatabase.bookmark_manager()
+
+
+def _bookmarks(values: Iterable[str] | None) -> Bookmarks | None:
+    return Bookmarks.from_raw_values(values) if values else None
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+def _recorded(cypher, params, started, records, summary) -> list[dict]:
+    """Convert records to dicts and record the statement's stats."""
+    rows = [r.data() for r in records]
+    record(
+        cypher,
+        _elapsed_ms(started),
+        rows=len(rows),
+        summary=summary,
+        params=params,
+    )
+    return rows
+
 
 def verify() -> None:
     """
@@ -22,23 +64,330 @@ def verify() -> None:
     Raises RuntimeError if the DB is unreachable or auth fails.
     """
     try:
-        _driver.verify_connectivity()  # does auth & bolt handshake
+        get_driver().verify_connectivity()  # does auth & bolt handshake
     except (ServiceUnavailable, AuthError, Neo4jError) as exc:
         raise RuntimeError(f"Neo4j unreachable: {_URI}") from exc
 
 
-def query(cypher: LiteralString | Query, **params: object):
+async def averify() -> None:
+    """Async counterpart of verify() for the API startup hook."""
+    try:
+        await get_async_driver().verify_connectivity()
+    except (ServiceUnavailable, AuthError, Neo4jError) as exc:
+        raise RuntimeError(f"Neo4j unreachable: {_URI}") from exc
+
+
+def write_query(
+    cypher: LiteralString | Query, pool_: str = BACKGROUND, **params: object
+):
+    """
+    Blocking query helper, routed to the writer.
+
+    Only for code that runs outside the event loop (RQ tasks in
+    services/embeddings/tasks.py, scripts). Request handlers use
+    awrite_query().
+    """
+    started = time.perf_counter()
+    try:
+        with track(pool_):
+            res = get_driver(pool_).execute_query(
+                cypher,
+                params or None,
+                database_=None,
+                routing_="w",
+                bookmark_manager_=_bookmark_manager,
+            )
+        return _recorded(cypher, params, started, res.records, res.summary)
+
+    except Exception as exc:
+        print(exc)
+        record(cypher, _elapsed_ms(started), error=exc)
+        raise
+
+
+def read_query(
+    cypher: LiteralString | Query,
+    bookmarks_: Iterable[str] | None = None,
+    pool_: str = BACKGROUND,
+    **params: object,
+):
+    """
+    Blocking read, routed to a follower or the read driver.
+
+    `bookmarks_` are raw bookmark values from another process's write (see
+    SyncPushResult.bookmarks); the read waits until the server has applied
+    them.
+    """
+    started = time.perf_counter()
+    try:
+        with track(pool_):
+            driver = get_driver(pool_, read=True)
+            if not bookmarks_:
+                res = driver.execute_query(
+                    cypher,
+                    params or None,
+                    database_=None,
+                    routing_="r",
+                    bookmark_manager_=_bookmark_manager,
+                )
+                return _recorded(cypher, params, started, res.records, res.summary)
+
+            def work(tx):
+                result = tx.run(cypher, params)
+                return list(result), result.consume()
+
+            with driver.session(
+                database=None,
+                default_access_mode=READ_ACCESS,
+                bookmarks=_bookmarks(bookmarks_),
+                bookmark_manager=_bookmark_manager,
+            ) as session:
+                records, summary = session.execute_read(work)
+            return _recorded(cypher, params, started, records, summary)
+
+    except Exception as exc:
+        print(exc)
+        record(cypher, _elapsed_ms(started), error=exc)
+        raise
+
+
+async def awrite_query(
+    cypher: LiteralString | Query, pool_: str = INTERACTIVE, **params: object
+):
+    """Run a single auto-committed statement on the async writer."""
+    started = time.perf_counter()
+    try:
+        async with atrack(pool_):
+            res = await get_async_driver(pool_).execute_query(
+                cypher,
+                params or None,
+                database_=None,
+                routing_="w",
+                bookmark_manager_=_async_bookmark_manager,
+            )
+        return _recorded(cypher, params, started, res.records, res.summary)
+
+    except Exception as exc:
+        print(exc)
+        record(cypher, _elapsed_ms(started), error=exc)
+        raise
+
+
+async def aread_query(
+    cypher: LiteralString | Query,
+    bookmarks_: Iterable[str] | None = None,
+    pool_: str = INTERACTIVE,
+    **params: object,
+):
+    """Async counterpart of read_query() for request handlers."""
+    if bookmarks_:
+        # arun records the statement
+        async with async_session(
+            access_mode="r", bookmarks=bookmarks_, pool=pool_
+        ) as session:
+            return await session.execute_read(arun, cypher, **params)
 
+    started = time.perf_counter()
     try:
-        res = _driver.execute_query(
-            cypher, params or None, database_=None, routing_="w"
+        async with atrack(pool_):
+            res = await get_async_driver(pool_, read=True).execute_query(
+                cypher,
+                params or None,
+                database_=None,
+                routing_="r",
+                bookmark_manager_=_async_bookmark_manager,
+            )
+        return _recorded(cypher, params, started, res.records, res.summary)
+
+    except Exception as exc:
+        print(exc)
+        record(cypher, _elapsed_ms(started), error=exc)
+        raise
+
+
+# Records the server sends per batch while a stream is consumed
+STREAM_FETCH_SIZE = 1000
+
+
+def stream_query(
+    cypher: LiteralString | Query,
+    fetch_size_: int = STREAM_FETCH_SIZE,
+    pool_: str = BACKGROUND,
+    **params: object,
+) -> Iterator[dict[str, Any]]:
+    """
+    Blocking read that yields records one at a time as the server streams
+    them, `fetch_size_` records per round trip, instead of returning a list.
+
+    For scans whose result can grow with the database (re-embedding, exports,
+    backfills): memory stays at one batch whatever the result size. The
+    session, and its connection, stay open until the generator is exhausted
+    or closed, so consume it promptly. The recorded latency only counts time
+    spent waiting on the server, not time spent by the caller between rows.
+    """
+    waited = 0.0
+    rows = 0
+    summary = None
+    error = None
+    try:
+        with track(pool_):
+            with get_driver(pool_, read=True).session(
+                database=None,
+                default_access_mode=READ_ACCESS,
+                bookmark_manager=_bookmark_manager,
+                fetch_size=fetch_size_,
+            ) as session:
+                started = time.perf_counter()
+                result = session.run(cypher, params)
+                records = iter(result)
+                while True:
+                    try:
+                        rec = next(records)
+                    except StopIteration:
+                        break
+                    finally:
+                        waited += time.perf_counter() - started
+                    rows += 1
+                    yield rec.data()
+                    started = time.perf_counter()
+                summary = result.consume()
+    except GeneratorExit:
+        raise
+    except Exception as exc:
+        print(exc)
+        error = exc
+        raise
+    finally:
+        record(
+            cypher,
+            waited * 1000,
+            rows=rows,
+            summary=summary,
+            error=error,
+            params=params,
         )
-        return [r.data() for r in res.records]
 
+
+async def astream_query(
+    cypher: LiteralString | Query,
+    fetch_size_: int = STREAM_FETCH_SIZE,
+    pool_: str = INTERACTIVE,
+    **params: object,
+) -> AsyncIterator[dict[str, Any]]:
+    """Async counterpart of stream_query(), e.g. for streamed responses."""
+    waited = 0.0
+    rows = 0
+    summary = None
+    error = None
+    try:
+        async with atrack(pool_):
+            session = get_async_driver(pool_, read=True).session(
+                database=None,
+                default_access_mode=READ_ACCESS,
+                bookmark_manager=_async_bookmark_manager,
+                fetch_size=fetch_size_,
+            )
+            try:
+                started = time.perf_counter()
+                result = await session.run(cypher, params)
+                records = aiter(result)
+                while True:
+                    try:
+                        rec = await anext(records)
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        waited += time.perf_counter() - started
+                    rows += 1
+                    yield rec.data()
+                    started = time.perf_counter()
+                summary = await result.consume()
+            finally:
+                await session.close()
+    except GeneratorExit:
+        raise
     except Exception as exc:
         print(exc)
+        error = exc
         raise
+    finally:
+        record(
+            cypher,
+            waited * 1000,
+            rows=rows,
+            summary=summary,
+            error=error,
+            params=params,
+        )
+
+
+# Existing callers default to the writer; new read paths should pick
+# read_query/aread_query explicitly.
+query = write_query
+aquery = awrite_query
+
+
+@asynccontextmanager
+async def async_session(
+    access_mode: str = "w",
+    bookmarks: Iterable[str] | None = None,
+    pool: str = INTERACTIVE,
+    **config: object,
+) -> AsyncIterator[AsyncSession]:
+    """
+    Open an async session for multi-statement work, e.g. an explicit
+    transaction:
+
+        async with async_session() as session:
+            tx = await session.begin_transaction()
+
+    `access_mode="r"` uses the read driver; pair it with execute_read so the
+    routing table sends the work to a follower. `bookmarks` makes the session
+    wait for writes made elsewhere, as in read_query().
+    """
+    read = access_mode == "r"
+    async with atrack(pool):
+        session = get_async_driver(pool, read=read).session(
+            database=None,
+            default_access_mode=READ_ACCESS if read else WRITE_ACCESS,
+            bookmarks=_bookmarks(bookmarks),
+            bookmark_manager=_async_bookmark_manager,
+            **config,
+        )
+        try:
+            yield session
+        finally:
+            await session.close()
 
 
 def close():
-    _driver.close()
+    close_all()
+
+
+async def aclose():
+    await aclose_all()
+
+
+__all__ = [
+    "ADMIN",
+    "BACKGROUND",
+    "INTERACTIVE",
+    "aclose",
+    "aquery",
+    "aread_query",
+    "arun",
+    "astream_query",
+    "async_session",
+    "averify",
+    "awrite_query",
+    "close",
+    "get_async_driver",
+    "pool_metrics",
+    "query",
+    "read_query",
+    "reset_stats",
+    "stream_query",
+    "top_statements",
+    "verify",
+    "write_query",
+]
@@ -0,0 +1,281 @@
+# backend/services/neo4j/instrumentation.py
+
+"""
+Per-statement Cypher instrumentation.
+
+Every statement run through the query helpers (and through `arun` inside
+explicit transactions) is recorded under a fingerprint of its normalised
+text: call count, errors, wall-clock latency histogram, rows returned, and the
+server-side `result_available_after` / `result_consumed_after` times from the
+driver's ResultSummary.
+
+Statements slower than NEO4J_SLOW_QUERY_MS are logged together with their
+plan: reads are re-run once under PROFILE on the admin pool, writes get an
+EXPLAIN so nothing is executed twice. Plans are captured at most once per
+fingerprint per NEO4J_PROFILE_COOLDOWN_S seconds.
+
+Statements served from a registry of prepared statements (see
+services/sync/statements.py) are marked as prepared, and the registry's
+lookups are counted here so its hit ratio sits next to the statement stats.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("NEO4J_SLOW_QUERY_MS", "500"))
+PROFILE_COOLDOWN_S = float(os.getenv("NEO4J_PROFILE_COOLDOWN_S", "300"))
+
+# Upper bounds (ms) of the latency histogram buckets; the last is open-ended
+LATENCY_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# Distinct statements tracked before new ones are folded into one entry, so
+# generated Cypher cannot grow this without bound
+MAX_FINGERPRINTS = 1000
+OVERFLOW_FINGERPRINT = "overflow"
+
+_COMMENT = re.compile(r"//[^\n]*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _text(cypher: Any) -> str:
+    return str(getattr(cypher, "text", cypher))  # neo4j.Query wraps the text
+
+
+def normalize(cypher: Any) -> str:
+    """
+    Statement text for fingerprints and display. The comment strip does not
+    know about string literals (`'http://...'`), so never run the result.
+    """
+    return _WHITESPACE.sub(" ", _COMMENT.sub("", _text(cypher))).strip()
+
+
+def fingerprint(cypher: Any) -> str:
+    """Stable id for a statement: whitespace and comments do not matter."""
+    return hashlib.sha1(normalize(cypher).encode()).hexdigest()[:12]
+
+
+@dataclass
+class StatementStats:
+    fingerprint: str
+    statement: str
+    calls: int = 0
+    errors: int = 0
+    rows: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    available_after_ms: float = 0.0
+    consumed_after_ms: float = 0.0
+    slow: int = 0
+    histogram: list[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    )
+    last_plan: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        calls = max(self.calls, 1)
+        return {
+            "fingerprint": self.fingerprint,
+            "statement": self.statement,
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "total_ms": round(self.total_ms, 2),
+            "mean_ms": round(self.total_ms / calls, 2),
+            "max_ms": round(self.max_ms, 2),
+            "server_available_after_ms": round(self.available_after_ms / calls, 2),
+            "server_consumed_after_ms": round(self.consumed_after_ms / calls, 2),
+            "slow": self.slow,
+            "histogram": {
+                **{
+                    f"le_{bound}": count
+                    for bound, count in zip(LATENCY_BUCKETS_MS, self.histogram)
+                },
+                "inf": self.histogram[-1],
+            },
+            "prepared": self.fingerprint in _prepared,
+            "last_plan": self.last_plan,
+        }
+
+
+_stats: dict[str, StatementStats] = {}
+_lock = threading.Lock()
+_last_profiled: dict[str, float] = {}
+_prepared: set[str] = set()
+_registry_lookups = {"hits": 0, "misses": 0}
+
+
+def mark_prepared(cypher: Any) -> None:
+    """Flag a statement as coming from a prepared-statement registry."""
+    with _lock:
+        _prepared.add(fingerprint(cypher))
+
+
+def record_registry_lookup(hit: bool) -> None:
+    """Count a registry lookup; a miss is a statement the registry rejected."""
+    with _lock:
+        _registry_lookups["hits" if hit else "misses"] += 1
+
+
+def registry_stats() -> dict[str, Any]:
+    """Registry hit ratio and how many distinct statements have run."""
+    with _lock:
+        hits, misses = _registry_lookups["hits"], _registry_lookups["misses"]
+        distinct = len(_stats)
+        prepared_seen = sum(1 for key in _stats if key in _prepared)
+        prepared = len(_prepared)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+        "prepared_statements": prepared,
+        "prepared_statements_run": prepared_seen,
+        "distinct_statements": distinct,
+    }
+
+
+def record(
+    cypher: Any,
+    elapsed_ms: float,
+    rows: int = 0,
+    summary: Any = None,
+    error: BaseException | None = None,
+    params: dict[str, Any] | None = None,
+) -> None:
+    """Add one execution to its statement's stats. Never raises."""
+    try:
+        key = fingerprint(cypher)
+        with _lock:
+            stats = _stats.get(key)
+            if stats is None:
+                if len(_stats) >= MAX_FINGERPRINTS:
+                    key = OVERFLOW_FINGERPRINT
+                    stats = _stats.setdefault(
+                        key, StatementStats(key, "(untracked statements)")
+                    )
+                else:
+                    stats = _stats[key] = StatementStats(
+                        key, normalize(cypher)[:500]
+                    )
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.histogram[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            if error is not None:
+                stats.errors += 1
+            stats.rows += rows
+            if summary is not None:
+                stats.available_after_ms += summary.result_available_after or 0
+                stats.consumed_after_ms += summary.result_consumed_after or 0
+            slow = error is None and elapsed_ms >= SLOW_QUERY_MS
+            if slow:
+                stats.slow += 1
+        if slow:
+            _log_slow(key, cypher, elapsed_ms, rows, summary, params)
+    except Exception as exc:
+        logger.debug(f"Failed to record query stats: {exc}")
+
+
+def _log_slow(key, cypher, elapsed_ms, rows, summary, params) -> None:
+    logger.warning(
+        f"Slow Cypher {key}: {elapsed_ms:.0f} ms, {rows} rows: "
+        f"{normalize(cypher)[:300]}"
+    )
+    now = time.monotonic()
+    with _lock:
+        if now - _last_profiled.get(key, -PROFILE_COOLDOWN_S) < PROFILE_COOLDOWN_S:
+            return
+        _last_profiled[key] = now
+    # Reads are safe to run again under PROFILE; writes only get EXPLAIN. The
+    # original text is run, as normalising can change what the statement does
+    query_type = getattr(summary, "query_type", None)
+    mode = "PROFILE" if query_type == "r" else "EXPLAIN"
+    threading.Thread(
+        target=_capture_plan,
+        args=(key, _text(cypher), dict(params or {}), mode),
+        daemon=True,
+    ).start()
+
+
+def _capture_plan(key: str, text: str, params: dict[str, Any], mode: str) -> None:
+    # Imported here: the package imports this module
+    from .pools import ADMIN, get_driver
+
+    try:
+        result = get_driver(ADMIN, read=mode == "PROFILE").execute_query(
+            f"{mode} {text}",
+            params or None,
+            database_=None,
+            routing_="r" if mode == "PROFILE" else "w",
+        )
+        plan = result.summary.profile or result.summary.plan
+        rendered = format_plan(plan) if plan else "(no plan returned)"
+    except Exception as exc:
+        rendered = f"(plan capture failed: {exc})"
+    with _lock:
+        if key in _stats:
+            _stats[key].last_plan = rendered
+    logger.warning(f"{mode} plan for slow Cypher {key}:\n{rendered}")
+
+
+def format_plan(plan: dict[str, Any], depth: int = 0) -> str:
+    """Render a driver plan/profile dict as an indented operator tree."""
+    details = []
+    for name in ("rows", "dbHits"):
+        if name in plan:
+            details.append(f"{name}={plan[name]}")
+    args = plan.get("args") or {}
+    for name in ("Details", "EstimatedRows"):
+        if name in args:
+            details.append(f"{name}={args[name]}")
+    line = "  " * depth + f"+{plan.get('operatorType', '?')} " + " ".join(details)
+    children = [format_plan(child, depth + 1) for child in plan.get("children", [])]
+    return "\n".join([line.rstrip(), *children])
+
+
+def top_statements(limit: int = 20, order_by: str = "total_ms") -> list[dict]:
+    """The `limit` statements with the highest `order_by` (any numeric stat)."""
+    with _lock:
+        rows = [s.as_dict() for s in _stats.values()]
+    rows.sort(key=lambda s: s.get(order_by) or 0, reverse=True)
+    return rows[:limit]
+
+
+def reset_stats() -> None:
+    with _lock:
+        _stats.clear()
+        _last_profiled.clear()
+        _registry_lookups.update(hits=0, misses=0)
+
+
+async def arun(tx, cypher: Any, **params: Any) -> list[dict[str, Any]]:
+    """
+    Run a statement inside an explicit async transaction and record it.
+
+    Use instead of `await (await tx.run(...)).data()` so statements run in
+    transaction functions show up alongside the query helpers.
+    """
+    started = time.perf_counter()
+    try:
+        result = await tx.run(cypher, params)
+        rows = await result.data()
+        summary = await result.consume()
+    except BaseException as exc:
+        record(cypher, (time.perf_counter() - started) * 1000, error=exc)
+        raise
+    record(
+        cypher,
+        (time.perf_counter() - started) * 1000,
+        rows=len(rows),
+        summary=summary,
+        params=params,
+    )
+    return rows
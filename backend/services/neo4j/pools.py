@@ -0,0 +1,239 @@
+# backend/services/neo4j/pools.py
+
+"""
+Named Neo4j connection pools.
+
+The Python driver has one connection pool per driver, so each named pool is
+its own driver (and, with NEO4J_READ_URI, its own read driver). Interactive
+request handlers, background jobs and admin tooling therefore never queue
+behind each other for a connection: a campaign-wide re-embed can exhaust the
+background pool without delaying a single sync request.
+
+Pools:
+    interactive  API request handlers; small timeout so a saturated pool
+                 fails fast instead of holding the request open
+    background   RQ workers and scripts; long timeout, a full pool just waits
+    admin        admin endpoints and maintenance scans
+
+Sizes and timeouts come from NEO4J_POOL_<NAME>_SIZE and
+NEO4J_POOL_<NAME>_TIMEOUT (seconds). A size is the limit of one driver in one
+process. Each pool has a sync and an async driver, plus a read driver of each
+kind with NEO4J_READ_URI, and every uvicorn worker and RQ worker is its own
+process. The database can therefore see up to
+(processes x drivers per pool x size) connections per pool.
+"""
+
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Iterator
+from neo4j import AsyncDriver, AsyncGraphDatabase, Driver, GraphDatabase
+from neo4j.exceptions import ClientError
+
+URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+USER = os.getenv("NEO4J_USERNAME", "neo4j")
+PASSWORD = os.getenv("NEO4J_PASSWORD", "secretgraph")
+
+# Optional separate endpoint for reads, e.g. a read replica or a cluster
+# address reserved for followers. Unset, reads share the writer's driver and
+# are still routed to followers when URI is a neo4j:// cluster address.
+READ_URI = os.getenv("NEO4J_READ_URI")
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+ADMIN = "admin"
+
+# (default size, default acquisition timeout in seconds). Sizes are per driver
+# per process, not totals: with 4 uvicorn workers the API alone can open up to
+# 4 x (5 + 2 + 1) x 2 connections. Divide the sizes by the worker count to fit
+# a fixed connection budget such as the Aura free tier's
+_POOL_DEFAULTS = {
+    INTERACTIVE: (5, 5),
+    BACKGROUND: (2, 120),
+    ADMIN: (1, 30),
+}
+
+
+def _pool_config(name: str) -> dict:
+    size, timeout = _POOL_DEFAULTS[name]
+    prefix = f"NEO4J_POOL_{name.upper()}"
+    return {
+        "max_connection_pool_size": int(os.getenv(f"{prefix}_SIZE", size)),
+        "connection_acquisition_timeout": float(
+            os.getenv(f"{prefix}_TIMEOUT", timeout)
+        ),
+        "max_connection_lifetime": 1800,  # 30 minutes
+    }
+
+
+POOL_CONFIG = {name: _pool_config(name) for name in _POOL_DEFAULTS}
+
+
+@dataclass
+class PoolCounters:
+    """Per-pool usage, counted around every query and session."""
+
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    queries: int = 0
+    acquisition_timeouts: int = 0
+    busy_seconds: float = 0.0
+
+
+_counters = {name: PoolCounters() for name in POOL_CONFIG}
+_counters_lock = threading.Lock()
+
+# Drivers keyed by (pool, uri); created lazily. Async drivers bind to the
+# event loop of the process that first uses them.
+_drivers: dict[tuple[str, str], Driver] = {}
+_async_drivers: dict[tuple[str, str], AsyncDriver] = {}
+_drivers_lock = threading.Lock()
+
+
+def _check_pool(pool: str) -> None:
+    if pool not in POOL_CONFIG:
+        raise ValueError(f"Unknown Neo4j pool '{pool}'")
+
+
+def _uri(read: bool) -> str:
+    return READ_URI if read and READ_URI else URI
+
+
+def get_driver(pool: str = BACKGROUND, read: bool = False) -> Driver:
+    """The sync driver (and so the connection pool) for `pool`."""
+    _check_pool(pool)
+    key = (pool, _uri(read))
+    with _drivers_lock:
+        if key not in _drivers:
+            _drivers[key] = GraphDatabase.driver(
+                key[1], auth=(USER, PASSWORD), **POOL_CONFIG[pool]
+            )
+        return _drivers[key]
+
+
+def get_async_driver(pool: str = INTERACTIVE, read: bool = False) -> AsyncDriver:
+    """The async driver (and so the connection pool) for `pool`."""
+    _check_pool(pool)
+    key = (pool, _uri(read))
+    if key not in _async_drivers:
+        _async_drivers[key] = AsyncGraphDatabase.driver(
+            key[1], auth=(USER, PASSWORD), **POOL_CONFIG[pool]
+        )
+    return _async_drivers[key]
+
+
+def _is_acquisition_timeout(exc: BaseException) -> bool:
+    # The driver raises a plain ClientError for this; match on its message
+    return isinstance(exc, ClientError) and "failed to obtain a connection" in str(
+        exc
+    )
+
+
+def _enter(pool: str) -> float:
+    with _counters_lock:
+        counters = _counters[pool]
+        counters.in_flight += 1
+        counters.queries += 1
+        counters.peak_in_flight = max(counters.peak_in_flight, counters.in_flight)
+    return time.perf_counter()
+
+
+def _exit(pool: str, started: float, exc: BaseException | None) -> None:
+    with _counters_lock:
+        counters = _counters[pool]
+        counters.in_flight -= 1
+        counters.busy_seconds += time.perf_counter() - started
+        if exc is not None and _is_acquisition_timeout(exc):
+            counters.acquisition_timeouts += 1
+
+
+@contextmanager
+def track(pool: str) -> Iterator[None]:
+    """Count one unit of work (a query or a session) against `pool`."""
+    started = _enter(pool)
+    try:
+        yield
+    except BaseException as exc:
+        _exit(pool, started, exc)
+        raise
+    else:
+        _exit(pool, started, None)
+
+
+@asynccontextmanager
+async def atrack(pool: str) -> AsyncIterator[None]:
+    """Async counterpart of track()."""
+    started = _enter(pool)
+    try:
+        yield
+    except BaseException as exc:
+        _exit(pool, started, exc)
+        raise
+    else:
+        _exit(pool, started, None)
+
+
+def _connection_counts(driver) -> tuple[int, int]:
+    """(in use, idle) connections held by a driver's pool."""
+    # The driver has no public pool API; read its connection table defensively
+    pool = getattr(driver, "_pool", None)
+    connections = getattr(pool, "connections", None) or {}
+    in_use = idle = 0
+    try:
+        for conns in list(connections.values()):
+            for conn in list(conns):
+                if getattr(conn, "in_use", False):
+                    in_use += 1
+                else:
+                    idle += 1
+    except RuntimeError:
+        # Table changed while we were reading it; report what we have
+        pass
+    return in_use, idle
+
+
+def pool_metrics() -> dict[str, dict]:
+    """Live utilisation of every pool in this process."""
+    metrics = {}
+    for name, config in POOL_CONFIG.items():
+        in_use = idle = 0
+        drivers = [
+            d
+            for registry in (_drivers, _async_drivers)
+            for (pool, _), d in list(registry.items())
+            if pool == name
+        ]
+        for driver in drivers:
+            used, free = _connection_counts(driver)
+            in_use += used
+            idle += free
+        # Each driver (sync/async, read/write) has its own pool of this size
+        capacity = config["max_connection_pool_size"] * max(len(drivers), 1)
+        with _counters_lock:
+            counters = asdict(_counters[name])
+        metrics[name] = {
+            "max_size": config["max_connection_pool_size"],
+            "acquisition_timeout": config["connection_acquisition_timeout"],
+            "drivers": len(drivers),
+            "connections_in_use": in_use,
+            "connections_idle": idle,
+            "utilisation": round(in_use / capacity, 3),
+            **counters,
+        }
+    return metrics
+
+
+def close_all() -> None:
+    with _drivers_lock:
+        for driver in _drivers.values():
+            driver.close()
+        _drivers.clear()
+
+
+async def aclose_all() -> None:
+    drivers = list(_async_drivers.values())
+    _async_drivers.clear()
+    for driver in drivers:
+        await driver.close()
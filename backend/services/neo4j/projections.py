@@ -0,0 +1,125 @@
+# backend/services/neo4j/projections.py
+
+"""
+Client-facing projections for every entity the API returns.
+
+Each projection is a whitelist: a Cypher map literal naming exactly the
+properties a client may see. Sync, change-feed and search queries splice these
+in instead of writing `props {.*, ...}` themselves, so server-side properties
+such as embedding vectors and content hashes can never leak by omission.
+
+Placeholders in the templates:
+    {p}  the entity's property map, usually `properties(n) AS props`
+    {s}  relationship start node (edges only)
+    {e}  relationship end node (edges only)
+    {r}  the relationship itself (edges only)
+"""
+
+# Server-side bookkeeping that must never be sent to a client
+INTERNAL_PROPERTIES = frozenset(
+    {"embedding", "embeddedAt", "embedded_at", "contentHash"}
+)
+
+# Client-owned properties that are not first-class fields; returned under
+# `attributes`. `attributes` itself is the client's JSON-encoded map.
+_ATTRIBUTES = "{p} {{.ownerId, .campaignId, .campaignIds, .attributes}}"
+
+PROJECTIONS: dict[str, dict[str, str]] = {
+    "node": {
+        "id": "{p}.id",
+        "type": "coalesce({p}.type, 'Note')",
+        "title": "coalesce({p}.title, {p}.name, 'Untitled')",
+        "ownerId": "{p}.ownerId",
+        "campaignId": "{p}.campaignId",
+        "markdown": "{p}.markdown",
+        "editorJson": "{p}.editorJson",
+        "updatedAt": "{p}.updatedAt",
+        "createdAt": "{p}.createdAt",
+        "attributes": _ATTRIBUTES,
+    },
+    "edge": {
+        "id": "{p}.id",
+        "from_id": "{s}.id",
+        "to_id": "{e}.id",
+        "from_title": "{s}.title",
+        "to_title": "{e}.title",
+        "relType": "type({r})",
+        "updatedAt": "{p}.updatedAt",
+        "createdAt": "{p}.createdAt",
+        "attributes": _ATTRIBUTES,
+    },
+    "folder": {
+        "id": "{p}.id",
+        "name": "{p}.name",
+        "parentId": "{p}.parentId",
+        "position": "coalesce({p}.position, 0)",
+        "campaignId": "{p}.campaignId",
+        "ownerId": "{p}.ownerId",
+        "createdAt": "coalesce({p}.createdAt, 0)",
+        "updatedAt": "coalesce({p}.updatedAt, 0)",
+    },
+    "chat": {
+        "id": "{p}.id",
+        "campaignId": "{p}.campaignId",
+        "ownerId": "{p}.ownerId",
+        "title": "{p}.title",
+        "contextNodeId": "{p}.contextNodeId",
+        "createdAt": "coalesce({p}.createdAt, 0)",
+        "updatedAt": "coalesce({p}.updatedAt, 0)",
+        "messageCount": "coalesce({p}.messageCount, 0)",
+        "isCompacted": "coalesce({p}.isCompacted, false)",
+    },
+    "chatMessage": {
+        "id": "{p}.id",
+        "campaignId": "{p}.campaignId",
+        "ownerId": "{p}.ownerId",
+        "role": "{p}.role",
+        "content": "{p}.content",
+        "createdAt": "coalesce({p}.createdAt, 0)",
+        "metadata": "{p}.metadata",
+        "isCompacted": "coalesce({p}.isCompacted, false)",
+    },
+    "searchResult": {
+        "node_id": "{p}.id",
+        "title": "{p}.title",
+        "type": "{p}.type",
+        "markdown": "{p}.markdown",
+    },
+}
+
+
+def project(entity: str, extra: dict[str, str] | None = None, **names: str) -> str:
+    """
+    Render the Cypher map literal for `entity`.
+
+    `names` binds the placeholders (default `p="props"`); `extra` adds
+    query-specific fields, as literal Cypher, such as a similarity score.
+    """
+    names = {"p": "props", "s": "s", "e": "e", "r": "r", **names}
+    fields = {
+        key: expr.format(**names) for key, expr in PROJECTIONS[entity].items()
+    }
+    fields.update(extra or {})  # literal Cypher, not templates
+    body = ",\n  ".join(f"{key}: {expr}" for key, expr in fields.items())
+    return "{\n  " + body + "\n}"
+
+
+def find_leaks(value, path: str = "$") -> list[str]:
+    """
+    Return the paths of any internal property or embedding-sized float list in
+    a response payload. Used by the projection checks; cheap enough for
+    debugging live responses too.
+    """
+    leaks = []
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in INTERNAL_PROPERTIES:
+                leaks.append(f"{path}.{key}")
+            leaks.extend(find_leaks(item, f"{path}.{key}"))
+    elif isinstance(value, (list, tuple)):
+        if len(value) >= 64 and all(isinstance(v, float) for v in value):
+            leaks.append(path)
+        else:
+            for i, item in enumerate(value):
+                leaks.extend(find_leaks(item, f"{path}[{i}]"))
+    return leaks
@@ -12,20 +12,20 @@ def build_create_query(
     # Create different queries for each label type based on seed data
     match label:
         case "Campaign":
-            query = "CREATE (n:Campaign $props) RETURN n"
+            query = "CREATE (n:Campaign:Entity $props) RETURN n"
         case "Character":
-            query = "CREATE (n:Character $props) RETURN n"
+            query = "CREATE (n:Character:Entity $props) RETURN n"
         case "Location":
-            query = "CREATE (n:Location $props) RETURN n"
+            query = "CREATE (n:Location:Entity $props) RETURN n"
         case "Note":
-            query = "CREATE (n:Note $props) RETURN n"
+            query = "CREATE (n:Note:Entity $props) RETURN n"
         case "NPC":
-            query = "CREATE (n:NPC $props) RETURN n"
+            query = "CREATE (n:NPC:Entity $props) RETURN n"
         case "Map":
-            query = "CREATE (n:Map $props) RETURN n"
+            query = "CREATE (n:Map:Entity $props) RETURN n"
         case "Session":
-            query = "CREATE (n:Session $props) RETURN n"
+            query = "CREATE (n:Session:Entity $props) RETURN n"
         case _:
-            query = "CREATE (n $props) RETURN n"
+            query = "CREATE (n:Entity $props) RETURN n"
 
     return query, {"props": props}
@@ -0,0 +1,100 @@
+import time
+from backend.services.neo4j import query
+
+
+def create_change_log_schema():
+    """Create the constraint and index backing the sync change log."""
+
+    # One counter node per scope; also makes the MERGE in append_events safe
+    try:
+        query(
+            """
+        CREATE CONSTRAINT change_log_scope IF NOT EXISTS
+        FOR (l:ChangeLog) REQUIRE l.scope IS UNIQUE
+        """
+        )
+        print("✅ Created constraint: change_log_scope")
+    except Exception as e:
+        print(f"❌ Error creating change_log_scope constraint: {e}")
+
+    # Range seek for "everything after seq N" in one scope
+    try:
+        query(
+            """
+        CREATE INDEX change_event_scope_seq IF NOT EXISTS
+        FOR (e:ChangeEvent) ON (e.scope, e.seq)
+        """
+        )
+        print("✅ Created index: change_event_scope_seq")
+    except Exception as e:
+        print(f"❌ Error creating change_event_scope_seq index: {e}")
+
+    # Retention pruning walks events by age
+    try:
+        query(
+            """
+        CREATE INDEX change_event_logged_at IF NOT EXISTS
+        FOR (e:ChangeEvent) ON (e.loggedAt)
+        """
+        )
+        print("✅ Created index: change_event_logged_at")
+    except Exception as e:
+        print(f"❌ Error creating change_event_logged_at index: {e}")
+
+
+def check_change_log_schema():
+    """Print the status of the change log constraint and indexes."""
+    try:
+        for record in query("SHOW CONSTRAINTS"):
+            constraint = record.get("record", record)
+            name = constraint.get("name", "")
+            if name.startswith("change_"):
+                print(f"  - {name}: {constraint.get('type', 'unknown')}")
+
+        for record in query("SHOW INDEXES"):
+            index = record.get("record", record)
+            name = index.get("name", "")
+            if name.startswith("change_"):
+                print(
+                    f"  - {name}: {index.get('state', 'unknown')} ({index.get('populationPercent', 0)}%)"
+                )
+    except Exception as e:
+        print(f"Error checking change log schema: {e}")
+
+
+def prune_change_log(retention_days: int = 30, batch_size: int = 5000) -> int:
+    """
+    Delete change events older than the retention window.
+
+    Each scope's `prunedThrough` is advanced to the highest pruned seq so that
+    clients with an older cursor are told to do a full resync.
+    """
+    cutoff = int((time.time() - retention_days * 24 * 60 * 60) * 1000)
+    total = 0
+
+    while True:
+        result = query(
+            """
+            MATCH (e:ChangeEvent)
+            WHERE e.loggedAt < $cutoff
+            WITH e LIMIT $batch_size
+            WITH e.scope AS scope, max(e.seq) AS maxSeq, collect(e) AS events
+            OPTIONAL MATCH (log:ChangeLog {scope: scope})
+            FOREACH (l IN CASE WHEN log IS NULL THEN [] ELSE [log] END |
+                SET l.prunedThrough = CASE
+                    WHEN maxSeq > l.prunedThrough THEN maxSeq
+                    ELSE l.prunedThrough END
+            )
+            FOREACH (e IN events | DELETE e)
+            RETURN sum(size(events)) AS deleted
+            """,
+            cutoff=cutoff,
+            batch_size=batch_size,
+        )
+        deleted = result[0]["deleted"] if result and result[0]["deleted"] else 0
+        total += deleted
+        if deleted < batch_size:
+            break
+
+    print(f"Pruned {total} change events older than {retention_days} days")
+    return total
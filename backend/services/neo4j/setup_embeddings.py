@@ -1,62 +1,57 @@
-from backend.services.neo4j import query
+from itertools import batched
+from backend.services.neo4j import query, stream_query
 from backend.services.embeddings.service import get_embedding_service
+from backend.services.embeddings.store import EMBEDDABLE_PREDICATE
+
+
+# Per-label indexes from when vectors were stored on content nodes
+LEGACY_VECTOR_INDEXES = [
+    "campaignEmbeddings",
+    "sessionEmbeddings",
+    "npcEmbeddings",
+    "characterEmbeddings",
+    "locationEmbeddings",
+    "noteEmbeddings",
+]
 
 
 def create_vector_index():
-    """Create vector indexes for all node types that can have embeddings."""
+    """Create the :Embedding/:Chunk constraints, vector and staleness indexes."""
 
     embedding_service = get_embedding_service()
     dimensions = embedding_service.dimensions
 
-    # Create separate indexes for each node type with literal strings
-
-    # Campaign index
+    # One vector per (content node, model); also backs the MERGE in writes
     try:
         query(
             """
-        CREATE VECTOR INDEX campaignEmbeddings
-        FOR (n:Campaign)
-        ON n.embedding
-        OPTIONS { 
-          indexConfig: {
-            `vector.dimensions`: $dimensions,
-            `vector.similarity_function`: 'cosine'
-          }
-        }
-        """,
-            dimensions=dimensions,
+        CREATE CONSTRAINT embedding_node_model IF NOT EXISTS
+        FOR (e:Embedding) REQUIRE (e.nodeId, e.model) IS UNIQUE
+        """
         )
-        print("✅ Created vector index: campaignEmbeddings")
+        print("✅ Created constraint: embedding_node_model")
     except Exception as e:
-        print(f"❌ Error creating campaignEmbeddings: {e}")
+        print(f"❌ Error creating embedding_node_model constraint: {e}")
 
-    # Session index
+    # One chunk per distinct chunk text of a node; backs the chunk MERGE
     try:
         query(
             """
-        CREATE VECTOR INDEX sessionEmbeddings
-        FOR (n:Session)
-        ON n.embedding
-        OPTIONS { 
-          indexConfig: {
-            `vector.dimensions`: $dimensions,
-            `vector.similarity_function`: 'cosine'
-          }
-        }
-        """,
-            dimensions=dimensions,
+        CREATE CONSTRAINT chunk_node_model_hash IF NOT EXISTS
+        FOR (c:Chunk) REQUIRE (c.nodeId, c.model, c.hash) IS UNIQUE
+        """
         )
-        print("✅ Created vector index: sessionEmbeddings")
+        print("✅ Created constraint: chunk_node_model_hash")
     except Exception as e:
-        print(f"❌ Error creating sessionEmbeddings: {e}")
+        print(f"❌ Error creating chunk_node_model_hash constraint: {e}")
 
-    # NPC index
+    # Single vector index shared by every content type
     try:
         query(
             """
-        CREATE VECTOR INDEX npcEmbeddings
-        FOR (n:NPC)
-        ON n.embedding
+        CREATE VECTOR INDEX embeddingVectors IF NOT EXISTS
+        FOR (e:Embedding)
+        ON e.vector
         OPTIONS { 
           indexConfig: {
             `vector.dimensions`: $dimensions,
@@ -66,18 +61,18 @@ def create_vector_index():
         """,
             dimensions=dimensions,
         )
-        print("✅ Created vector index: npcEmbeddings")
+        print("✅ Created vector index: embeddingVectors")
     except Exception as e:
-        print(f"❌ Error creating npcEmbeddings: {e}")
+        print(f"❌ Error creating embeddingVectors: {e}")
 
-    # Character index
+    # Chunk vectors, searched with max-sim aggregation per content node
     try:
         query(
             """
-        CREATE VECTOR INDEX characterEmbeddings
-        FOR (n:Character)
-        ON n.embedding
-        OPTIONS { 
+        CREATE VECTOR INDEX chunkVectors IF NOT EXISTS
+        FOR (c:Chunk)
+        ON c.vector
+        OPTIONS {
           indexConfig: {
             `vector.dimensions`: $dimensions,
             `vector.similarity_function`: 'cosine'
@@ -86,49 +81,83 @@ def create_vector_index():
         """,
             dimensions=dimensions,
         )
-        print("✅ Created vector index: characterEmbeddings")
+        print("✅ Created vector index: chunkVectors")
     except Exception as e:
-        print(f"❌ Error creating characterEmbeddings: {e}")
+        print(f"❌ Error creating chunkVectors: {e}")
 
-    # Location index
+    # Backfill discovery: content whose embedding is missing or out of date
     try:
         query(
             """
-        CREATE VECTOR INDEX locationEmbeddings
-        FOR (n:Location)
-        ON n.embedding
-        OPTIONS { 
-          indexConfig: {
-            `vector.dimensions`: $dimensions,
-            `vector.similarity_function`: 'cosine'
-          }
-        }
-        """,
-            dimensions=dimensions,
+        CREATE INDEX entity_needs_embedding IF NOT EXISTS
+        FOR (n:Entity) ON (n.needsEmbedding)
+        """
         )
-        print("✅ Created vector index: locationEmbeddings")
+        print("✅ Created index: entity_needs_embedding")
     except Exception as e:
-        print(f"❌ Error creating locationEmbeddings: {e}")
+        print(f"❌ Error creating entity_needs_embedding: {e}")
 
-    # Note index
-    try:
-        query(
+
+_FLAG_CANDIDATES = f"""
+MATCH (n:Entity)
+WHERE {EMBEDDABLE_PREDICATE}
+AND n.title IS NOT NULL
+AND ($reset OR n.needsEmbedding IS NULL)
+"""
+
+
+def backfill_needs_embedding(batch_size: int = 1000, reset: bool = False) -> int:
+    """
+    Set `needsEmbedding` on content nodes written before the flag existed.
+
+    A node needs embedding if it has no chunked embedding for the current
+    model or was updated after it was embedded. With `reset`, every content
+    node is re-evaluated, not just unflagged ones. Candidates are streamed
+    and flagged one batch per transaction.
+    """
+    model = get_embedding_service().model_name
+    result = query(
+        _FLAG_CANDIDATES + "RETURN count(n) AS candidates", reset=reset
+    )
+    total = result[0]["candidates"] if result else 0
+    print(f"📝 Evaluating needsEmbedding on {total} content nodes")
+
+    candidates = stream_query(
+        _FLAG_CANDIDATES + "RETURN elementId(n) AS eid",
+        fetch_size_=batch_size,
+        reset=reset,
+    )
+    flagged = 0
+    done = 0
+    for batch in batched((r["eid"] for r in candidates), batch_size):
+        result = query(
             """
-        CREATE VECTOR INDEX noteEmbeddings
-        FOR (n:Note)
-        ON n.embedding
-        OPTIONS { 
-          indexConfig: {
-            `vector.dimensions`: $dimensions,
-            `vector.similarity_function`: 'cosine'
-          }
-        }
-        """,
-            dimensions=dimensions,
+            UNWIND $element_ids AS eid
+            MATCH (n) WHERE elementId(n) = eid
+            OPTIONAL MATCH (e:Embedding {model: $model})-[:EMBEDS]->(n)
+            SET n.needsEmbedding = e IS NULL
+                OR e.chunks IS NULL
+                OR coalesce(n.updatedAt > e.embeddedAt, false)
+            RETURN count(CASE WHEN n.needsEmbedding THEN 1 END) AS flagged
+            """,
+            element_ids=list(batch),
+            model=model,
         )
-        print("✅ Created vector index: noteEmbeddings")
-    except Exception as e:
-        print(f"❌ Error creating noteEmbeddings: {e}")
+        flagged += result[0]["flagged"] if result else 0
+        done += len(batch)
+        print(f"   Evaluated {done}/{total} nodes, {flagged} need embedding")
+
+    return flagged
+
+
+def drop_legacy_vector_indexes():
+    """Drop the per-label indexes over content-node `embedding` properties."""
+    for index_name in LEGACY_VECTOR_INDEXES:
+        try:
+            query(f"DROP INDEX {index_name} IF EXISTS")
+            print(f"Dropped legacy vector index: {index_name}")
+        except Exception as e:
+            print(f"Error dropping index {index_name}: {e}")
 
 
 def check_vector_index():
@@ -154,7 +183,10 @@ def drop_vector_indexes():
         for record in indexes:
             idx = record.get("record", record)
             index_name = idx.get("name")
-            if index_name and "Embeddings" in index_name:
+            if index_name and (
+                index_name in ("embeddingVectors", "chunkVectors")
+                or index_name in LEGACY_VECTOR_INDEXES
+            ):
                 try:
                     query(f"DROP INDEX {index_name}")
                     print(f"Dropped vector index: {index_name}")
@@ -164,23 +196,41 @@ def drop_vector_indexes():
         print(f"Error listing indexes to drop: {e}")
 
 
-def clear_all_embeddings():
-    """Clear all existing embeddings and content hashes from the database."""
+def clear_all_embeddings(batch_size: int = 1000):
+    """Delete all embedding and chunk nodes, plus legacy vectors on content nodes."""
     try:
+        cleared = 0
+        while True:
+            result = query(
+                """
+                MATCH (e)
+                WHERE e:Embedding OR e:Chunk
+                WITH e LIMIT $batch_size
+                DETACH DELETE e
+                RETURN count(*) AS deleted
+                """,
+                batch_size=batch_size,
+            )
+            deleted = result[0]["deleted"] if result else 0
+            cleared += deleted
+            if deleted < batch_size:
+                break
+
         result = query(
             """
             MATCH (n)
             WHERE n.embedding IS NOT NULL
-            SET n.embedding = NULL, 
-                n.contentHash = NULL,
-                n.embeddedAt = NULL
+            REMOVE n.embedding, n.contentHash, n.embeddedAt
             RETURN count(n) as cleared
             """
         )
-        
-        if result:
-            count = result[0].get("cleared", 0)
-            print(f"Cleared embeddings from {count} nodes")
+        legacy = result[0].get("cleared", 0) if result else 0
+
+        # Everything needs embedding again
+        backfill_needs_embedding(batch_size=batch_size, reset=True)
+
+        if cleared or legacy:
+            print(f"Cleared {cleared} embeddings and {legacy} legacy node vectors")
         else:
             print("No embeddings found to clear")
     except Exception as e:
@@ -0,0 +1,135 @@
+"""
+Schema bootstrap for the shared :Entity label.
+
+Every content node (campaigns and the nodes clients create through sync:
+notes, NPCs, locations, sessions, ...) carries `:Entity` in addition to its
+type label, and `:Entity(id)` is unique. Lookups that only know an id match
+`(n:Entity {id: $id})`, which is an index seek; a label-less `(n {id: $id})`
+scans every node in the database.
+"""
+
+from itertools import batched
+from backend.services.neo4j import query, stream_query
+
+ENTITY_LABEL = "Entity"
+
+# Labels of nodes that are not client content and never get :Entity
+NON_ENTITY_LABELS = [
+    "User",
+    "FOLDER",
+    "ChatSession",
+    "ChatMessage",
+    "Embedding",
+    "Chunk",
+    "ChangeLog",
+    "ChangeEvent",
+    "UsageEvent",
+    "UsageLimit",
+]
+
+_CANDIDATE_PREDICATE = """
+n.id IS NOT NULL
+AND NOT n:Entity
+AND NOT any(label IN labels(n) WHERE label IN $excluded)
+"""
+
+
+def create_entity_constraint():
+    """Create the uniqueness constraint (and its index) on :Entity(id)."""
+    try:
+        query(
+            """
+        CREATE CONSTRAINT entity_id IF NOT EXISTS
+        FOR (n:Entity) REQUIRE n.id IS UNIQUE
+        """
+        )
+        print("✅ Created constraint: entity_id")
+    except Exception as e:
+        print(f"❌ Error creating entity_id constraint: {e}")
+
+
+def find_duplicate_ids() -> list[str]:
+    """Ids shared by more than one content node; these cannot become :Entity."""
+    result = query(
+        """
+        MATCH (n)
+        WHERE n.id IS NOT NULL
+        AND NOT any(label IN labels(n) WHERE label IN $excluded)
+        WITH n.id AS id, count(*) AS copies
+        WHERE copies > 1
+        RETURN id
+        """,
+        excluded=NON_ENTITY_LABELS,
+    )
+    return [r["id"] for r in result]
+
+
+def backfill_entity_label(batch_size: int = 1000, dry_run: bool = False) -> int:
+    """
+    Add :Entity to existing content nodes, one batch per transaction.
+
+    Candidates are streamed from a single scan and labelled by element id, so
+    each batch is a set of direct lookups rather than another scan, and only
+    one batch of ids is held in memory. Nodes whose id is duplicated are
+    skipped and reported, since labelling them would violate the constraint.
+    """
+    duplicates = set(find_duplicate_ids())
+    if duplicates:
+        print(f"⚠️  Skipping {len(duplicates)} duplicated ids: {sorted(duplicates)[:10]}")
+
+    result = query(
+        "MATCH (n) WHERE " + _CANDIDATE_PREDICATE + " RETURN count(n) AS missing",
+        excluded=NON_ENTITY_LABELS,
+    )
+    total = result[0]["missing"] if result else 0
+    print(f"📝 Found {total} content nodes without :{ENTITY_LABEL}")
+    if dry_run:
+        return 0
+
+    candidates = stream_query(
+        "MATCH (n) WHERE " + _CANDIDATE_PREDICATE + " RETURN elementId(n) AS eid, n.id AS id",
+        fetch_size_=batch_size,
+        excluded=NON_ENTITY_LABELS,
+    )
+    element_ids = (r["eid"] for r in candidates if r["id"] not in duplicates)
+
+    labelled = 0
+    for batch in batched(element_ids, batch_size):
+        result = query(
+            """
+            UNWIND $element_ids AS eid
+            MATCH (n) WHERE elementId(n) = eid
+            SET n:Entity
+            RETURN count(n) AS labelled
+            """,
+            element_ids=list(batch),
+        )
+        labelled += result[0]["labelled"] if result else 0
+        print(f"   Labelled {labelled}/{total} nodes")
+
+    return labelled
+
+
+def check_entity_schema():
+    """Print the constraint state and how many content nodes still lack :Entity."""
+    try:
+        for record in query("SHOW CONSTRAINTS"):
+            constraint = record.get("record", record)
+            if constraint.get("name") == "entity_id":
+                print(f"  - entity_id: {constraint.get('type', 'unknown')}")
+
+        result = query(
+            "MATCH (n) WHERE " + _CANDIDATE_PREDICATE + " RETURN count(n) AS missing",
+            excluded=NON_ENTITY_LABELS,
+        )
+        missing = result[0]["missing"] if result else 0
+        print(f"  - content nodes without :{ENTITY_LABEL}: {missing}")
+    except Exception as e:
+        print(f"Error checking entity schema: {e}")
+
+
+def bootstrap_entity_schema(batch_size: int = 1000):
+    """Create the constraint, then label existing content nodes."""
+    create_entity_constraint()
+    labelled = backfill_entity_label(batch_size=batch_size)
+    print(f"✅ Labelled {labelled} nodes as :{ENTITY_LABEL}")
@@ -0,0 +1,126 @@
+"""
+Relationship property indexes on `id`.
+
+Neo4j range indexes on relationships are per type, so every relationship type
+needs its own `FOR ()-[r:TYPE]-() ON (r.id)` index for an id lookup to be a
+seek rather than a scan of every relationship in the database. The sync push
+creates the index the first time it sees a new client edge type; the setup
+script covers types that already exist.
+"""
+
+import logging
+from typing import get_args
+try:
+    from backend.models.components import (
+        ClientRelationshipType,
+        ServerRelationshipType,
+    )
+    from backend.services.neo4j import query, aquery
+except ImportError:
+    from models.components import ClientRelationshipType, ServerRelationshipType
+    from services.neo4j import query, aquery
+
+logger = logging.getLogger(__name__)
+
+# Types the server writes plus the client's RelationshipType union
+RELATIONSHIP_TYPES = sorted(
+    set(get_args(ServerRelationshipType)) | set(get_args(ClientRelationshipType))
+)
+
+# Types this process has already created an index for
+_indexed_types: set[str] = set()
+
+
+def index_name(rel_type: str) -> str:
+    return f"rel_{rel_type.lower()}_id"
+
+
+def _create_index_query(rel_type: str) -> str:
+    # rel_type must already be validated as a plain identifier
+    return (
+        f"CREATE INDEX {index_name(rel_type)} IF NOT EXISTS "
+        f"FOR ()-[r:{rel_type}]-() ON (r.id)"
+    )
+
+
+def create_relationship_id_indexes(rel_types: list[str] | None = None):
+    """Create an id index for every known and every existing relationship type."""
+    types = set(rel_types or RELATIONSHIP_TYPES)
+    try:
+        types |= {
+            r["relationshipType"] for r in query("CALL db.relationshipTypes()")
+        }
+    except Exception as e:
+        print(f"⚠️  Could not list existing relationship types: {e}")
+
+    for rel_type in sorted(types):
+        try:
+            query(_create_index_query(rel_type))
+            _indexed_types.add(rel_type)
+            print(f"✅ Created index: {index_name(rel_type)}")
+        except Exception as e:
+            print(f"❌ Error creating {index_name(rel_type)} index: {e}")
+
+
+def check_relationship_id_indexes():
+    """Print the relationship types with and without an id index."""
+    try:
+        indexed = {}
+        for record in query("SHOW INDEXES"):
+            index = record.get("record", record)
+            if index.get("entityType") == "RELATIONSHIP" and index.get(
+                "properties"
+            ) == ["id"]:
+                for rel_type in index.get("labelsOrTypes") or []:
+                    indexed[rel_type] = index
+        existing = [r["relationshipType"] for r in query("CALL db.relationshipTypes()")]
+
+        for rel_type in sorted(set(existing) | set(indexed)):
+            index = indexed.get(rel_type)
+            if index:
+                print(
+                    f"  - {rel_type}: {index.get('name')} {index.get('state', 'unknown')} "
+                    f"({index.get('populationPercent', 0)}%)"
+                )
+            else:
+                print(f"  - {rel_type}: ❌ no id index")
+    except Exception as e:
+        print(f"Error checking relationship id indexes: {e}")
+
+
+async def ensure_relationship_id_indexes(rel_types: set[str]) -> None:
+    """
+    Create id indexes for relationship types this process has not indexed yet.
+
+    Schema changes cannot share a transaction with data writes, so the push
+    calls this before opening its write transaction. Failures are logged and
+    leave lookups on that type correct but unindexed.
+    """
+    for rel_type in rel_types - _indexed_types:
+        try:
+            await aquery(_create_index_query(rel_type))
+            _indexed_types.add(rel_type)
+        except Exception as e:
+            logger.warning(f"Failed to create {index_name(rel_type)} index: {e}")
+
+
+def match_relationship_by_id(
+    rel_types: list[str] | None, id_expr: str = "row.id", outer: str = "row"
+) -> str:
+    """
+    Cypher binding `r` to the relationship whose id is `id_expr`.
+
+    An untyped `()-[r {id: ...}]->()` scans every relationship in the
+    database. Instead, each type in `rel_types` gets its own branch of a
+    UNION subquery, which the planner answers from that type's id index.
+    `outer` is the variable the subquery imports to evaluate `id_expr`.
+    """
+    if not rel_types:
+        return f"MATCH ()-[r {{id: {id_expr}}}]->() WHERE false"
+    branches = "\n    UNION\n".join(
+        f"    WITH {outer}\n"
+        f"    MATCH ()-[r:{rel_type} {{id: {id_expr}}}]->()\n"
+        f"    RETURN r"
+        for rel_type in rel_types
+    )
+    return "CALL {\n" + branches + "\n}"
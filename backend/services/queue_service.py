@@ -1,4 +1,5 @@
 import redis
+import redis.asyncio as aredis
 from rq import Queue, Worker
 from functools import lru_cache
 import os
@@ -30,6 +31,17 @@ def get_redis_connection():
         raise
 
 
+@lru_cache()
+def get_async_redis_connection():
+    """Get asyncio Redis client (cached) for use on the API event loop."""
+    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
+    try:
+        return aredis.Redis.from_url(redis_url)
+    except Exception as e:
+        logger.error(f"Failed to create async Redis client: {e}")
+        raise
+
+
 def get_task_queue(name: str = "default"):
     """Get RQ queue for tasks."""
     try:
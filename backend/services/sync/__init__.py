@@ -0,0 +1,6 @@
+from .apply import apply_changes, plan_changes
+
+__all__ = [
+    "apply_changes",
+    "plan_changes",
+]
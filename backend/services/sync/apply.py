@@ -0,0 +1,338 @@
+# backend/services/sync/apply.py
+
+"""
+Batch apply engine for POST /sync/{cid}.
+
+Changes are grouped by (entity, op, label) and each group is written with a
+single `UNWIND $rows` statement from the statement registry (statements.py).
+All groups run inside one explicit write transaction, so a push of N changes
+costs one round trip per group instead of one per change.
+
+Before planning, each entity's changes are coalesced into one net change, and
+writes carrying a `ts` older than the stored `updatedAt` are skipped
+(last writer wins). Applied changes are appended to the campaign's change
+log inside the same transaction, along with a delete for every edge a node
+delete removed with its node.
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+from neo4j import AsyncManagedTransaction
+from neo4j.exceptions import ClientError
+try:
+    from backend.models.components import Change, ChangeFailure, SyncPushResult
+    from backend.services.neo4j import arun, async_session
+    from backend.services.neo4j.setup_relationship_ids import (
+        ensure_relationship_id_indexes,
+    )
+    from backend.services.sync.changelog import append_events, log_scope
+    from backend.services.sync.coalesce import coalesce_changes
+    from backend.services.sync.statements import get_statement_registry
+except ImportError:
+    from models.components import Change, ChangeFailure, SyncPushResult
+    from services.neo4j import arun, async_session
+    from services.neo4j.setup_relationship_ids import ensure_relationship_id_indexes
+    from services.sync.changelog import append_events, log_scope
+    from services.sync.coalesce import coalesce_changes
+    from services.sync.statements import get_statement_registry
+
+logger = logging.getLogger(__name__)
+
+# Groups run in phase order so that nodes exist before edges point at them and
+# deletes happen last. Within a phase, groups keep the order in which they
+# first appear in the push, and rows keep their original relative order.
+_PHASES = {
+    ("folders", "upsert"): 0,
+    ("node", "create"): 0,
+    ("chats", "upsert"): 0,
+    ("chatMessages", "upsert"): 1,
+    ("node", "update"): 2,
+    ("edge", "create"): 3,
+    ("edge", "update"): 4,
+    ("edge", "delete"): 5,
+    ("chatMessages", "delete"): 5,
+    ("node", "delete"): 6,
+    ("folders", "delete"): 6,
+    ("chats", "delete"): 6,
+}
+
+
+@dataclass
+class ChangeGroup:
+    entity: str
+    op: str
+    label: Optional[str]
+    phase: int
+    rows: List[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def require_match(self) -> bool:
+        # Deletes are idempotent; everything else must touch an entity
+        return self.op != "delete"
+
+
+def _serialize_json_fields(props: dict[str, Any]) -> dict[str, Any]:
+    """Neo4j cannot store maps as properties, so store them as JSON strings."""
+    attrs = props.get("attributes")
+    if isinstance(attrs, dict):
+        props["attributes"] = json.dumps(attrs) if attrs else None
+    editor_json = props.get("editorJson")
+    if isinstance(editor_json, dict):
+        props["editorJson"] = json.dumps(editor_json)
+    return props
+
+
+def _normalize_op(ch: Change) -> str:
+    # "create" and "upsert" are both MERGE for folders, chats and messages
+    if ch.entity in ("folders", "chats", "chatMessages") and ch.op == "create":
+        return "upsert"
+    return ch.op
+
+
+def _build_row(
+    idx: int, ch: Change
+) -> tuple[str, Optional[str], dict[str, Any]]:
+    """Return (op, label, row) for a change or raise ValueError if invalid."""
+    op = _normalize_op(ch)
+    if (ch.entity, op) not in _PHASES:
+        raise ValueError(f"Unsupported operation '{ch.op}' for {ch.entity}")
+
+    row: dict[str, Any] = {"idx": idx, "id": ch.entityId, "ts": ch.ts}
+    label = None
+
+    if ch.entity == "edge":
+        if op == "create":
+            missing = [
+                k for k in ("fromId", "toId", "relType") if not ch.payload.get(k)
+            ]
+            if missing:
+                raise ValueError(f"Missing edge fields: {', '.join(missing)}")
+            label = ch.payload["relType"]
+            row["fromId"] = ch.payload["fromId"]
+            row["toId"] = ch.payload["toId"]
+            row["props"] = _serialize_json_fields(
+                {
+                    k: v
+                    for k, v in ch.payload.items()
+                    if k not in ("fromId", "toId", "relType")
+                }
+            )
+        elif op == "update":
+            row["props"] = _serialize_json_fields(ch.payload.copy())
+    elif ch.entity == "node":
+        if op == "create":
+            label = ch.payload.get("type") or "Node"
+            row["props"] = _serialize_json_fields(
+                {**ch.payload, "updatedAt": ch.ts}
+            )
+        elif op == "update":
+            row["props"] = _serialize_json_fields(ch.payload.copy())
+    elif op == "upsert":
+        row["props"] = {**ch.payload, "updatedAt": ch.ts}
+        if ch.entity == "chatMessages":
+            row["chatId"] = ch.payload.get("chatId")
+
+    # Only registered labels and relationship types reach the database
+    get_statement_registry().check(ch.entity, op, label)
+
+    return op, label, row
+
+
+def plan_changes(
+    changes: List[Change],
+) -> tuple[List[ChangeGroup], List[ChangeFailure]]:
+    """Validate and group changes into UNWIND batches."""
+    groups: dict[tuple[str, str, Optional[str]], ChangeGroup] = {}
+    failures: List[ChangeFailure] = []
+
+    for idx, ch in enumerate(changes):
+        try:
+            op, label, row = _build_row(idx, ch)
+        except ValueError as exc:
+            failures.append(_failure(idx, ch, str(exc)))
+            continue
+
+        key = (ch.entity, op, label)
+        if key not in groups:
+            groups[key] = ChangeGroup(
+                entity=ch.entity, op=op, label=label, phase=_PHASES[(ch.entity, op)]
+            )
+        groups[key].rows.append(row)
+
+    # dicts keep insertion order and sort() is stable
+    ordered = sorted(groups.values(), key=lambda g: g.phase)
+    return ordered, failures
+
+
+def _params(group: ChangeGroup, cid: str, user_id: str) -> dict[str, Any]:
+    # Chat sessions in the global scope are not attached to a campaign
+    if group.entity == "chats" and cid == "global":
+        cid = None
+    return {"rows": group.rows, "cid": cid, "user_id": user_id}
+
+
+async def _run_groups(
+    tx: AsyncManagedTransaction,
+    groups: List[ChangeGroup],
+    cid: str,
+    user_id: str,
+) -> tuple[set[int], set[int], dict[int, List[str]]]:
+    """
+    Transaction function: run every group and collect the row indexes that
+    were applied and those skipped because the stored entity was newer, and
+    the ids of edges each applied node delete removed along with its node.
+    """
+    applied: set[int] = set()
+    stale: set[int] = set()
+    cascaded: dict[int, List[str]] = {}
+    registry = get_statement_registry()
+    for group in groups:
+        records = await arun(
+            tx,
+            registry.get(group.entity, group.op, group.label),
+            **_params(group, cid, user_id),
+        )
+        matched: set[int] = set()
+        for record in records:
+            if record["stale"]:
+                stale.add(record["idx"])
+            else:
+                matched.add(record["idx"])
+                if record.get("edgeIds"):
+                    cascaded[record["idx"]] = record["edgeIds"]
+        for row in group.rows:
+            if row["idx"] in matched or not group.require_match:
+                applied.add(row["idx"])
+    # A relationship id matched more than once counts as applied if any write won
+    return applied, stale - applied, cascaded
+
+
+def _cascaded_deletes(
+    changes: List[Change], cascaded: dict[int, List[str]]
+) -> List[Change]:
+    """Edge delete events for edges removed by node deletes, once per edge."""
+    seen: set[str] = set()
+    events: List[Change] = []
+    for idx, edge_ids in sorted(cascaded.items()):
+        for edge_id in edge_ids:
+            if edge_id in seen:
+                continue
+            seen.add(edge_id)
+            events.append(
+                Change(
+                    op="delete",
+                    entity="edge",
+                    entityId=edge_id,
+                    payload={},
+                    ts=changes[idx].ts,
+                )
+            )
+    return events
+
+
+async def _apply_and_log(
+    tx: AsyncManagedTransaction,
+    groups: List[ChangeGroup],
+    changes: List[Change],
+    cid: str,
+    user_id: str,
+) -> tuple[set[int], set[int], int | None]:
+    """
+    Transaction function: apply the groups and log what was applied,
+    including the edges node deletes removed, so pulls drop them too.
+    """
+    applied, stale, cascaded = await _run_groups(tx, groups, cid, user_id)
+    events = [changes[idx] for idx in sorted(applied)]
+    events += _cascaded_deletes(changes, cascaded)
+    head = await append_events(tx, log_scope(cid, user_id), events)
+    return applied, stale, head
+
+
+def _failure(idx: int, ch: Change, error: str) -> ChangeFailure:
+    return ChangeFailure(
+        index=idx, entity=ch.entity, entityId=ch.entityId, op=ch.op, error=error
+    )
+
+
+async def apply_changes(
+    cid: str, user_id: str, changes: List[Change]
+) -> tuple[SyncPushResult, List[Change]]:
+    """
+    Apply a push in a single write transaction.
+
+    If the transaction is rejected by the database (e.g. a property value of an
+    unsupported type), it is rolled back and each group is retried in its own
+    transaction so that one bad group cannot block the rest of the push.
+
+    Returns the per-change result and the net changes that were applied.
+    """
+    net_changes, origins = coalesce_changes(changes)
+    groups, failures = plan_changes(net_changes)
+    applied: set[int] = set()
+    stale: set[int] = set()
+    cursor = None
+    bookmarks: List[str] = []
+
+    if groups:
+        await ensure_relationship_id_indexes(
+            {g.label for g in groups if g.entity == "edge" and g.op == "create"}
+        )
+        async with async_session() as session:
+            try:
+                applied, stale, cursor = await session.execute_write(
+                    _apply_and_log, groups, net_changes, cid, user_id
+                )
+            except ClientError as exc:
+                logger.warning(
+                    f"Sync batch for {cid} rejected ({exc.code}); retrying per group"
+                )
+                for group in groups:
+                    try:
+                        (
+                            group_applied,
+                            group_stale,
+                            group_head,
+                        ) = await session.execute_write(
+                            _apply_and_log, [group], net_changes, cid, user_id
+                        )
+                        applied |= group_applied
+                        stale |= group_stale
+                        cursor = group_head or cursor
+                    except ClientError as group_exc:
+                        for row in group.rows:
+                            failures.append(
+                                _failure(
+                                    row["idx"],
+                                    net_changes[row["idx"]],
+                                    group_exc.message or str(group_exc),
+                                )
+                            )
+            # Lets a client read its own writes on any worker or follower
+            bookmarks = list((await session.last_bookmarks()).raw_values)
+
+        failed_idx = {f.index for f in failures}
+        for group in groups:
+            for row in group.rows:
+                idx = row["idx"]
+                if idx not in applied and idx not in stale and idx not in failed_idx:
+                    failures.append(
+                        _failure(idx, net_changes[idx], "No matching entity found")
+                    )
+
+    # Report failures against the client's positions, not the coalesced ones
+    for failure in failures:
+        failure.index = origins[failure.index]
+    failures.sort(key=lambda f: f.index)
+
+    result = SyncPushResult(
+        status="ok" if not failures else "partial",
+        applied=len(applied),
+        skipped=len(stale),
+        coalesced=len(changes) - len(net_changes),
+        cursor=cursor,
+        bookmarks=bookmarks,
+        failed=failures,
+    )
+    return result, [net_changes[idx] for idx in sorted(applied)]
@@ -0,0 +1,74 @@
+# backend/services/sync/coalesce.py
+
+"""
+Collapse a push into one net change per entity before it is written.
+
+Clients queue every autosave as its own change, so a single push often holds
+many updates to the same note. Folding them by `ts` means each entity is
+written (and checked for embedding) once.
+"""
+
+from typing import List, Optional
+try:
+    from backend.models.components import Change
+except ImportError:
+    from models.components import Change
+
+
+def _fold(net: Optional[Change], ch: Change) -> Change:
+    """
+    Fold `ch` into the net change so far. Returns `net` itself when `ch`
+    changes nothing.
+    """
+    if net is None:
+        return ch.model_copy(deep=True)
+
+    if ch.op == "delete":
+        # Always sent, even after a create in the same push: creates are
+        # MERGEs, so an earlier attempt at this push may already have created
+        # the entity, and deleting one that does not exist is a no-op
+        return ch.model_copy(deep=True)
+
+    if net.op == "delete":
+        # Re-created after a delete: the new create wins.
+        # A plain update after a delete has nothing to update.
+        return ch.model_copy(deep=True) if ch.op in ("create", "upsert") else net
+
+    # create/update/upsert followed by update/upsert: merge, later keys win
+    op = net.op
+    if op == "update" and ch.op in ("create", "upsert"):
+        op = ch.op
+    return net.model_copy(
+        update={"op": op, "payload": {**net.payload, **ch.payload}, "ts": ch.ts},
+        deep=True,
+    )
+
+
+def coalesce_changes(changes: List[Change]) -> tuple[List[Change], List[int]]:
+    """
+    Reduce each entity's changes to a single net operation, ordered by `ts`.
+
+    Returns the net changes (in order of each entity's first appearance) and,
+    for every net change, the index of the latest pushed change that shaped it
+    so that failures can still be reported against the client's list.
+    """
+    by_entity: dict[tuple[str, str], List[int]] = {}
+    for idx, ch in enumerate(changes):
+        by_entity.setdefault((ch.entity, ch.entityId), []).append(idx)
+
+    net_changes: List[Change] = []
+    origins: List[int] = []
+    for indexes in by_entity.values():
+        # sorted() is stable, so equal timestamps keep push order
+        ordered = sorted(indexes, key=lambda i: changes[i].ts)
+        net: Optional[Change] = None
+        origin = ordered[0]
+        for idx in ordered:
+            folded = _fold(net, changes[idx])
+            if folded is not net:
+                origin = idx
+            net = folded
+        net_changes.append(net)
+        origins.append(origin)
+
+    return net_changes, origins
@@ -0,0 +1,170 @@
+# backend/services/sync/events.py
+
+"""
+Cross-process sync notifications over Redis pub/sub.
+
+Writers (the push endpoint, RQ workers) publish a small event to
+`sync:{scope}` after their transaction commits. Every API worker process keeps
+one pub/sub connection and fans events out to the SSE streams connected to it,
+so a change made through any uvicorn worker reaches clients on all of them.
+
+Events are wake-ups, not data: a stream that receives a `changes` event reads
+the delta from the change log itself, which keeps access checks in one place
+and means a dropped message only delays a client until the next one.
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+try:
+    from backend.services.queue_service import (
+        get_redis_connection,
+        get_async_redis_connection,
+    )
+except ImportError:
+    from services.queue_service import get_redis_connection, get_async_redis_connection
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "sync:"
+
+# Sent to every listener after the pub/sub connection is re-established, since
+# anything published while it was down is lost.
+RESYNC_EVENT = {"type": "resync"}
+
+
+def channel_for(scope: str) -> str:
+    return f"{CHANNEL_PREFIX}{scope}"
+
+
+def publish(scope: str, event: dict[str, Any]) -> None:
+    """Publish from synchronous code (RQ workers, scripts). Never raises."""
+    try:
+        get_redis_connection().publish(channel_for(scope), json.dumps(event))
+    except Exception as e:
+        logger.warning(f"Failed to publish sync event to {scope}: {e}")
+
+
+async def apublish(scope: str, event: dict[str, Any]) -> None:
+    """Publish from the API event loop. Never raises."""
+    try:
+        await get_async_redis_connection().publish(
+            channel_for(scope), json.dumps(event)
+        )
+    except Exception as e:
+        logger.warning(f"Failed to publish sync event to {scope}: {e}")
+
+
+class SyncEventBroker:
+    """Shares one Redis subscription per process between all connected streams."""
+
+    def __init__(self, queue_size: int = 16):
+        self.queue_size = queue_size
+        self._pubsub = None
+        self._reader: asyncio.Task | None = None
+        self._listeners: dict[str, set[asyncio.Queue]] = {}
+        self._lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def listen(self, scope: str) -> AsyncIterator[asyncio.Queue]:
+        """Yield a queue that receives every event published to `scope`."""
+        channel = channel_for(scope)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = get_async_redis_connection().pubsub()
+            if channel not in self._listeners:
+                await self._pubsub.subscribe(channel)
+                self._listeners[channel] = set()
+            self._listeners[channel].add(queue)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+
+        try:
+            yield queue
+        finally:
+            async with self._lock:
+                listeners = self._listeners.get(channel, set())
+                listeners.discard(queue)
+                if not listeners:
+                    self._listeners.pop(channel, None)
+                    try:
+                        await self._pubsub.unsubscribe(channel)
+                    except Exception as e:
+                        logger.warning(f"Failed to unsubscribe from {channel}: {e}")
+
+    def _dispatch(self, channel: str, event: dict[str, Any]) -> None:
+        for queue in self._listeners.get(channel, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # The stream already has wake-ups pending and will read the
+                # change log anyway, so dropping this one loses nothing.
+                pass
+
+    async def _read(self) -> None:
+        backoff = 1.0
+        while self._listeners:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                backoff = 1.0
+                if message is None or message["type"] != "message":
+                    continue
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                try:
+                    event = json.loads(message["data"])
+                except (json.JSONDecodeError, TypeError):
+                    logger.warning(f"Dropping malformed sync event on {channel}")
+                    continue
+                self._dispatch(channel, event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Sync event subscription failed, reconnecting: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                await self._resubscribe()
+
+    async def _resubscribe(self) -> None:
+        async with self._lock:
+            try:
+                await self._pubsub.aclose()
+            except Exception:
+                pass
+            self._pubsub = get_async_redis_connection().pubsub()
+            try:
+                if self._listeners:
+                    await self._pubsub.subscribe(*self._listeners)
+            except Exception as e:
+                logger.error(f"Failed to resubscribe to sync events: {e}")
+                return
+            for channel in self._listeners:
+                self._dispatch(channel, RESYNC_EVENT)
+
+    async def aclose(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except Exception:
+                pass
+            self._pubsub = None
+
+
+_broker: SyncEventBroker | None = None
+
+
+def get_sync_event_broker() -> SyncEventBroker:
+    global _broker
+    if _broker is None:
+        _broker = SyncEventBroker()
+    return _broker
@@ -0,0 +1,288 @@
+# backend/services/sync/statements.py
+
+"""
+Registry of the Cypher statements the sync push may run.
+
+Labels and relationship types cannot be query parameters, so a statement that
+creates a `:NPC` node or a `:KNOWS` edge has the type in its text. Rendering
+that text per push means every distinct type is a distinct query for the
+planner, and a client sending arbitrary types could fill Neo4j's plan cache
+with one-off statements. Instead, one statement per (entity, op, label) is
+rendered once, from the node and relationship types declared in
+models/components.py, and a push may only use those. Anything else is
+rejected as a failed change before it reaches the database.
+
+Lookups are counted in the query instrumentation (GET /admin/neo4j/queries),
+and every registered statement is marked as prepared there.
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional, get_args
+try:
+    from backend.models.components import ClientRelationshipType, NodeType
+    from backend.services.embeddings.store import embeddable_predicate
+    from backend.services.neo4j.instrumentation import (
+        mark_prepared,
+        record_registry_lookup,
+    )
+    from backend.services.neo4j.setup_relationship_ids import (
+        match_relationship_by_id,
+    )
+except ImportError:
+    from models.components import ClientRelationshipType, NodeType
+    from services.embeddings.store import embeddable_predicate
+    from services.neo4j.instrumentation import mark_prepared, record_registry_lookup
+    from services.neo4j.setup_relationship_ids import match_relationship_by_id
+
+NODE_LABELS = list(get_args(NodeType))
+EDGE_TYPES = list(get_args(ClientRelationshipType))
+
+# Edge updates and deletes only know the edge id. Branching over every type a
+# client can create keeps the statement text fixed; see match_relationship_by_id.
+MATCH_CLIENT_EDGE = match_relationship_by_id(EDGE_TYPES)
+
+StatementKey = tuple[str, str, Optional[str]]
+
+
+def _flag_for_embedding(var: str, changed: Optional[str] = None) -> str:
+    """SET item marking embeddable content, optionally only if `changed`."""
+    condition = embeddable_predicate(var)
+    if changed:
+        condition = f"{changed} AND {condition}"
+    return f"""
+                     {var}.needsEmbedding = CASE
+                         WHEN {condition} THEN true
+                         ELSE {var}.needsEmbedding
+                     END"""
+
+
+
+class UnknownStatement(ValueError):
+    """The push asked for an entity/op/label the registry does not hold."""
+
+
+def render_statement(entity: str, op: str, label: Optional[str] = None) -> str:
+    """
+    Render the UNWIND statement for one (entity, op, label).
+
+    Every statement returns row.idx and a `stale` flag that is true when the
+    stored entity is newer than the change, in which case nothing was written.
+    Node deletes also return `edgeIds`, the client edges removed with the node.
+    `label` is the node label for node creates and the relationship type for
+    edge creates; it must come from NODE_LABELS or EDGE_TYPES. A node create
+    only touches a new node or one already linked to the user or campaign,
+    and leaves out the row of any other node with that id. One that is not
+    stale replaces the node's type label with `label`, but never removes
+    :Campaign. Node writes that create embeddable content or change its title
+    or markdown set `needsEmbedding` (see embeddings/store.py).
+    """
+    match (entity, op):
+        case ("node", "create") | ("folders", "upsert") | ("chats", "upsert"):
+            flag = ""
+            relabel = ""
+            if entity == "node":
+                # Merge on the constrained :Entity(id) so the lookup is a seek
+                # and a retyped node keeps its identity. Ids are shared by all
+                # entity types, so only a new node or one the user or campaign
+                # already holds is written or linked; any other row is not
+                # returned and fails as unmatched
+                merge = """MERGE (node:Entity {id: row.id})
+            WITH u, c, row, node
+            WHERE node.createdAt IS NULL
+               OR EXISTS { (u)-[:PART_OF]->(node) }
+               OR (c IS NOT NULL AND EXISTS { (node)-[:PART_OF]->(c) })"""
+                # Only a current write retypes the node, and it drops the old
+                # type so the node is never listed under two types. :Campaign
+                # is never removed; campaigns are not retyped by a push
+                others = "".join(
+                    f":{other}"
+                    for other in NODE_LABELS
+                    if other not in (label, "Campaign")
+                )
+                relabel = f"""
+                REMOVE node{others}
+                SET  node:{label}"""
+                flag = "," + _flag_for_embedding("node")
+            else:
+                node_label = {"folders": "FOLDER", "chats": "ChatSession"}[entity]
+                merge = f"MERGE (node:{node_label} {{id: row.id}})"
+            return f"""
+            MATCH (u:User {{id:$user_id}})
+            OPTIONAL MATCH (u)-[:OWNS]->(c:Campaign {{id:$cid}})
+            UNWIND $rows AS row
+            {merge}
+            WITH u, c, row, node, coalesce(node.updatedAt, 0) > row.ts AS stale
+            FOREACH (_ IN CASE WHEN stale THEN [] ELSE [1] END |{relabel}
+                SET  node += row.props,
+                     node.createdAt = coalesce(node.createdAt, row.ts),
+                     node.updatedAt = row.ts{flag}
+            )
+            FOREACH (_ IN CASE WHEN c IS NULL THEN [] ELSE [1] END |
+                MERGE (node)-[:PART_OF]->(c)
+            )
+            MERGE (u)-[:PART_OF]->(node)
+            RETURN row.idx AS idx, stale
+            """
+        case ("node", "update"):
+            content_changed = "any(k IN ['title', 'markdown'] WHERE k IN keys(row.props))"
+            return """
+            MATCH (u:User {id:$user_id})-[:OWNS]->(c:Campaign {id:$cid})
+            UNWIND $rows AS row
+            MATCH (c)<-[:PART_OF]-(n:Entity {id: row.id})
+            WITH n, row, coalesce(n.updatedAt, 0) > row.ts AS stale
+            FOREACH (_ IN CASE WHEN stale THEN [] ELSE [1] END |
+                SET  n += row.props,
+                     n.updatedAt = row.ts,""" + _flag_for_embedding("n", content_changed) + """
+            )
+            RETURN row.idx AS idx, stale
+            """
+        case ("node", "delete"):
+            # DETACH DELETE drops the node's client edges too; their ids are
+            # returned so the change log can tombstone them as well
+            return """
+            MATCH (u:User {id:$user_id})-[:OWNS]->(c:Campaign {id:$cid})
+            UNWIND $rows AS row
+            MATCH (c)<-[:PART_OF]-(n:Entity {id: row.id})
+            WITH row, n, [(n)-[r:""" + "|".join(EDGE_TYPES) + """]-() WHERE r.id IS NOT NULL | r.id] AS edgeIds
+            CALL {
+                WITH n
+                MATCH (e)-[:EMBEDS|CHUNK_OF]->(n)
+                DETACH DELETE e
+            }
+            DETACH DELETE n
+            RETURN row.idx AS idx, false AS stale, edgeIds
+            """
+        case ("folders", "delete"):
+            return """
+            MATCH (u:User {id:$user_id})-[:OWNS]->(c:Campaign {id:$cid})
+            UNWIND $rows AS row
+            MATCH (c)<-[:PART_OF]-(f:FOLDER {id: row.id})
+            DETACH DELETE f
+            RETURN row.idx AS idx, false AS stale
+            """
+        case ("chats", "delete"):
+            return """
+            UNWIND $rows AS row
+            MATCH (chat:ChatSession {id: row.id})
+            DETACH DELETE chat
+            RETURN row.idx AS idx, false AS stale
+            """
+        case ("chatMessages", "upsert"):
+            return """
+            UNWIND $rows AS row
+            MERGE (msg:ChatMessage {id: row.id})
+            SET  msg += row.props,
+                 msg.createdAt = coalesce(msg.createdAt, row.ts)
+            WITH msg, row
+            OPTIONAL MATCH (chat:ChatSession {id: row.chatId})
+            FOREACH (_ IN CASE WHEN chat IS NULL THEN [] ELSE [1] END |
+                MERGE (chat)-[:HAS_MESSAGE]->(msg)
+            )
+            RETURN row.idx AS idx, false AS stale
+            """
+        case ("chatMessages", "delete"):
+            return """
+            UNWIND $rows AS row
+            MATCH (msg:ChatMessage {id: row.id})
+            DETACH DELETE msg
+            RETURN row.idx AS idx, false AS stale
+            """
+        case ("edge", "create"):
+            return f"""
+            UNWIND $rows AS row
+            MATCH (a:Entity {{id: row.fromId}}), (b:Entity {{id: row.toId}})
+            MERGE (a)-[r:{label}]->(b)
+            SET  r += row.props,
+                 r.id = row.id,
+                 r.createdAt = coalesce(r.createdAt, row.ts),
+                 r.updatedAt = row.ts
+            RETURN row.idx AS idx, false AS stale
+            """
+        case ("edge", "update"):
+            return """
+            UNWIND $rows AS row
+            """ + MATCH_CLIENT_EDGE + """
+            WITH r, row, coalesce(r.updatedAt, 0) > row.ts AS stale
+            FOREACH (_ IN CASE WHEN stale THEN [] ELSE [1] END |
+                SET r += row.props,
+                    r.updatedAt = row.ts
+            )
+            RETURN row.idx AS idx, stale
+            """
+        case ("edge", "delete"):
+            return """
+            UNWIND $rows AS row
+            """ + MATCH_CLIENT_EDGE + """
+            DELETE r
+            RETURN row.idx AS idx, false AS stale
+            """
+    raise UnknownStatement(f"No statement for {entity}/{op}")
+
+
+# Which ops are parameterised by a label, and the labels each one accepts
+_LABELLED = {
+    ("node", "create"): NODE_LABELS,
+    ("edge", "create"): EDGE_TYPES,
+}
+
+_UNLABELLED = [
+    ("folders", "upsert"),
+    ("chats", "upsert"),
+    ("chatMessages", "upsert"),
+    ("node", "update"),
+    ("edge", "update"),
+    ("edge", "delete"),
+    ("chatMessages", "delete"),
+    ("node", "delete"),
+    ("folders", "delete"),
+    ("chats", "delete"),
+]
+
+
+@dataclass
+class StatementRegistry:
+    statements: dict[StatementKey, str] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls) -> "StatementRegistry":
+        registry = cls()
+        for (entity, op), labels in _LABELLED.items():
+            for label in labels:
+                registry.add(entity, op, label)
+        for entity, op in _UNLABELLED:
+            registry.add(entity, op)
+        return registry
+
+    def add(self, entity: str, op: str, label: Optional[str] = None) -> None:
+        cypher = render_statement(entity, op, label)
+        self.statements[(entity, op, label)] = cypher
+        mark_prepared(cypher)
+
+    def check(self, entity: str, op: str, label: Optional[str] = None) -> None:
+        """Raise UnknownStatement (counted as a miss) unless it is registered."""
+        if (entity, op, label) in self.statements:
+            return
+        record_registry_lookup(hit=False)
+        if (entity, op) in _LABELLED:
+            kind = "node type" if entity == "node" else "relationship type"
+            raise UnknownStatement(f"Unsupported {kind} '{label}'")
+        raise UnknownStatement(f"Unsupported operation '{op}' for {entity}")
+
+    def get(self, entity: str, op: str, label: Optional[str] = None) -> str:
+        """The prepared statement for (entity, op, label), counted as a hit."""
+        cypher = self.statements.get((entity, op, label))
+        if cypher is None:
+            self.check(entity, op, label)
+        record_registry_lookup(hit=True)
+        return cypher
+
+
+_registry: StatementRegistry | None = None
+
+
+def get_statement_registry() -> StatementRegistry:
+    """Get or build the process-wide statement registry."""
+    global _registry
+    if _registry is None:
+        _registry = StatementRegistry.build()
+    return _registry
@@ -12,6 +12,7 @@ import signal
 import logging
 from rq import Worker
 from services.queue_service import get_redis_connection, get_task_queue
+from services.embeddings.scheduler import QUEUES as EMBEDDING_QUEUES
 
 # Configure logging
 logging.basicConfig(
@@ -44,7 +45,16 @@ def main():
         sys.exit(1)
 
     # Define queues to listen to (in order of priority)
-    queue_names = ["priority", "default", "long_running"]
+    # Embedding classes interleave with them: interactive embedding ahead of
+    # everything, backfills behind everything
+    queue_names = [
+        EMBEDDING_QUEUES["interactive"],
+        "priority",
+        "default",
+        EMBEDDING_QUEUES["maintenance"],
+        "long_running",
+        EMBEDDING_QUEUES["backfill"],
+    ]
     queues = [get_task_queue(name) for name in queue_names]
 
     # Create worker with unique name including timestamp